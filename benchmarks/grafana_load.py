@@ -0,0 +1,293 @@
+#!/usr/bin/env -S uv run python
+"""
+Carga HTTP simulando refrescos de dashboards de Grafana sobre /kpi/Producto/*.
+
+Cada dashboard pide todos sus paneles a la vez (como Grafana al refrescar),
+con un rango from/to aleatorio de los presets, espera --refresh segundos y
+repite; con --batched hace un único POST a /grafana/query por refresco. Se
+lanzan N dashboards concurrentes repartidos entre M tenants (parámetro
+``org``) contra una API local con datos de tenant_data.py.
+
+Al terminar muestra por ruta: peticiones, errores, throughput y latencia
+p50/p95/p99; la espera por conexión del pool (/kpi/Producto/pool-stats) y la
+RSS del contenedor (o proceso) a lo largo de la prueba.
+
+Uso:
+  python benchmarks/grafana_load.py --url http://127.0.0.1:9000 \\
+      --dashboards 20 --tenants org_bench_s org_bench_m --duration 60 \\
+      [--batched] [--token TOKEN] [--container kpis-app | --pid PID] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+
+import httpx
+
+PREFIX = "/kpi/Producto"
+
+# Paneles del dashboard de Producto: (ruta, acepta rango from/to)
+PANELS = [
+    ("/sesiones-creadas", True),
+    ("/analisis-ia-ejecutados", True),
+    ("/consumo-credits-ia", False),
+    ("/consumo-muestras", False),
+    ("/tiempo-procesamiento-ia", True),
+    ("/frecuencia-uso", True),
+    ("/adopcion-funcionalidades-ia", True),
+    ("/exportaciones-generadas", True),
+    ("/porcentaje-usuarios-duplican-sesiones", True),
+    ("/duracion-media-sesion", True),
+]
+
+BATCH_ROUTE = "/grafana/query"
+
+# Rangos típicos de Grafana (segundos hacia atrás desde ahora)
+RANGES = {
+    "24h": 86_400,
+    "7d": 7 * 86_400,
+    "30d": 30 * 86_400,
+    "90d": 90 * 86_400,
+}
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def time_range() -> dict[str, int]:
+    now_ms = int(time.time() * 1000)
+    span = RANGES[random.choice(list(RANGES))]
+    return {"from": now_ms - span * 1000, "to": now_ms}
+
+
+async def request_panel(client, route, params, latencies, errors, body=None) -> None:
+    start = time.perf_counter()
+    try:
+        if body is not None:
+            response = await client.post(PREFIX + route, json=body)
+        else:
+            response = await client.get(PREFIX + route, params=params)
+        ok = response.status_code == 200
+    except httpx.HTTPError:
+        ok = False
+    elapsed = time.perf_counter() - start
+    if ok:
+        latencies[route].append(elapsed)
+    else:
+        errors[route] += 1
+
+
+def batched_query(tenant: str, range_params: dict[str, int]) -> dict:
+    """Cuerpo de /grafana/query con todos los paneles del dashboard."""
+    return {
+        "range": {
+            key: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ms / 1000))
+            for key, ms in range_params.items()
+        },
+        "targets": [
+            {"refId": chr(ord("A") + i), "target": route.lstrip("/"), "tenant": tenant}
+            for i, (route, _) in enumerate(PANELS)
+        ],
+    }
+
+
+async def dashboard(client, tenant, deadline, refresh, latencies, errors, batched=False) -> None:
+    # Los dashboards no arrancan a la vez
+    await asyncio.sleep(random.uniform(0, refresh))
+    while time.monotonic() < deadline:
+        range_params = time_range()
+        if batched:
+            body = batched_query(tenant, range_params)
+            await request_panel(client, BATCH_ROUTE, None, latencies, errors, body)
+            await asyncio.sleep(refresh)
+            continue
+        await asyncio.gather(
+            *(
+                request_panel(
+                    client,
+                    route,
+                    {"org": tenant, **(range_params if ranged else {})},
+                    latencies,
+                    errors,
+                )
+                for route, ranged in PANELS
+            )
+        )
+        await asyncio.sleep(refresh)
+
+
+def container_rss_mb(container: str, runtime: str) -> float | None:
+    try:
+        output = subprocess.run(
+            [runtime, "stats", "--no-stream", "--format", "{{.MemUsage}}", container],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    value = output.split("/")[0].strip()
+    units = {"KiB": 1 / 1024, "MiB": 1, "GiB": 1024, "kB": 1 / 1000, "MB": 1, "GB": 1000}
+    for unit, factor in units.items():
+        if value.endswith(unit):
+            return round(float(value[: -len(unit)]) * factor, 1)
+    return None
+
+
+def process_rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+async def sampler(client, args, deadline, timeline) -> None:
+    """Cada --sample-every segundos: RSS y conexiones en uso del pool."""
+    start = time.monotonic()
+    while time.monotonic() < deadline:
+        point = {"t": round(time.monotonic() - start, 1)}
+        if args.container:
+            point["rss_mb"] = await asyncio.to_thread(
+                container_rss_mb, args.container, args.runtime
+            )
+        elif args.pid:
+            point["rss_mb"] = process_rss_mb(args.pid)
+        try:
+            response = await client.get(PREFIX + "/pool-stats")
+            point["checked_out"] = response.json()["pool"]["checked_out"]
+        except (httpx.HTTPError, ValueError, KeyError):
+            point["checked_out"] = None
+        timeline.append(point)
+        await asyncio.sleep(args.sample_every)
+
+
+async def run(args) -> dict:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.dashboards * len(PANELS))
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    timeline: list[dict] = []
+    async with httpx.AsyncClient(
+        base_url=args.url, headers=headers, limits=limits, timeout=args.timeout
+    ) as client:
+        pool_before = (await client.get(PREFIX + "/pool-stats")).json()
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(
+            sampler(client, args, deadline, timeline),
+            *(
+                dashboard(
+                    client,
+                    args.tenants[i % len(args.tenants)],
+                    deadline,
+                    args.refresh,
+                    latencies,
+                    errors,
+                    args.batched,
+                )
+                for i in range(args.dashboards)
+            ),
+        )
+        elapsed = time.monotonic() - start
+        pool_after = (await client.get(PREFIX + "/pool-stats")).json()
+
+    routes = {}
+    for route in [BATCH_ROUTE] if args.batched else [route for route, _ in PANELS]:
+        values = latencies.get(route, [])
+        routes[route] = {
+            "requests": len(values) + errors.get(route, 0),
+            "errors": errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": _ms(percentile(values, 0.50)),
+            "p95_ms": _ms(percentile(values, 0.95)),
+            "p99_ms": _ms(percentile(values, 0.99)),
+        }
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "dashboards": args.dashboards,
+        "tenants": args.tenants,
+        "duration_s": round(elapsed, 1),
+        "rps": round(total / elapsed, 2),
+        "routes": routes,
+        "pool": {
+            "checkouts": pool_after["checkouts"] - pool_before["checkouts"],
+            "wait_ms": pool_after["wait_ms"],
+        },
+        "timeline": timeline,
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def print_report(report: dict) -> None:
+    print(
+        f">>> {report['dashboards']} dashboards, {len(report['tenants'])} tenants, "
+        f"{report['duration_s']}s, {report['rps']} req/s"
+    )
+    print(f"{'ruta':<42}{'req':>7}{'err':>5}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, r in report["routes"].items():
+        print(
+            f"{route:<42}{r['requests']:>7}{r['errors']:>5}{r['rps']:>8}"
+            f"{r['p50_ms'] or '-':>9}{r['p95_ms'] or '-':>9}{r['p99_ms'] or '-':>9}"
+        )
+    wait = report["pool"]["wait_ms"]
+    print(
+        f"pool: {report['pool']['checkouts']} checkouts, espera ms "
+        f"p50={wait['p50']} p95={wait['p95']} p99={wait['p99']} max={wait['max']}"
+    )
+    rss = [p["rss_mb"] for p in report["timeline"] if p.get("rss_mb") is not None]
+    if rss:
+        print(f"RSS MB: inicio={rss[0]} max={max(rss)} final={rss[-1]}")
+    checked_out = [
+        p["checked_out"] for p in report["timeline"] if p.get("checked_out") is not None
+    ]
+    if checked_out:
+        print(f"conexiones en uso: max={max(checked_out)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:9000")
+    parser.add_argument("--token", default=os.getenv("TOKEN_GRAFANA", ""))
+    parser.add_argument("--dashboards", type=int, default=10)
+    parser.add_argument("--tenants", nargs="+", default=["org_bench_s"])
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--refresh", type=float, default=5, help="segundos entre refrescos")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--sample-every", type=float, default=1)
+    parser.add_argument("--container", help="contenedor de la API para medir RSS")
+    parser.add_argument("--runtime", default="docker", help="docker o podman")
+    parser.add_argument("--pid", type=int, help="PID de la API (sin contenedor)")
+    parser.add_argument(
+        "--batched", action="store_true", help="un POST /grafana/query por refresco"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env -S uv run python
+"""
+Micro-benchmarks de ProductoRepository y ProductoService por nivel de datos.
+
+Ejecuta cada método público (sin argumentos obligatorios) contra uno o varios
+schemas generados con benchmarks/tenant_data.py y guarda tiempos en un JSON
+con el commit actual. Con --baseline compara contra un JSON anterior.
+
+Uso:
+  python benchmarks/tenant_data.py --tier s
+  python benchmarks/producto_repository.py --schema org_bench_s --output base.json
+  python benchmarks/producto_repository.py --schema org_bench_s --baseline base.json
+"""
+
+import argparse
+import inspect
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.repositories.product_repositories import ProductoRepository  # noqa: E402
+from app.services.product_services import ProductoService  # noqa: E402
+
+TABLES = ("user", "session", "section", "question", "answer", "file", "report")
+REGRESSION_RATIO = 1.2
+
+
+def public_methods(obj) -> dict:
+    """Métodos públicos que se pueden llamar sin argumentos."""
+    methods = {}
+    for name, method in inspect.getmembers(obj, inspect.ismethod):
+        if name.startswith("_"):
+            continue
+        params = inspect.signature(method).parameters.values()
+        if all(p.default is not p.empty for p in params):
+            methods[name] = method
+    return methods
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def table_counts(db: Session, schema: str) -> dict[str, int]:
+    rows = db.execute(
+        text(
+            "SELECT relname, reltuples::bigint FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND relkind = 'r'"
+        ),
+        {"schema": schema},
+    ).all()
+    counts = {name: int(n) for name, n in rows}
+    return {table: counts.get(table, 0) for table in TABLES}
+
+
+def measure(method, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        method()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        method()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "min": timings[0],
+        "median": statistics.median(timings),
+        "p95": timings[min(len(timings) - 1, round(0.95 * (len(timings) - 1)))],
+        "repeat": repeat,
+    }
+
+
+def bench_schema(engine, schema: str, repeat: int, warmup: int, only=None) -> dict:
+    tenant = engine.execution_options(
+        schema_translate_map={None: schema, settings.ORG_SCHEMA: schema}
+    )
+    results = {}
+    with Session(tenant) as db:
+        counts = table_counts(db, schema)
+        layers = {
+            "repository": ProductoRepository(db),
+            "service": ProductoService(db),
+        }
+        for layer, obj in layers.items():
+            for name, method in public_methods(obj).items():
+                key = f"{layer}.{name}"
+                if only and not any(pattern in key for pattern in only):
+                    continue
+                try:
+                    results[key] = measure(method, repeat, warmup)
+                except Exception as e:  # noqa: BLE001
+                    db.rollback()
+                    results[key] = {"error": str(e).splitlines()[0]}
+                print_result(schema, key, results[key])
+    return {"counts": counts, "results": results}
+
+
+def print_result(schema: str, key: str, result: dict, baseline: dict | None = None):
+    if "error" in result:
+        print(f"{schema:<18}{key:<55}  ERROR: {result['error']}")
+        return
+    line = f"{schema:<18}{key:<55}{result['median'] * 1000:>10.2f} ms"
+    if baseline and "median" in baseline:
+        ratio = result["median"] / baseline["median"] if baseline["median"] else 0.0
+        flag = "  <-- regresión" if ratio > REGRESSION_RATIO else ""
+        line += f"{ratio:>8.2f}x{flag}"
+    print(line)
+
+
+def compare(report: dict, baseline: dict) -> None:
+    print(f"\n>>> Comparación con {baseline.get('commit')} ({baseline.get('created')})")
+    for schema, data in report["schemas"].items():
+        base = baseline.get("schemas", {}).get(schema)
+        if base is None:
+            print(f"{schema}: no está en la baseline")
+            continue
+        for key, result in data["results"].items():
+            print_result(schema, key, result, base["results"].get(key))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--schema", nargs="+", default=["org_bench_xs"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="filtra métodos por substring")
+    parser.add_argument("--output", help="JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.POSTGRES_URL)
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(UTC).isoformat(),
+        "repeat": args.repeat,
+        "schemas": {},
+    }
+    try:
+        for schema in args.schema:
+            report["schemas"][schema] = bench_schema(
+                engine, schema, args.repeat, args.warmup, args.only
+            )
+    finally:
+        engine.dispose()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f">>> Resultados en {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
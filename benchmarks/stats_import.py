@@ -0,0 +1,126 @@
+#!/usr/bin/env -S uv run python
+"""
+Coste de arranque en frío de stats.py y de la app.
+
+Cada medición se ejecuta en un intérprete nuevo y reporta tiempo de import y
+RSS. Compara la carga perezosa actual (los backends de cada StatTest se
+importan en su primera ejecución) con la carga anticipada anterior
+(statsmodels.api, statsmodels.formula.api y scipy.stats al importar el módulo).
+
+Uso: python benchmarks/stats_import.py [--repeat N] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import resource, sys, time
+sys.path[:0] = {paths!r}
+start = time.perf_counter()
+{setup}
+elapsed = time.perf_counter() - start
+with open("/proc/self/statm") as statm:
+    rss_kb = int(statm.read().split()[1]) * resource.getpagesize() // 1024
+print(elapsed, rss_kb, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+STAT_TEST_SETUP = """
+import pandas as pd
+import stats
+data = pd.DataFrame({{
+    "user_id": [u for u in range(6) for _ in range(3)],
+    "code_sample_id": [s for _ in range(6) for s in range(3)],
+    "attribute_id": [1] * 18,
+    "placeholder_order": [(u * 7 + s * 3) % 5 for u in range(6) for s in range(3)],
+    "placeholder_name": [str((u + s) % 4) for u in range(6) for s in range(3)],
+    "order": [(u + s) % 3 for u in range(6) for s in range(3)],
+}})
+question = stats.StatsQuestion(type={question_type}, attributes=())
+result = stats.Stats(question, stat_test=stats.{stat_test}(), code_samples=[])
+result.execute_test(data)
+"""
+
+SCENARIOS = {
+    "stats (lazy)": ("import stats", [ROOT]),
+    "stats + eager backends": (
+        "import stats\n"
+        "import statsmodels.api\n"
+        "import statsmodels.formula.api\n"
+        "import statsmodels.stats.multitest\n"
+        "import scipy.stats",
+        [ROOT],
+    ),
+    "Anova first run": (
+        STAT_TEST_SETUP.format(question_type=1, stat_test="Anova"),
+        [ROOT],
+    ),
+    "TTest first run": (
+        STAT_TEST_SETUP.format(question_type=1, stat_test="TTest"),
+        [ROOT],
+    ),
+    "ChiSquare first run": (
+        STAT_TEST_SETUP.format(question_type=4, stat_test="ChiSquare"),
+        [ROOT],
+    ),
+    "Friedman first run": (
+        STAT_TEST_SETUP.format(question_type=4, stat_test="Friedman"),
+        [ROOT],
+    ),
+    "app (src/main.py)": ("import main", [os.path.join(ROOT, "src")]),
+}
+
+
+def measure(setup: str, paths: list[str]) -> tuple[float, int, int]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(paths=paths, setup=setup)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    elapsed, rss_kb, max_rss_kb = result.stdout.split()
+    return float(elapsed), int(rss_kb), int(max_rss_kb)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = {}
+    for name, (setup, paths) in SCENARIOS.items():
+        try:
+            runs = [measure(setup, paths) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            report[name] = {"error": str(e)}
+            continue
+        report[name] = {
+            "import_seconds": round(statistics.median(r[0] for r in runs), 4),
+            "rss_mb": round(statistics.median(r[1] for r in runs) / 1024, 1),
+            "max_rss_mb": round(max(r[2] for r in runs) / 1024, 1),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'escenario':<26}{'import (s)':>12}{'RSS (MB)':>11}{'máx RSS':>10}")
+    for name, row in report.items():
+        if "error" in row:
+            print(f"{name:<26}  ERROR: {row['error']}")
+            continue
+        print(
+            f"{name:<26}{row['import_seconds']:>12.4f}"
+            f"{row['rss_mb']:>11.1f}{row['max_rss_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
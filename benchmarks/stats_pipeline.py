@@ -0,0 +1,199 @@
+#!/usr/bin/env -S uv run python
+"""
+Coste por etapa del pipeline de stats.py para una AggregatedSession sintética.
+
+Para cada tamaño de panel (sujetos) mide tiempo y pico de memoria de:
+  - clean: DataCleaner sobre respuestas crudas
+  - aggregate: Aggregator de cada pregunta
+  - Anova / TTest / ChiSquare / Friedman: Stats.execute_test por tipo de test
+  - execute_stats_tests: todos los tests de la sesión (Friedman por lotes)
+  - end-to-end: clean + aggregate + execute_stats_tests
+
+Uso:
+  python benchmarks/stats_pipeline.py [--subjects 50 200 1000] [--samples 4]
+      [--attributes 3] [--placeholders 9] [--types 1 2 3 4] [--repeat N] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats_synthetic import (  # noqa: E402
+    SyntheticConfig,
+    aggregate_question,
+    make_clean_data,
+    make_code_samples,
+    make_question,
+    make_raw_answers,
+)
+
+import stats  # noqa: E402
+
+STAT_TESTS = ("Anova", "TTest", "ChiSquare", "Friedman")
+
+
+def build_inputs(config: SyntheticConfig) -> tuple[list, list]:
+    """Preguntas de la sesión con sus respuestas crudas."""
+    rng = np.random.default_rng(config.seed)
+    code_samples = make_code_samples(config)
+    questions = []
+    for section in range(config.sections):
+        for order in range(config.questions_per_section):
+            question_type = config.question_types[
+                (section * config.questions_per_section + order)
+                % len(config.question_types)
+            ]
+            question = make_question(config, question_type, order)
+            clean_data = make_clean_data(question, code_samples, config, rng)
+            questions.append((question, make_raw_answers(question, clean_data)))
+    return code_samples, questions
+
+
+def clean(questions, selected_lang=None) -> list:
+    cleaned = []
+    for question, raw_answers in questions:
+        frames = []
+        for attribute_id, answers in raw_answers.items():
+            frame = stats.CleanData(question, attribute_id).execute_cleaner(
+                answers, selected_lang
+            )
+            if attribute_id is not None and "attribute_id" not in frame:
+                frame["attribute_id"] = attribute_id
+            frames.append(frame)
+        cleaned.append((question, pd.concat(frames, ignore_index=True)))
+    return cleaned
+
+
+def aggregate(cleaned, code_samples, selected_lang=None) -> list:
+    return [
+        (
+            aggregate_question(question, code_samples, clean_data, selected_lang),
+            clean_data,
+        )
+        for question, clean_data in cleaned
+    ]
+
+
+def stats_clean_data(aggregated) -> list:
+    pairs = []
+    for aggregated_question, clean_data in aggregated:
+        for question_stats in aggregated_question.stats:
+            data = clean_data
+            if question_stats.attribute_id is not None:
+                data = clean_data[
+                    clean_data["attribute_id"] == question_stats.attribute_id
+                ]
+            pairs.append((question_stats, data.copy()))
+    return pairs
+
+
+def run_tests(pairs) -> None:
+    for question_stats, data in pairs:
+        question_stats.execute_test(data)
+
+
+def end_to_end(questions, code_samples, max_workers) -> None:
+    aggregated = aggregate(clean(questions), code_samples)
+    stats.execute_stats_tests(stats_clean_data(aggregated), max_workers=max_workers)
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(timings), "peak_mb": peak / 1024 / 1024}
+
+
+def bench(config: SyntheticConfig, repeat: int, max_workers) -> dict:
+    code_samples, questions = build_inputs(config)
+    cleaned = clean(questions)
+    aggregated = aggregate(cleaned, code_samples)
+    pairs = stats_clean_data(aggregated)
+    by_test = {
+        name: [p for p in pairs if type(p[0].stat_test).__name__ == name]
+        for name in STAT_TESTS
+    }
+
+    stages = {
+        "clean": lambda: clean(questions),
+        "aggregate": lambda: aggregate(cleaned, code_samples),
+    }
+    for name, test_pairs in by_test.items():
+        if test_pairs:
+            stages[name] = lambda test_pairs=test_pairs: run_tests(test_pairs)
+    stages["execute_stats_tests"] = lambda: stats.execute_stats_tests(
+        pairs, max_workers=max_workers
+    )
+    stages["end-to-end"] = lambda: end_to_end(questions, code_samples, max_workers)
+
+    results = {}
+    for name, fn in stages.items():
+        results[name] = measure(fn, repeat)
+        if name in by_test:
+            results[name]["tests"] = len(by_test[name])
+    return {
+        "answers": sum(
+            len(answers) for _, raw in questions for answers in raw.values()
+        ),
+        "stages": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--subjects", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--samples", type=int, default=4)
+    parser.add_argument("--attributes", type=int, default=3)
+    parser.add_argument("--placeholders", type=int, default=9)
+    parser.add_argument("--sections", type=int, default=2)
+    parser.add_argument("--questions-per-section", type=int, default=4)
+    parser.add_argument("--types", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--max-workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    report = {}
+    if not args.json:
+        print(f"{'sujetos':>8}  {'etapa':<22}{'tiempo (s)':>12}{'pico (MB)':>11}")
+    for subjects in args.subjects:
+        config = SyntheticConfig(
+            subjects=subjects,
+            samples=args.samples,
+            attributes=args.attributes,
+            placeholders=args.placeholders,
+            sections=args.sections,
+            questions_per_section=args.questions_per_section,
+            question_types=tuple(args.types),
+        )
+        result = bench(config, args.repeat, args.max_workers)
+        report[subjects] = result
+        if args.json:
+            continue
+        for name, stage in result["stages"].items():
+            label = f"{name} ({stage['tests']})" if "tests" in stage else name
+            print(
+                f"{subjects:>8}  {label:<22}"
+                f"{stage['seconds']:>12.4f}{stage['peak_mb']:>11.1f}"
+            )
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env -S uv run python
+"""
+Serialización de AggregatedSession: model_dump frente a stats_serializer.
+
+Para sesiones sintéticas con 100 / 1.000 / 10.000 respuestas por pregunta
+mide tiempo y pico de memoria de:
+  - jsonable_encoder (lo que hace FastAPI al devolver el modelo)
+  - model_dump + json.dumps (camino actual)
+  - model_dump_json
+  - serialize_session (orjson, sin revalidar)
+  - iter_session_json (streaming pregunta a pregunta)
+
+Uso: python benchmarks/stats_serialization.py [--answers 100 1000 10000] [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stats_synthetic import SyntheticConfig, make_session  # noqa: E402
+
+import stats_serializer  # noqa: E402
+
+
+def fastapi_jsonable_encoder(session):
+    from fastapi.encoders import jsonable_encoder
+
+    return json.dumps(jsonable_encoder(session)).encode()
+
+
+def model_dump_json_dumps(session):
+    return json.dumps(session.model_dump(), default=str).encode()
+
+
+def model_dump_json(session):
+    return session.model_dump_json().encode()
+
+
+def orjson_serializer(session):
+    return stats_serializer.serialize_session(session)
+
+
+def orjson_streaming(session):
+    return sum(len(chunk) for chunk in stats_serializer.iter_session_json(session))
+
+
+SERIALIZERS = {
+    "jsonable_encoder": fastapi_jsonable_encoder,
+    "model_dump + json": model_dump_json_dumps,
+    "model_dump_json": model_dump_json,
+    "orjson": orjson_serializer,
+    "orjson streaming": orjson_streaming,
+}
+
+
+def measure(serializer, session, repeat: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serializer(session)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    serializer(session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--answers", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--samples", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'respuestas':>10}  {'serializador':<20}{'tiempo (s)':>12}{'pico (MB)':>11}"
+    )
+    for answers in args.answers:
+        config = SyntheticConfig(
+            subjects=max(1, answers // args.samples), samples=args.samples
+        )
+        session, _ = make_session(config, with_stats=False)
+        for name, serializer in SERIALIZERS.items():
+            try:
+                seconds, peak_mb = measure(serializer, session, args.repeat)
+            except Exception as e:  # noqa: BLE001
+                print(f"{answers:>10}  {name:<20}  ERROR: {e}")
+                continue
+            print(f"{answers:>10}  {name:<20}{seconds:>12.4f}{peak_mb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Generador de sesiones sintéticas para los benchmarks de stats.py.
+
+Crea objetos con la forma de los modelos (question, attribute, placeholder,
+code sample, translations) y datos limpios con el formato de cada
+DataCleaner, sin base de datos.
+"""
+
+import os
+import sys
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stats  # noqa: E402
+
+LANGS = ("es", "en", "fr")
+
+
+@dataclass
+class SyntheticConfig:
+    subjects: int = 100
+    samples: int = 4
+    attributes: int = 3
+    placeholders: int = 9
+    sections: int = 2
+    questions_per_section: int = 4
+    question_types: tuple[int, ...] = (1, 2, 3, 4)
+    seed: int = 0
+    ids: dict = field(default_factory=dict)
+
+
+def translations(key: str, text: str) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(key=key, lang=lang, value=f"{text} ({lang})") for lang in LANGS
+    ]
+
+
+def next_id(config: SyntheticConfig, kind: str) -> int:
+    config.ids[kind] = config.ids.get(kind, 0) + 1
+    return config.ids[kind]
+
+
+def make_code_samples(config: SyntheticConfig) -> list[SimpleNamespace]:
+    code_samples = []
+    for i in range(config.samples):
+        sample = SimpleNamespace(id=i + 1, name=f"Muestra {i + 1}")
+        code_samples.append(
+            SimpleNamespace(
+                id=100 + i,
+                sample_id=sample.id,
+                sample=sample,
+                translations=translations("code", f"{100 + i}"),
+            )
+        )
+    return code_samples
+
+
+def make_question(config: SyntheticConfig, question_type: int, order: int):
+    attributes = []
+    if question_type in (1, 3):
+        for _ in range(config.attributes):
+            attribute_id = next_id(config, "attribute")
+            placeholders = [
+                SimpleNamespace(
+                    id=next_id(config, "placeholder"),
+                    order=order,
+                    translations=translations("name", str(order)),
+                )
+                for order in range(1, config.placeholders + 1)
+            ]
+            attributes.append(
+                SimpleNamespace(
+                    id=attribute_id,
+                    placeholders=placeholders,
+                    translations=translations("name", f"Atributo {attribute_id}"),
+                )
+            )
+    question_id = next_id(config, "question")
+    return SimpleNamespace(
+        id=question_id,
+        type=question_type,
+        order=order,
+        multiple=question_type == 3,
+        triangle=False,
+        discrete=question_type == 1,
+        required=True,
+        attributes=attributes,
+        translations=translations("name", f"Pregunta {question_id}"),
+    )
+
+
+def make_clean_data(question, code_samples, config, rng) -> pd.DataFrame:
+    """Datos limpios de una pregunta: una fila por sujeto, muestra y atributo."""
+    users = np.array([uuid.UUID(int=i + 1) for i in range(config.subjects)])
+    n_samples = len(code_samples)
+    code_sample_ids = np.array([code_sample.id for code_sample in code_samples])
+    user_ids = np.repeat(users, n_samples)
+    sample_ids = np.tile(code_sample_ids, config.subjects)
+    if question.type == 1:
+        frames = []
+        for attribute in question.attributes:
+            orders = rng.integers(1, len(attribute.placeholders) + 1, len(user_ids))
+            placeholders = np.array([p.id for p in attribute.placeholders])
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "user_id": user_ids,
+                        "placeholder_id": placeholders[orders - 1],
+                        "placeholder_order": orders,
+                        "placeholder_name": orders.astype(str),
+                        "code_sample_id": sample_ids,
+                        "attribute_id": attribute.id,
+                    }
+                )
+            )
+        return pd.concat(frames, ignore_index=True)
+    if question.type == 2:
+        return pd.DataFrame(
+            {
+                "user_id": user_ids,
+                "value": [f"comentario {i}" for i in range(len(user_ids))],
+                "code_sample_id": sample_ids,
+            }
+        )
+    if question.type == 3:
+        attribute_ids = np.array([attribute.id for attribute in question.attributes])
+        if len(attribute_ids) == 0:
+            selected = rng.random(len(user_ids)) < 0.5
+            return pd.DataFrame(
+                {"user_id": user_ids[selected], "code_sample_id": sample_ids[selected]}
+            )
+        return pd.DataFrame(
+            {
+                "user_id": user_ids,
+                "attribute_id": rng.choice(attribute_ids, len(user_ids)),
+                "code_sample_id": sample_ids,
+            }
+        )
+    ranks = np.argsort(rng.random((config.subjects, n_samples)), axis=1).ravel()
+    return pd.DataFrame(
+        {"user_id": user_ids, "code_sample_id": sample_ids, "order": ranks}
+    )
+
+
+def make_raw_answers(question, clean_data: pd.DataFrame) -> dict:
+    """Respuestas crudas con la forma que leen los DataCleaner.
+
+    Devuelve las respuestas por attribute_id (None en preguntas sin
+    atributos), invirtiendo los datos limpios de ``make_clean_data``.
+    """
+    if question.type == 1:
+        placeholders = {
+            placeholder.id: placeholder
+            for attribute in question.attributes
+            for placeholder in attribute.placeholders
+        }
+        return {
+            attribute.id: [
+                SimpleNamespace(
+                    user_id=row.user_id,
+                    placeholder_id=row.placeholder_id,
+                    placeholder=placeholders[row.placeholder_id],
+                    code_sample_id=row.code_sample_id,
+                )
+                for row in clean_data[
+                    clean_data["attribute_id"] == attribute.id
+                ].itertuples(index=False)
+            ]
+            for attribute in question.attributes
+        }
+    if question.type == 2:
+        return {
+            None: [
+                SimpleNamespace(
+                    user_id=row.user_id,
+                    value=row.value,
+                    code_sample_id=row.code_sample_id,
+                )
+                for row in clean_data.itertuples(index=False)
+            ]
+        }
+    if question.type == 3:
+        return {
+            None: [
+                SimpleNamespace(
+                    user_id=row.user_id,
+                    attribute_id=getattr(row, "attribute_id", None),
+                    code_sample_id=row.code_sample_id,
+                    value=True,
+                )
+                for row in clean_data.itertuples(index=False)
+            ]
+        }
+    return {
+        None: [
+            SimpleNamespace(
+                user_id=row.user_id, code_sample_id=row.code_sample_id, value=row.order
+            )
+            for row in clean_data.itertuples(index=False)
+        ]
+    }
+
+
+def aggregate_question(question, code_samples, clean_data, selected_lang=None):
+    aggregated_question = stats.AggregatedQuestion(question, selected_lang)
+    for code_sample in code_samples:
+        aggregated_question.samples.append(
+            stats.AggregatedSample(code_sample, selected_lang)
+        )
+    if question.type == 1:
+        for attribute in question.attributes:
+            attribute_data = clean_data[clean_data["attribute_id"] == attribute.id]
+            for code_sample in code_samples:
+                answer = stats.AggregatedAnswer(question)
+                answer.set_translation_sources(attribute, code_sample)
+                answer.execute_aggregator(
+                    attribute_data[attribute_data["code_sample_id"] == code_sample.id],
+                    selected_lang,
+                    attribute,
+                    code_sample,
+                )
+                aggregated_question.results.append(answer)
+            aggregated_question.stats.append(
+                stats.Stats(question, attribute.id, code_samples=code_samples)
+            )
+    elif question.type == 2:
+        for row in clean_data.itertuples(index=False):
+            answer = stats.AggregatedAnswer(question)
+            answer.execute_aggregator(pd.DataFrame([row]), selected_lang)
+            aggregated_question.results.append(answer)
+    elif question.type == 3:
+        for attribute in question.attributes:
+            answer = stats.AggregatedAnswer(question)
+            answer.set_translation_sources(attribute)
+            answer.execute_aggregator(clean_data, selected_lang, attribute)
+            aggregated_question.results.append(answer)
+        aggregated_question.stats.append(
+            stats.Stats(question, code_samples=code_samples)
+        )
+    else:
+        answers = []
+        for code_sample in code_samples:
+            answer = stats.AggregatedAnswer(question)
+            answer.set_translation_sources(code_sample=code_sample)
+            answers.append(answer)
+        answers[0].aggregator.execute_samples(answers, clean_data, code_samples)
+        aggregated_question.results.extend(answers)
+        aggregated_question.stats.append(
+            stats.Stats(question, code_samples=code_samples)
+        )
+    return aggregated_question
+
+
+def run_stats(aggregated_question, clean_data):
+    for question_stats in aggregated_question.stats:
+        data = clean_data
+        if question_stats.attribute_id is not None:
+            data = clean_data[clean_data["attribute_id"] == question_stats.attribute_id]
+        question_stats.execute_test(data.copy())
+
+
+def make_session(config: SyntheticConfig, selected_lang=None, with_stats=True):
+    """Sesión agregada completa; devuelve (sesión, datos limpios por pregunta)."""
+    rng = np.random.default_rng(config.seed)
+    code_samples = make_code_samples(config)
+    aggregated_session = stats.AggregatedSession()
+    clean_data_by_question = {}
+    for section_order in range(config.sections):
+        section = SimpleNamespace(
+            id=next_id(config, "section"),
+            repeated_by_sample=False,
+            order=section_order,
+        )
+        aggregated_section = stats.AggregatedSection(section)
+        for order in range(config.questions_per_section):
+            question_type = config.question_types[order % len(config.question_types)]
+            question = make_question(config, question_type, order)
+            clean_data = make_clean_data(question, code_samples, config, rng)
+            aggregated_question = aggregate_question(
+                question, code_samples, clean_data, selected_lang
+            )
+            if with_stats:
+                run_stats(aggregated_question, clean_data)
+            clean_data_by_question[question.id] = clean_data
+            aggregated_section.questions.append(aggregated_question)
+        aggregated_session.sections.append(aggregated_section)
+    return aggregated_session, clean_data_by_question
@@ -0,0 +1,371 @@
+#!/usr/bin/env -S uv run python
+"""
+Generador de datos sintéticos para un tenant (schema org_*) en Postgres local.
+
+Crea el schema con las tablas de app.models y lo llena con COPY por bloques:
+users, sessions, sections, questions, answers, files y report, y añade
+organizaciones en el schema global. Los volúmenes salen de un nivel
+(--tier) y cada uno se puede sobrescribir.
+
+Uso:
+  POSTGRES_URL=postgresql://... python benchmarks/tenant_data.py --tier s
+  python benchmarks/tenant_data.py --schema org_bench_m --tier m --answers 5000000
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import psycopg2  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.schema import CreateSchema  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models import (  # noqa: E402
+    AIReportModel,
+    Answer,
+    File,
+    OrganizationBase,
+    Question,
+    Section,
+    Session,
+    User,
+)
+
+TIERS = {
+    "xs": {
+        "users": 200,
+        "sessions": 500,
+        "answers": 100_000,
+        "files": 1_000,
+        "reports": 500,
+    },
+    "s": {
+        "users": 2_000,
+        "sessions": 5_000,
+        "answers": 1_000_000,
+        "files": 10_000,
+        "reports": 5_000,
+    },
+    "m": {
+        "users": 20_000,
+        "sessions": 50_000,
+        "answers": 10_000_000,
+        "files": 100_000,
+        "reports": 50_000,
+    },
+    "l": {
+        "users": 200_000,
+        "sessions": 500_000,
+        "answers": 100_000_000,
+        "files": 1_000_000,
+        "reports": 500_000,
+    },
+}
+AI_ENGINES = ["DualSense", "JAR", "Ranking", "Verbatim", "Drivers"]
+FILE_TYPES = ["pdf", "xlsx", "pdf", "xlsx", "csv", None]
+LICENSE_TYPES = ["free", "basic", "pro", "enterprise"]
+CHUNK_ROWS = 100_000
+USER, SESSION, SECTION, QUESTION, ANSWER, FILE = range(1, 7)
+HISTORY_DAYS = 730
+
+
+def uuid_text(kind: int, i: int) -> str:
+    """UUID determinista por tabla e índice: no hace falta guardar los ids."""
+    return f"{kind:08x}-0000-4000-8000-{i:012x}"
+
+
+def random_datetime(rng: random.Random, now: datetime) -> datetime:
+    return now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+
+def copy_rows(conn, table: str, columns: list[str], rows) -> int:
+    """COPY ... FROM STDIN por bloques de CHUNK_ROWS filas (csv, NULL vacío)."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    pending = 0
+    with conn.cursor() as cur:
+        for row in rows:
+            buffer.write(",".join("" if v is None else str(v) for v in row))
+            buffer.write("\n")
+            pending += 1
+            if pending == CHUNK_ROWS:
+                buffer.seek(0)
+                cur.copy_expert(sql, buffer)
+                total += pending
+                buffer = io.StringIO()
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cur.copy_expert(sql, buffer)
+            total += pending
+    conn.commit()
+    return total
+
+
+def create_schema(schema: str, drop: bool) -> None:
+    engine = create_engine(settings.POSTGRES_URL)
+    with engine.begin() as conn:
+        if drop:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(CreateSchema(schema, if_not_exists=True))
+        conn.execute(CreateSchema(settings.GLOBAL_SCHEMA, if_not_exists=True))
+    tenant = engine.execution_options(
+        schema_translate_map={None: schema, settings.ORG_SCHEMA: schema}
+    )
+    tables = [
+        User.__table__,
+        Session.__table__,
+        Section.__table__,
+        Question.__table__,
+        Answer.__table__,
+        File.__table__,
+    ]
+    SQLModel.metadata.create_all(tenant, tables=tables)
+    AIReportModel.metadata.create_all(tenant, tables=[AIReportModel.__table__])
+    OrganizationBase.metadata.create_all(engine)
+    engine.dispose()
+
+
+def generate(args) -> dict[str, int]:
+    rng = random.Random(args.seed)
+    now = datetime.now(UTC)
+    schema = args.schema
+    counts: dict[str, int] = {}
+    conn = psycopg2.connect(settings.POSTGRES_URL.replace("+psycopg2", ""))
+    try:
+        counts["user"] = copy_rows(
+            conn,
+            f'"{schema}"."user"',
+            ["id", "name", "email", "role", "created", "updated", "deleted"],
+            (
+                (
+                    uuid_text(USER, i),
+                    f"user {i}",
+                    f"user{i}@{schema}.test",
+                    1 if i % 50 == 0 else 2,
+                    created := random_datetime(rng, now),
+                    created,
+                    created if rng.random() < 0.05 else None,
+                )
+                for i in range(args.users)
+            ),
+        )
+
+        counts["session"] = copy_rows(
+            conn,
+            f'"{schema}".session',
+            ["id", "code", "created", "end_at"],
+            (
+                (
+                    uuid_text(SESSION, i),
+                    f"S{i:08d}",
+                    created := random_datetime(rng, now),
+                    created + timedelta(minutes=rng.randrange(5, 240))
+                    if rng.random() < 0.8
+                    else None,
+                )
+                for i in range(args.sessions)
+            ),
+        )
+
+        n_sections = args.sessions * args.sections_per_session
+        counts["section"] = copy_rows(
+            conn,
+            f'"{schema}".section',
+            ["id", "session_id", "repeated_by_sample"],
+            (
+                (
+                    uuid_text(SECTION, i),
+                    uuid_text(SESSION, i // args.sections_per_session),
+                    rng.random() < 0.5,
+                )
+                for i in range(n_sections)
+            ),
+        )
+
+        n_questions = n_sections * args.questions_per_section
+        counts["question"] = copy_rows(
+            conn,
+            f'"{schema}".question',
+            ["id", "section_id", "type"],
+            (
+                (
+                    uuid_text(QUESTION, i),
+                    uuid_text(SECTION, i // args.questions_per_section),
+                    rng.randint(1, 4),
+                )
+                for i in range(n_questions)
+            ),
+        )
+
+        counts["answer"] = copy_rows(
+            conn,
+            f'"{schema}".answer',
+            ["id", "created", "user_id", "question_id"],
+            (
+                (
+                    uuid_text(ANSWER, i),
+                    random_datetime(rng, now),
+                    uuid_text(USER, rng.randrange(args.users)),
+                    uuid_text(QUESTION, rng.randrange(n_questions)),
+                )
+                for i in range(args.answers)
+            ),
+        )
+
+        counts["file"] = copy_rows(
+            conn,
+            f'"{schema}".file',
+            ["id", "created", "name", "file_type"],
+            (
+                (
+                    uuid_text(FILE, i),
+                    random_datetime(rng, now),
+                    f"export_{i}",
+                    rng.choice(FILE_TYPES),
+                )
+                for i in range(args.files)
+            ),
+        )
+
+        def report_rows():
+            for i in range(args.reports):
+                created = random_datetime(rng, now)
+                started = created + timedelta(seconds=rng.randrange(0, 30))
+                completed = (
+                    started + timedelta(seconds=rng.lognormvariate(3.5, 0.8))
+                    if rng.random() < 0.9
+                    else None
+                )
+                yield (
+                    uuid_text(SESSION, rng.randrange(args.sessions))
+                    if rng.random() < 0.95
+                    else None,
+                    f"report {i}",
+                    "{}",
+                    "completed" if completed else "running",
+                    rng.choice(AI_ENGINES),
+                    rng.choice(["es", "en", "fr"]),
+                    rng.randrange(500, 20_000),
+                    rng.randrange(200, 8_000),
+                    started,
+                    completed,
+                    created,
+                    created,
+                    created if rng.random() < 0.02 else None,
+                )
+
+        counts["report"] = copy_rows(
+            conn,
+            f'"{schema}".report',
+            [
+                "session_id",
+                "title",
+                "params",
+                "status",
+                "ai_engine",
+                "language",
+                "input_tokens",
+                "output_tokens",
+                "started",
+                "completed",
+                "created",
+                "updated",
+                "deleted",
+            ],
+            report_rows(),
+        )
+
+        with conn.cursor() as cur:
+            cur.execute(
+                f'DELETE FROM "{settings.GLOBAL_SCHEMA}".organizations '
+                "WHERE id = %s OR id LIKE %s",
+                (schema, f"{schema}_%"),
+            )
+        conn.commit()
+        counts["organizations"] = copy_rows(
+            conn,
+            f'"{settings.GLOBAL_SCHEMA}".organizations',
+            [
+                "id",
+                "name",
+                "license_type",
+                "license_expiry",
+                "credits",
+                "credits_ia",
+                "created_at",
+            ],
+            (
+                (
+                    schema if i == 0 else f"{schema}_{i}",
+                    f"Org {schema} {i}",
+                    rng.choice(LICENSE_TYPES),
+                    now + timedelta(days=rng.randrange(-30, 365)),
+                    rng.randrange(0, 10_000),
+                    rng.randrange(0, 5_000),
+                    random_datetime(rng, now),
+                )
+                for i in range(args.organizations)
+            ),
+        )
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f'ANALYZE "{schema}".answer')
+            cur.execute(f'ANALYZE "{schema}".session')
+            cur.execute(f'ANALYZE "{schema}".report')
+    finally:
+        conn.close()
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), default="xs")
+    parser.add_argument("--schema", help="por defecto org_bench_<tier>")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--sessions", type=int)
+    parser.add_argument("--sections-per-session", type=int, default=3)
+    parser.add_argument("--questions-per-section", type=int, default=5)
+    parser.add_argument("--answers", type=int)
+    parser.add_argument("--files", type=int)
+    parser.add_argument("--reports", type=int)
+    parser.add_argument("--organizations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--keep", action="store_true", help="no borrar el schema si ya existe"
+    )
+    args = parser.parse_args(argv)
+    for name, value in TIERS[args.tier].items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    if args.schema is None:
+        args.schema = f"org_bench_{args.tier}"
+    if not args.schema.startswith("org_"):
+        parser.error("el schema debe empezar por org_")
+    return args
+
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    create_schema(args.schema, drop=not args.keep)
+    counts = generate(args)
+    elapsed = time.perf_counter() - start
+    for table, n in counts.items():
+        print(f"{table:<15}{n:>14,}")
+    print(f">>> {args.schema} generado en {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,72 @@
 "KPI Producto"
 
+from collections import Counter
 from datetime import datetime, timezone
+from typing import Literal, NamedTuple
 
 import requests
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import SQLAlchemyError
 from sqlmodel import Session
 
 from app.core.config import settings
-from app.core.database import get_db_session
-from app.services.product_services.producto_service import ProductoService
+from app.core.database import (
+    FIRST_ORG_SCHEMA,
+    get_read_db_session,
+    set_statement_timeout,
+    statement_timeout_ms,
+    uses_replica,
+    watched_session,
+)
+from app.repositories.product_repositories import (
+    BatchProductoRepository,
+    ProductoRepository,
+)
+from app.services.product_services.producto_service import ProductoService, rango_hoy
 
 router = APIRouter(tags=["kpi-producto"])
 
 TIMEOUT = 15
 
 
-def get_service(db: Session = Depends(get_db_session)) -> ProductoService:
+Granularity = Literal["hour", "day", "week", "month"]
+
+
+class TimeFilter(NamedTuple):
+    date_from: datetime | None
+    date_to: datetime | None
+    granularity: Granularity | None
+
+
+def _from_ms(ms: int | None) -> datetime | None:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc) if ms is not None else None
+
+
+def get_service(db: Session = Depends(get_read_db_session)) -> ProductoService:
     return ProductoService(db)
 
 
+def _kpi(service: ProductoService, response: Response, kpi: str, *args):
+    """(datos, computed_at) del KPI, precalculado o en vivo; computed_at también
+    en la cabecera X-Computed-At."""
+    datos, computed_at = service.calcular_kpi_o_precalculado(kpi, *args)
+    response.headers["X-Computed-At"] = computed_at.isoformat()
+    return datos, computed_at
+
+
+def get_time_filter(
+    from_ms: int | None = Query(default=None, alias="from"),
+    to_ms: int | None = Query(default=None, alias="to"),
+    granularity: Granularity | None = Query(default=None),
+) -> TimeFilter:
+    """Rango de Grafana (epoch ms) y granularidad opcional. Sin rango: todo el histórico;
+    con granularity: serie temporal agrupada con date_trunc."""
+    return TimeFilter(_from_ms(from_ms), _from_ms(to_ms), granularity)
+
+
 @router.get("/test")
 async def test_endpoint():
     """Test endpoint: localhost:8000/kpi/Producto/test"""
@@ -74,45 +122,78 @@ async def response_time():
     return result
 
 
+# Estado del pool de conexiones y espera por conexión (ms)
+@router.get("/pool-stats", response_model=None)
+async def pool_stats():
+    from app.core import pool_monitor, query_cancel, single_flight
+    from app.core.database import (
+        engine,
+        heavy_tenant_engines,
+        replica_engine,
+        replica_state,
+    )
+
+    state = pool_monitor.get_state(engine, heavy_tenant_engines())
+    state.update(query_cancel.get_state())
+    state["coalescing"] = single_flight.get_state()
+    state["replica"] = replica_state()
+    if replica_engine is not None:
+        state["replica"]["pool"] = pool_monitor.get_state(replica_engine)["pool"]
+    return state
+
+
 ########################################################
 # KPI : Uso e IA
 ########################################################
 
 # Sesiones creadas por fecha
 @router.get("/sesiones-creadas", response_model=None)
-async def sesiones_creadas(
+def sesiones_creadas(
+    response: Response,
     from_ms: int | None = Query(default=None, alias="from"),
     to_ms: int | None = Query(default=None, alias="to"),
+    granularity: Granularity = Query(default="day"),
     service: ProductoService = Depends(get_service),
 ):
-    today = datetime.now(tz=timezone.utc).date()
-    date_from = datetime.fromtimestamp(from_ms / 1000, tz=timezone.utc) if from_ms is not None else datetime(today.year, today.month, today.day, 0, 0, 0, tzinfo=timezone.utc)
-    date_to = datetime.fromtimestamp(to_ms / 1000, tz=timezone.utc) if to_ms is not None else datetime(today.year, today.month, today.day, 23, 59, 59, tzinfo=timezone.utc)
-    return service.sesiones_creadas_por_fecha(date_from=date_from, date_to=date_to)
+    hoy_desde, hoy_hasta = rango_hoy()
+    date_from = _from_ms(from_ms) if from_ms is not None else hoy_desde
+    date_to = _from_ms(to_ms) if to_ms is not None else hoy_hasta
+    return _kpi(service, response, "sesiones-creadas", date_from, date_to, granularity)[0]
 
 #falta dau
 #falta mau
 
 # Análisis IA ejecutados + por tipo (DualSense, JAR, Ranking, Verbatim, Drivers)
 @router.get("/analisis-ia-ejecutados", response_model=None)
-async def analisis_ia_ejecutados(service: ProductoService = Depends(get_service)):
-    return service.analisis_ia_ejecutados()
+def analisis_ia_ejecutados(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
+    return _kpi(service, response, "analisis-ia-ejecutados", *time_filter)[0]
 
 
 # Consumo de Créditos IA — totales y por plan — shared.organizations
 @router.get("/consumo-credits-ia", response_model=None)
-async def consumo_credits_ia(service: ProductoService = Depends(get_service)):
-    return service.consumo_credits_ia()
+def consumo_credits_ia(response: Response, service: ProductoService = Depends(get_service)):
+    return _kpi(service, response, "consumo-credits-ia")[0]
 
 # Consumo de Muestras (Credits) — totales y por plan — shared.organizations
 @router.get("/consumo-muestras", response_model=None)
-async def consumo_muestras(service: ProductoService = Depends(get_service)):
-    return service.consumo_muestras()
+def consumo_muestras(response: Response, service: ProductoService = Depends(get_service)):
+    return _kpi(service, response, "consumo-muestras")[0]
 
-# Tiempo medio de procesamiento IA por tipo de análisis (segundos/minutos)
+# Tiempo de procesamiento IA por tipo de análisis: media y p50/p90/p99 (segundos)
 @router.get("/tiempo-procesamiento-ia", response_model=None)
-async def tiempo_procesamiento_ia(service: ProductoService = Depends(get_service)):
-    return service.tiempo_procesamiento_ia()
+def tiempo_procesamiento_ia(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    histograma: bool = Query(default=False, description="incluir la distribución por buckets"),
+    service: ProductoService = Depends(get_service),
+):
+    if histograma:
+        return service.tiempo_procesamiento_ia(*time_filter, histograma=True)
+    return _kpi(service, response, "tiempo-procesamiento-ia", *time_filter)[0]
 
 
 ########################################################
@@ -121,30 +202,210 @@ async def tiempo_procesamiento_ia(service: ProductoService = Depends(get_service
 
 
 @router.get("/frecuencia-uso", response_model=None)
-async def frecuencia_uso(service: ProductoService = Depends(get_service)):
+def frecuencia_uso(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
     "frequency of use = sessions per active user. localhost:8000/kpi/Producto/frecuencia-uso"
-    return {"kpi": "Frecuencia de Uso", "datos": service.frecuencia_uso()}
+    datos, computed_at = _kpi(service, response, "frecuencia-uso", *time_filter)
+    return {"kpi": "Frecuencia de Uso", "datos": datos, "computed_at": computed_at}
 
 
 # % clientes (sesiones) que utilizan análisis IA
 @router.get("/adopcion-funcionalidades-ia", response_model=None)
-async def adopcion_funcionalidades_ia(service: ProductoService = Depends(get_service)):
-    return service.adopcion_funcionalidades_ia()
+def adopcion_funcionalidades_ia(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
+    return _kpi(service, response, "adopcion-funcionalidades-ia", *time_filter)[0]
 
 
 @router.get("/exportaciones-generadas", response_model=None)
-async def exportaciones_generadas(service: ProductoService = Depends(get_service)):
+def exportaciones_generadas(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
     "generated exports (PDF and Excel) by file. localhost:8000/kpi/Producto/exportaciones-generadas"
-    return {"kpi": "Exportaciones Generadas", "datos": service.exportaciones_generadas()}
+    datos, computed_at = _kpi(service, response, "exportaciones-generadas", *time_filter)
+    return {"kpi": "Exportaciones Generadas", "datos": datos, "computed_at": computed_at}
 
 
 @router.get("/porcentaje-usuarios-duplican-sesiones", response_model=None)
-async def porcentaje_usuarios_duplican_sesiones(service: ProductoService = Depends(get_service)):
+def porcentaje_usuarios_duplican_sesiones(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
     "% users that duplicate sessions (>= 2 sessions via session->section->question->answer). localhost:8000/kpi/Producto/porcentaje-usuarios-duplican-sesiones"
-    return {"kpi": "% usuarios que duplican sesiones", "datos": service.porcentaje_usuarios_duplican_sesiones()}
+    datos, computed_at = _kpi(service, response, "porcentaje-usuarios-duplican-sesiones", *time_filter)
+    return {"kpi": "% usuarios que duplican sesiones", "datos": datos, "computed_at": computed_at}
 
 
 @router.get("/duracion-media-sesion", response_model=None)
-async def duracion_media_sesion(service: ProductoService = Depends(get_service)):
+def duracion_media_sesion(
+    response: Response,
+    time_filter: TimeFilter = Depends(get_time_filter),
+    service: ProductoService = Depends(get_service),
+):
     "average session duration (only sessions with session.end_at). localhost:8000/kpi/Producto/duracion-media-sesion"
-    return {"kpi": "Duración media de sesión", "datos": service.duracion_media_sesion()}
+    datos, computed_at = _kpi(service, response, "duracion-media-sesion", *time_filter)
+    return {"kpi": "Duración media de sesión", "datos": datos, "computed_at": computed_at}
+
+
+# KPIs de todos los tenants por día: una sola tabla (shared.tenant_daily_facts)
+@router.get("/global", response_model=None)
+def kpis_globales(
+    from_ms: int | None = Query(default=None, alias="from"),
+    to_ms: int | None = Query(default=None, alias="to"),
+    service: ProductoService = Depends(get_service),
+):
+    "all tenants per day, refreshed every FACTS_REFRESH_SECONDS. localhost:8000/kpi/Producto/global"
+    return {"kpi": "KPIs globales", "datos": service.kpis_globales(_from_ms(from_ms), _from_ms(to_ms))}
+
+
+########################################################
+# Grafana (JSON / Infinity): varios paneles en una petición
+########################################################
+
+
+class GrafanaRange(BaseModel):
+    from_: datetime | None = Field(default=None, alias="from")
+    to: datetime | None = None
+
+
+class GrafanaTarget(BaseModel):
+    refId: str = "A"
+    target: str
+    tenant: str = FIRST_ORG_SCHEMA
+    granularity: Granularity | None = None
+
+
+class GrafanaQuery(BaseModel):
+    range: GrafanaRange = GrafanaRange()
+    targets: list[GrafanaTarget]
+
+
+@router.get("/grafana", response_model=None)
+async def grafana_test():
+    "Grafana JSON datasource: test de conexión"
+    return {"status": "ok"}
+
+
+@router.post("/grafana/search", response_model=None)
+async def grafana_search():
+    "Grafana JSON datasource: KPIs disponibles como target"
+    return list(ProductoService.KPIS)
+
+
+def _grafana_frame(db: Session, service: ProductoService, target: GrafanaTarget, rango: GrafanaRange) -> dict:
+    frame = {"refId": target.refId, "target": target.target, "tenant": target.tenant}
+    try:
+        set_statement_timeout(db, statement_timeout_ms(target.target))
+        frame["datos"], frame["computed_at"] = service.calcular_kpi_o_precalculado(
+            target.target, rango.from_, rango.to, target.granularity
+        )
+    except (ValueError, SQLAlchemyError) as e:
+        db.rollback()
+        frame["error"] = str(e).splitlines()[0]
+    return frame
+
+
+async def _grafana_tenant(
+    request: Request, tenant: str, read_only: bool, targets: list[GrafanaTarget], rango: GrafanaRange
+) -> tuple[list[dict], int, int]:
+    """(frames, consultas, consultas reutilizadas) de los targets de un tenant, en una
+    sesión. Deja de ejecutar targets si el cliente se desconecta."""
+    async with watched_session(request, tenant, read_only) as db:
+        repo = BatchProductoRepository(ProductoRepository(db))
+        service = ProductoService(db, repo)
+        frames = []
+        for target in targets:
+            if await request.is_disconnected():
+                break
+            frames.append(await run_in_threadpool(_grafana_frame, db, service, target, rango))
+        return frames, repo.queries, repo.hits
+
+
+@router.post("/grafana/query", response_model=None)
+async def grafana_query(query: GrafanaQuery, request: Request):
+    """Todos los paneles de un dashboard en una petición.
+
+    Agrupa los targets por tenant: una sesión (una conexión del pool) por tenant y
+    cada consulta repetida entre paneles se ejecuta una sola vez. Los KPIs en
+    REPLICA_EXCLUDED_ROUTES van en una sesión aparte contra el primario. Las
+    sesiones salen del pool como en el resto de rutas KPI (watched_session: espera
+    registrada, vuelta al primario si la réplica falla y cancelación si el cliente
+    se desconecta). Devuelve un frame por target (refId, target, tenant, datos |
+    error); los refId deben ser únicos.
+    """
+    repetidos = sorted(ref_id for ref_id, n in Counter(t.refId for t in query.targets).items() if n > 1)
+    if repetidos:
+        raise HTTPException(status_code=422, detail=f"refId repetidos: {', '.join(repetidos)}")
+
+    frames: dict[str, dict] = {}
+    by_tenant: dict[tuple[str, bool], list[GrafanaTarget]] = {}
+    for target in query.targets:
+        by_tenant.setdefault((target.tenant, uses_replica(target.target)), []).append(target)
+
+    queries = reused = 0
+    for (tenant, read_only), targets in by_tenant.items():
+        try:
+            tenant_frames, tenant_queries, tenant_reused = await _grafana_tenant(
+                request, tenant, read_only, targets, query.range
+            )
+        except HTTPException as e:
+            # Tenant no válido: error en sus frames, el resto sigue
+            tenant_frames = [
+                {"refId": t.refId, "target": t.target, "tenant": tenant, "error": e.detail} for t in targets
+            ]
+            tenant_queries = tenant_reused = 0
+        frames.update((frame["refId"], frame) for frame in tenant_frames)
+        queries += tenant_queries
+        reused += tenant_reused
+    if len(frames) < len(query.targets):
+        raise HTTPException(status_code=504, detail="cliente desconectado")
+    return {
+        "frames": [frames[target.refId] for target in query.targets],
+        "meta": {
+            "tenants": len({tenant for tenant, _ in by_tenant}),
+            "queries": queries,
+            "queries_reused": reused,
+        },
+    }
+
+
+########################################################
+# Exportación de filas (auditoría)
+########################################################
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@router.get("/export/{dataset}", response_model=None)
+async def export_filas(
+    dataset: Literal["sesiones", "reports", "files"],
+    formato: Literal["ndjson", "csv"] = Query(default="ndjson", alias="format"),
+    time_filter: TimeFilter = Depends(get_time_filter),
+    after_created: datetime | None = Query(default=None),
+    after_id: str | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1),
+    service: ProductoService = Depends(get_service),
+):
+    "row-level export (streaming, keyset by created+id). localhost:8000/kpi/Producto/export/reports?format=csv"
+    try:
+        chunks = service.exportar_filas(
+            dataset,
+            formato,
+            time_filter.date_from,
+            time_filter.date_to,
+            after_created=after_created,
+            after_id=after_id,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+    headers = {"Content-Disposition": f'attachment; filename="{dataset}.{formato}"'}
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[formato], headers=headers)
@@ -14,6 +14,45 @@ class Settings(BaseSettings):
     PROD: bool = False
     TOKEN_GRAFANA: str = ""
 
+    # Tenants pesados (coma-separados): pool propio para no agotar el compartido
+    HEAVY_TENANTS: str = ""
+    HEAVY_TENANT_POOL_SIZE: int = 5
+    HEAVY_TENANT_MAX_OVERFLOW: int = 5
+    # Engines de tenant en caché (LRU); al salir, el pool propio de un tenant pesado se cierra
+    TENANT_ENGINE_CACHE_SIZE: int = 256
+
+    # Réplica de lectura para los KPIs (vacío: todo contra POSTGRES_URL)
+    POSTGRES_REPLICA_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 30
+    REPLICA_LAG_CHECK_SECONDS: float = 5
+    # Rutas que necesitan datos frescos (coma-separadas, p.ej. "consumo-credits-ia")
+    REPLICA_EXCLUDED_ROUTES: str = ""
+
+    # statement_timeout (ms) de las consultas KPI; 0: sin límite
+    STATEMENT_TIMEOUT_MS: int = 30_000
+    # Por ruta (coma-separadas ruta=ms), p.ej. "porcentaje-usuarios-duplican-sesiones=60000,export/{dataset}=0"
+    STATEMENT_TIMEOUTS: str = ""
+
+    # Precálculo de KPIs en background por tenant, desactivado por defecto. Solo se
+    # precalculan los KPIs de PRECOMPUTE_INTERVALS (coma-separadas kpi=segundos), p.ej.
+    # "consumo-muestras=3600,duracion-media-sesion=900"
+    PRECOMPUTE_INTERVALS: str = ""
+    # Intervalo de los KPIs que no están en PRECOMPUTE_INTERVALS (segundos; 0: ninguno)
+    PRECOMPUTE_INTERVAL_SECONDS: int = 0
+    # Un precálculo caduca pasadas PRECOMPUTE_MAX_AGE_FACTOR veces su intervalo
+    PRECOMPUTE_MAX_AGE_FACTOR: float = 2.0
+    # Segundos entre volcados incrementales de los histogramas de duración de report (0: desactivado)
+    REPORT_HISTOGRAM_REFRESH_SECONDS: int = 900
+
+    # Hechos diarios de todos los tenants (shared.tenant_daily_facts): cada cuántos
+    # segundos se refrescan (0: desactivado) y cuántos tenants a la vez
+    FACTS_REFRESH_SECONDS: int = 900
+    FACTS_REFRESH_CONCURRENCY: int = 4
+
+    # Al arrancar, crea en cada tenant los índices de fecha que falten (CONCURRENTLY).
+    # Desactivado: se crean como paso de despliegue (ver README)
+    TENANT_INDEXES_ON_STARTUP: bool = False
+
     LOGTO_API_BASE: str = "https://auth.sensesbit.com"
     LOGTO_APP_ID: str = ""
     LOGTO_APP_SECRET: str = ""
@@ -26,13 +65,16 @@ class Settings(BaseSettings):
 
     def __init__(self, **data):
         super().__init__(**data)
-        url = self.POSTGRES_URL
-        if url.startswith("postgresql+psycopg://"):
-            self.POSTGRES_URL = url.replace(
-                "postgresql+psycopg://", "postgresql+psycopg2://", 1
-            )
-        elif url.startswith("postgresql://") and "+" not in url.split("//")[0]:
-            self.POSTGRES_URL = url.replace("postgresql://", "postgresql+psycopg2://", 1)
+        self.POSTGRES_URL = _psycopg2_url(self.POSTGRES_URL)
+        self.POSTGRES_REPLICA_URL = _psycopg2_url(self.POSTGRES_REPLICA_URL)
+
+
+def _psycopg2_url(url: str) -> str:
+    if url.startswith("postgresql+psycopg://"):
+        return url.replace("postgresql+psycopg://", "postgresql+psycopg2://", 1)
+    if url.startswith("postgresql://") and "+" not in url.split("//")[0]:
+        return url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    return url
 
 
 settings = Settings()
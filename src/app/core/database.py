@@ -1,9 +1,19 @@
-from collections.abc import Generator
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 
-from sqlalchemy import Engine, create_engine
+from fastapi import HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from psycopg2.errors import QueryCanceled
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlmodel import Session as SessionDB
 from sqlmodel import SQLModel
 
+from app.core import pool_monitor, query_cancel
 from app.core.config import settings
 from app.models.organization import OrganizationBase
 
@@ -15,15 +25,272 @@ engine: Engine = create_engine(
 )
 
 
-def get_db_session() -> Generator[SessionDB, None, None]:
-    """Sesión de BD sobre la primera organización (hardcoded). Todos los KPIs usan este tenant."""
-    db = SessionDB(
-        engine.execution_options(schema_translate_map={None: FIRST_ORG_SCHEMA})
+# Réplica de lectura opcional (POSTGRES_REPLICA_URL); None si no está configurada
+REPLICA_CONNECT_ARGS = {"connect_timeout": 5}
+replica_engine: Engine | None = (
+    create_engine(
+        settings.POSTGRES_REPLICA_URL,
+        pool_size=20,
+        max_overflow=20,
+        pool_timeout=30,
+        connect_args=REPLICA_CONNECT_ARGS,
     )
+    if settings.POSTGRES_REPLICA_URL
+    else None
+)
+
+TENANT_SCHEMA_PATTERN = re.compile(r"org_[a-z0-9_]+")
+
+# (schema, réplica) -> engine con su schema_translate_map, del menos al más usado
+# (LRU de TENANT_ENGINE_CACHE_SIZE: org viene de la petición)
+_tenant_engines: OrderedDict[tuple[str, bool], Engine] = OrderedDict()
+# schema (o "schema@replica") -> engine con pool propio (solo HEAVY_TENANTS)
+_heavy_tenant_engines: dict[str, Engine] = {}
+_tenant_engines_lock = threading.Lock()
+
+# Último retraso medido de la réplica (segundos; None: no disponible)
+_replica_lag: dict[str, float | None] = {"seconds": None, "checked_at": float("-inf")}
+_replica_lag_lock = threading.Lock()
+
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+def heavy_tenants() -> set[str]:
+    return {t.strip() for t in settings.HEAVY_TENANTS.split(",") if t.strip()}
+
+
+def tenant_engine(schema: str, replica: bool = False) -> Engine:
+    """Engine del tenant (org_*), creado una vez y reutilizado en cada petición.
+
+    Es un engine.execution_options() que traduce las tablas sin schema y las de
+    settings.ORG_SCHEMA (report): comparte pool y caché de sentencias compiladas
+    con el engine base, y el schema se aplica al ejecutar. Los HEAVY_TENANTS
+    usan un engine base con su propio pool acotado (y las mismas opciones de
+    conexión), así un tenant grande no agota las conexiones del resto. Con replica=True el engine base es el de
+    la réplica de lectura.
+
+    Se guardan como mucho TENANT_ENGINE_CACHE_SIZE engines; al pasarse se
+    descarta el menos usado y, si tenía pool propio, se cierra (dispose).
+    """
+    key = (schema, replica)
+    with _tenant_engines_lock:
+        cached = _tenant_engines.get(key)
+        if cached is not None:
+            _tenant_engines.move_to_end(key)
+            return cached
+    if not TENANT_SCHEMA_PATTERN.fullmatch(schema):
+        raise ValueError(f"schema de tenant no válido: {schema}")
+    if replica and replica_engine is None:
+        raise ValueError("POSTGRES_REPLICA_URL no configurada")
+    evicted: list[Engine] = []
+    with _tenant_engines_lock:
+        if key not in _tenant_engines:
+            base = replica_engine if replica else engine
+            if schema in heavy_tenants():
+                base = create_engine(
+                    base.url,
+                    pool_size=settings.HEAVY_TENANT_POOL_SIZE,
+                    max_overflow=settings.HEAVY_TENANT_MAX_OVERFLOW,
+                    pool_timeout=30,
+                    connect_args=REPLICA_CONNECT_ARGS if replica else {},
+                    execution_options=base.get_execution_options(),
+                )
+                _heavy_tenant_engines[f"{schema}@replica" if replica else schema] = base
+            _tenant_engines[key] = base.execution_options(
+                schema_translate_map={None: schema, settings.ORG_SCHEMA: schema}
+            )
+            while len(_tenant_engines) > settings.TENANT_ENGINE_CACHE_SIZE:
+                (old_schema, old_replica), _ = _tenant_engines.popitem(last=False)
+                heavy = _heavy_tenant_engines.pop(
+                    f"{old_schema}@replica" if old_replica else old_schema, None
+                )
+                if heavy is not None:
+                    evicted.append(heavy)
+        tenant = _tenant_engines[key]
+    # Las conexiones en uso siguen valiendo hasta que se devuelven
+    for heavy in evicted:
+        heavy.dispose()
+    return tenant
+
+
+def heavy_tenant_engines() -> dict[str, Engine]:
+    """Engines con pool propio de los tenants pesados ya usados."""
+    return dict(_heavy_tenant_engines)
+
+
+def replica_lag_seconds() -> float | None:
+    """Retraso de la réplica en segundos (None: sin réplica o no responde).
+
+    Se mide con pg_last_xact_replay_timestamp() como mucho una vez cada
+    REPLICA_LAG_CHECK_SECONDS; entre medias (o si otro hilo está midiendo) se
+    devuelve el último valor. Si la réplica ya aplicó todo el WAL recibido el
+    retraso es 0 aunque el primario lleve rato sin escribir.
+    """
+    if replica_engine is None:
+        return None
+    now = time.monotonic()
+    if now - _replica_lag["checked_at"] < settings.REPLICA_LAG_CHECK_SECONDS:
+        return _replica_lag["seconds"]
+    if not _replica_lag_lock.acquire(blocking=False):
+        return _replica_lag["seconds"]
     try:
-        yield db
+        with replica_engine.connect() as conn:
+            lag = conn.execute(REPLICA_LAG_SQL).scalar()
+        _replica_lag["seconds"] = float(lag) if lag is not None else None
+    except SQLAlchemyError:
+        _replica_lag["seconds"] = None
     finally:
+        _replica_lag["checked_at"] = time.monotonic()
+        _replica_lag_lock.release()
+    return _replica_lag["seconds"]
+
+
+def replica_available() -> bool:
+    """La réplica está configurada y su retraso no supera REPLICA_MAX_LAG_SECONDS."""
+    lag = replica_lag_seconds()
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+def mark_replica_unavailable() -> None:
+    """Manda las lecturas al primario hasta la siguiente comprobación del retraso."""
+    _replica_lag["seconds"] = None
+    _replica_lag["checked_at"] = time.monotonic()
+
+
+def replica_state() -> dict:
+    return {
+        "configured": replica_engine is not None,
+        "available": replica_available(),
+        "lag_seconds": _replica_lag["seconds"],
+        "max_lag_seconds": settings.REPLICA_MAX_LAG_SECONDS,
+    }
+
+
+def _route_matches(route: str, pattern: str) -> bool:
+    """``pattern`` es la ruta sin prefijo del router, p.ej. "consumo-credits-ia"."""
+    route = route.strip("/")
+    pattern = pattern.strip("/")
+    return route == pattern or route.endswith("/" + pattern)
+
+
+def replica_excluded_routes() -> set[str]:
+    return {r.strip() for r in settings.REPLICA_EXCLUDED_ROUTES.split(",") if r.strip()}
+
+
+def uses_replica(route: str) -> bool:
+    """Si las lecturas de ``route`` (p.ej. "consumo-credits-ia") pueden ir a la réplica."""
+    return not any(_route_matches(route, excluded) for excluded in replica_excluded_routes())
+
+
+def statement_timeouts() -> dict[str, int]:
+    timeouts = {}
+    for item in settings.STATEMENT_TIMEOUTS.split(","):
+        route, _, ms = item.partition("=")
+        if route.strip() and ms.strip():
+            timeouts[route.strip()] = int(ms)
+    return timeouts
+
+
+def statement_timeout_ms(route: str) -> int:
+    """statement_timeout (ms) de ``route``: STATEMENT_TIMEOUTS o STATEMENT_TIMEOUT_MS."""
+    for pattern, ms in statement_timeouts().items():
+        if _route_matches(route, pattern):
+            return ms
+    return settings.STATEMENT_TIMEOUT_MS
+
+
+def set_statement_timeout(db: SessionDB, timeout_ms: int) -> None:
+    """SET LOCAL statement_timeout: vale hasta el fin de la transacción de la sesión."""
+    if timeout_ms:
+        db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+
+
+def tenant_session(schema: str = FIRST_ORG_SCHEMA, read_only: bool = False) -> SessionDB:
+    """Sesión de BD sobre el schema de un tenant (org_*).
+
+    Con read_only=True usa la réplica si está disponible y, si no, el primario.
+    """
+    return SessionDB(tenant_engine(schema, replica=read_only and replica_available()))
+
+
+def _checked_out_session(schema: str, read_only: bool, timeout_ms: int) -> SessionDB:
+    """Sesión con la conexión ya obtenida del pool (registra la espera) y el
+    statement_timeout aplicado.
+
+    Si la réplica no responde se marca como no disponible y se usa el primario.
+    """
+    try:
+        db = tenant_session(schema, read_only)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+    start = time.perf_counter()
+    try:
+        db.connection()
+    except OperationalError:
         db.close()
+        if db.bind is tenant_engine(schema):
+            raise
+        mark_replica_unavailable()
+        db = tenant_session(schema)
+        db.connection()
+    pool_monitor.record_wait(time.perf_counter() - start)
+    set_statement_timeout(db, timeout_ms)
+    return db
+
+
+def _route_path(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", request.url.path)
+
+
+@asynccontextmanager
+async def watched_session(
+    request: Request, org: str, read_only: bool, timeout_ms: int = 0
+) -> AsyncIterator[SessionDB]:
+    """_checked_out_session (en el threadpool) cuya consulta en curso se cancela si el
+    cliente se desconecta (query_cancel); se cierra al salir. Un ``org`` no válido
+    da HTTPException 400.
+    """
+    db = await run_in_threadpool(_checked_out_session, org, read_only, timeout_ms)
+    watcher = query_cancel.watch(request, db)
+    try:
+        yield db
+    finally:
+        watcher.cancel()
+        await run_in_threadpool(watcher.close, db)
+
+
+async def get_read_db_session(
+    request: Request,
+    org: str = Query(default=FIRST_ORG_SCHEMA, description="schema del tenant (org_*)"),
+) -> AsyncGenerator[SessionDB, None]:
+    """Sesión de BD sobre el tenant ``org`` (por defecto la primera organización),
+    en la réplica de lectura si está configurada, al día (REPLICA_MAX_LAG_SECONDS)
+    y la ruta no está en REPLICA_EXCLUDED_ROUTES.
+
+    Mientras dura la petición, si el cliente se desconecta se cancela la
+    consulta en curso (query_cancel); las rutas deben ser ``def`` para que el
+    event loop quede libre y pueda detectarlo.
+    """
+    path = _route_path(request)
+    async with watched_session(request, org, uses_replica(path), statement_timeout_ms(path)) as db:
+        try:
+            yield db
+        except OperationalError as e:
+            if isinstance(e.orig, QueryCanceled):
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="consulta cancelada (statement_timeout o cliente desconectado)",
+                ) from e
+            raise
 
 
 def init_global_schema() -> None:
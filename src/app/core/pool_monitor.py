@@ -0,0 +1,70 @@
+"""
+Espera por conexión del pool de SQLAlchemy.
+
+get_read_db_session (watched_session) mide cuánto tarda en obtener la conexión (tiempo de espera en
+el pool + conexión nueva si hace falta) y lo registra aquí. Se guardan las
+últimas MAX_SAMPLES mediciones en memoria para calcular percentiles.
+"""
+
+from collections import deque
+from typing import Any
+
+from sqlalchemy import Engine
+
+MAX_SAMPLES = 10_000
+
+_samples: deque[float] = deque(maxlen=MAX_SAMPLES)
+_total_checkouts = 0
+_total_wait_seconds = 0.0
+
+
+def record_wait(seconds: float) -> None:
+    global _total_checkouts, _total_wait_seconds
+    _samples.append(seconds)
+    _total_checkouts += 1
+    _total_wait_seconds += seconds
+
+
+def _percentile(sorted_samples: list[float], q: float) -> float | None:
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, round(q * (len(sorted_samples) - 1)))
+    return round(sorted_samples[index] * 1000, 3)
+
+
+def _pool_state(engine: Engine) -> dict[str, Any]:
+    pool = engine.pool
+    return {
+        "size": pool.size() if hasattr(pool, "size") else None,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+    }
+
+
+def get_state(engine: Engine, tenant_engines: dict[str, Engine] | None = None) -> dict[str, Any]:
+    """Estado del pool (y de los pools por tenant) y percentiles (ms) de espera."""
+    samples = sorted(_samples)
+    return {
+        "pool": _pool_state(engine),
+        "tenant_pools": {
+            schema: _pool_state(tenant_engine)
+            for schema, tenant_engine in (tenant_engines or {}).items()
+        },
+        "checkouts": _total_checkouts,
+        "wait_ms": {
+            "avg": round(1000 * _total_wait_seconds / _total_checkouts, 3)
+            if _total_checkouts
+            else None,
+            "p50": _percentile(samples, 0.50),
+            "p95": _percentile(samples, 0.95),
+            "p99": _percentile(samples, 0.99),
+            "max": _percentile(samples, 1.0),
+        },
+    }
+
+
+def reset() -> None:
+    global _total_checkouts, _total_wait_seconds
+    _samples.clear()
+    _total_checkouts = 0
+    _total_wait_seconds = 0.0
@@ -0,0 +1,77 @@
+"""
+Cancelación de consultas cuando el cliente HTTP se desconecta.
+
+Si Grafana corta por timeout o el usuario cambia de dashboard, la consulta
+seguiría en Postgres ocupando CPU y una conexión del pool. watch() comprueba
+cada POLL_SECONDS si el cliente sigue conectado y, si se ha ido mientras la
+conexión de la sesión tiene un comando en curso, lo cancela con el cancel del
+driver (lo mismo que pg_cancel_backend sobre su backend). La consulta termina
+con QueryCanceled y la sesión se cierra y devuelve la conexión al pool.
+
+El cancel corre en un hilo y puede llegar cuando la sesión ya se cerró y su
+conexión atiende otra petición: se hace bajo el mismo lock con el que close()
+marca la sesión como cerrada, y no se hace si ya lo está.
+"""
+
+import asyncio
+import threading
+
+from psycopg2.extensions import TRANSACTION_STATUS_ACTIVE
+from sqlmodel import Session
+from starlette.requests import Request
+
+POLL_SECONDS = 0.5
+
+_cancelled = 0
+
+
+def _query_running(dbapi_connection) -> bool:
+    # PQtransactionStatus: ACTIVE mientras hay un comando en curso
+    return dbapi_connection.get_transaction_status() == TRANSACTION_STATUS_ACTIVE
+
+
+def _cancel(dbapi_connection) -> None:
+    global _cancelled
+    if _query_running(dbapi_connection):
+        dbapi_connection.cancel()
+        _cancelled += 1
+
+
+class Watcher:
+    """Vigilancia de una petición sobre la conexión de su sesión."""
+
+    def __init__(self, request: Request, dbapi_connection):
+        self._dbapi_connection = dbapi_connection
+        self._lock = threading.Lock()
+        self._closed = False
+        self._task = asyncio.create_task(self._watch(request))
+
+    async def _watch(self, request: Request) -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(POLL_SECONDS)
+        await asyncio.to_thread(self._cancel)
+
+    def _cancel(self) -> None:
+        with self._lock:
+            if not self._closed:
+                _cancel(self._dbapi_connection)
+
+    def cancel(self) -> None:
+        """Deja de vigilar (desde el event loop); un cancel ya lanzado puede seguir."""
+        self._task.cancel()
+
+    def close(self, db: Session) -> None:
+        """Cierra la sesión sin que un cancel tardío llegue a su conexión (bloquea)."""
+        with self._lock:
+            self._closed = True
+        db.close()
+
+
+def watch(request: Request, db: Session) -> Watcher:
+    """Vigila la petición mientras dura; al terminar, cancel() y close(db) en vez de
+    db.close()."""
+    return Watcher(request, db.connection().connection.dbapi_connection)
+
+
+def get_state() -> dict[str, int]:
+    return {"queries_cancelled": _cancelled}
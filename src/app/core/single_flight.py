@@ -0,0 +1,80 @@
+"""
+Single-flight: peticiones idénticas concurrentes comparten un único cálculo.
+
+Cuando varios dashboards piden a la vez el mismo KPI (mismo tenant, KPI y
+parámetros), el primero lo calcula y el resto espera y recibe una copia de su
+resultado. No es una caché: en cuanto termina el cálculo la clave se libera y
+la siguiente petición vuelve a consultar la BD.
+
+Si el cálculo falla (p.ej. el cliente que lo lanzó se desconecta y su consulta
+se cancela), quienes esperaban lo reintentan una vez, también agrupados, en
+lugar de heredar un error que no es suyo; si el reintento falla, reciben su error.
+"""
+
+import copy
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+_calls: dict[Hashable, _Call] = {}
+_lock = threading.Lock()
+_requests = 0
+_executions = 0
+
+
+def do[T](key: Hashable, fn: Callable[[], T], retry: bool = True) -> T:
+    """Ejecuta ``fn`` o espera al cálculo en curso con la misma ``key``."""
+    global _requests, _executions
+    with _lock:
+        _requests += 1
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+            _executions += 1
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            if not retry:
+                raise call.error
+            with _lock:
+                _requests -= 1
+            return do(key, fn, retry=False)
+        return copy.deepcopy(call.result)
+    try:
+        call.result = fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
+
+
+def get_state() -> dict[str, Any]:
+    """Peticiones, cálculos ejecutados y proporción servida por un cálculo compartido."""
+    coalesced = _requests - _executions
+    return {
+        "requests": _requests,
+        "executions": _executions,
+        "coalesced": coalesced,
+        "coalesce_ratio": round(coalesced / _requests, 4) if _requests else None,
+        "in_flight": len(_calls),
+    }
+
+
+def reset() -> None:
+    global _requests, _executions
+    with _lock:
+        _requests = 0
+        _executions = 0
@@ -1,21 +1,33 @@
 from .answer import Answer
 from .file import File
+from .kpi_result import KpiResult
 from .organization import Organization, OrganizationBase
 from .question import Question
 from .report import AIReportModel
+from .report_histogram import (
+    ReportDurationHistogram,
+    ReportHistogramCounted,
+    ReportHistogramWatermark,
+)
 from .section import Section
 from .session import Session
+from .tenant_daily_facts import TenantDailyFacts
 from .user import User, UserRole
 
 __all__ = [
     "AIReportModel",
     "Answer",
     "File",
+    "KpiResult",
     "Organization",
     "OrganizationBase",
     "Question",
+    "ReportDurationHistogram",
+    "ReportHistogramCounted",
+    "ReportHistogramWatermark",
     "Section",
     "Session",
+    "TenantDailyFacts",
     "User",
     "UserRole",
 ]
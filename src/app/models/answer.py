@@ -8,6 +8,6 @@ class Answer(SQLModel, table=True):
     __tablename__ = "answer"
 
     id: UUID = Field(primary_key=True, default_factory=uuid4)
-    created: datetime = Field(default_factory=datetime.now)
+    created: datetime = Field(default_factory=datetime.now, index=True)
     user_id: UUID = Field(foreign_key="user.id", index=True)
     question_id: UUID = Field(foreign_key="question.id", index=True)
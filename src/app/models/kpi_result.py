@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.config import settings
+from app.models.organization import OrganizationBase
+
+
+class KpiResult(OrganizationBase):
+    """Último valor precalculado de cada KPI por tenant (scheduler de precálculo)."""
+
+    __tablename__ = "kpi_results"
+    __table_args__ = {"schema": settings.GLOBAL_SCHEMA}
+
+    tenant = Column(String, primary_key=True)
+    kpi = Column(String, primary_key=True)
+    date_from = Column(DateTime(timezone=True), nullable=True)
+    date_to = Column(DateTime(timezone=True), nullable=True)
+    granularity = Column(String, nullable=True)
+    data = Column(JSONB, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+    duration_ms = Column(Integer, nullable=False)
@@ -18,7 +18,12 @@ class Base(DeclarativeBase):
 
 class AIReportModel(Base):
     __tablename__ = "report"
-    __table_args__ = {"schema": settings.ORG_SCHEMA}
+    # Nombres sin el schema: son los mismos en todos los tenants (tenant_indexes)
+    __table_args__ = (
+        sa.Index("ix_report_created", "created"),
+        sa.Index("ix_report_completed", "completed"),
+        {"schema": settings.ORG_SCHEMA},
+    )
 
     id: Mapped[int] = mapped_column(
         sa.Integer,
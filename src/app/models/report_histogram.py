@@ -0,0 +1,42 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer, String
+
+from app.core.config import settings
+from app.models.organization import OrganizationBase
+
+
+class ReportDurationHistogram(OrganizationBase):
+    """Histograma logarítmico de report.generation_duration por tenant, día y ai_engine.
+
+    ``bucket`` i cuenta las duraciones en [2^(i/4), 2^((i+1)/4)) segundos.
+    """
+
+    __tablename__ = "report_duration_histogram"
+    __table_args__ = {"schema": settings.GLOBAL_SCHEMA}
+
+    tenant = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    ai_engine = Column(String(32), primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    count = Column(BigInteger, nullable=False)
+
+
+class ReportHistogramWatermark(OrganizationBase):
+    """Hasta qué report.completed está volcado el histograma de cada tenant."""
+
+    __tablename__ = "report_histogram_watermark"
+    __table_args__ = {"schema": settings.GLOBAL_SCHEMA}
+
+    tenant = Column(String, primary_key=True)
+    completed_until = Column(DateTime(timezone=True), nullable=False)
+
+
+class ReportHistogramCounted(OrganizationBase):
+    """Report ya contados en el histograma cuyo completed aún puede volver a leerse
+    (ventana de re-lectura bajo la marca de agua): no se cuentan dos veces."""
+
+    __tablename__ = "report_histogram_counted"
+    __table_args__ = {"schema": settings.GLOBAL_SCHEMA}
+
+    tenant = Column(String, primary_key=True)
+    report_id = Column(Integer, primary_key=True)
+    completed = Column(DateTime(timezone=True), nullable=False)
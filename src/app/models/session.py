@@ -9,5 +9,5 @@ class Session(SQLModel, table=True):
 
     id: UUID = Field(primary_key=True, default_factory=uuid4)
     code: str | None = Field(index=True, max_length=100)
-    created: datetime = Field(default_factory=datetime.now)
+    created: datetime = Field(default_factory=datetime.now, index=True)
     end_at: datetime | None = Field(default=None)
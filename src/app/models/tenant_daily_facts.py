@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.config import settings
+from app.models.organization import OrganizationBase
+
+
+class TenantDailyFacts(OrganizationBase):
+    """Hechos diarios por tenant para KPIs globales (todos los tenants en una tabla).
+
+    ``credits``/``credits_ia``: saldo de la organización en el último refresco de
+    ese día (None en días sin refresco).
+    """
+
+    __tablename__ = "tenant_daily_facts"
+    __table_args__ = {"schema": settings.GLOBAL_SCHEMA}
+
+    tenant = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    sessions = Column(Integer, nullable=False, default=0)
+    active_users = Column(Integer, nullable=False, default=0)
+    reports_by_engine = Column(JSONB, nullable=False, default=dict)
+    exports_by_type = Column(JSONB, nullable=False, default=dict)
+    credits = Column(Integer, nullable=True)
+    credits_ia = Column(Integer, nullable=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,3 +1,17 @@
-from app.repositories.product_repositories.producto_repository import ProductoRepository
+from app.repositories.product_repositories.kpi_result_repository import KpiResultRepository
+from app.repositories.product_repositories.producto_repository import (
+    BatchProductoRepository,
+    ProductoRepository,
+)
+from app.repositories.product_repositories.report_histogram_repository import (
+    ReportHistogramRepository,
+)
+from app.repositories.product_repositories.tenant_facts_repository import TenantFactsRepository
 
-__all__ = ["ProductoRepository"]
+__all__ = [
+    "BatchProductoRepository",
+    "KpiResultRepository",
+    "ProductoRepository",
+    "ReportHistogramRepository",
+    "TenantFactsRepository",
+]
@@ -0,0 +1,57 @@
+"""Repositorio: resultados precalculados de KPIs (shared.kpi_results)."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.models.kpi_result import KpiResult
+from app.models.organization import Organization
+
+
+class KpiResultRepository:
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def get(self, tenant: str, kpi: str) -> KpiResult | None:
+        return self._db.get(KpiResult, (tenant, kpi))
+
+    def guardar(
+        self,
+        tenant: str,
+        kpi: str,
+        data: Any,
+        computed_at: datetime,
+        duration_ms: int,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> None:
+        """Inserta o sustituye el resultado de (tenant, kpi). No hace commit."""
+        values = {
+            "date_from": date_from,
+            "date_to": date_to,
+            "granularity": granularity,
+            "data": data,
+            "computed_at": computed_at,
+            "duration_ms": duration_ms,
+        }
+        stmt = insert(KpiResult).values(tenant=tenant, kpi=kpi, **values)
+        self._db.execute(
+            stmt.on_conflict_do_update(index_elements=[KpiResult.tenant, KpiResult.kpi], set_=values)
+        )
+
+    def tenants(self) -> list[str]:
+        """Organizaciones de shared.organizations que tienen schema de tenant."""
+        schemas = text("SELECT schema_name FROM information_schema.schemata").columns(
+            schema_name=Organization.id.type
+        ).subquery()
+        stmt = (
+            select(Organization.id)
+            .join(schemas, schemas.c.schema_name == Organization.id)
+            .where(Organization.id.like("org\\_%"))
+            .order_by(Organization.id)
+        )
+        return list(self._db.execute(stmt).scalars())
@@ -1,8 +1,12 @@
 """Repositorio: solo acceso a datos para KPIs de producto. Sin lógica de negocio."""
 
-from datetime import date, datetime
+import inspect
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import Select, func, literal_column, select, tuple_
 from sqlmodel import Session
 
 from app.models.answer import Answer
@@ -15,6 +19,35 @@ from app.models.session import Session as SessionModel
 from app.models.user import User
 
 
+GRANULARITIES = ("hour", "day", "week", "month")
+
+
+def _bucket(column, granularity: str):
+    """Inicio del periodo (date_trunc) de la columna temporal.
+
+    La unidad va como literal (validada contra GRANULARITIES) para que SELECT y
+    GROUP BY sean la misma expresión también con parámetros del lado servidor.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity no soportada: {granularity}")
+    return func.date_trunc(literal_column(f"'{granularity}'"), column)
+
+
+def _in_range(stmt, column, date_from: datetime | None, date_to: datetime | None):
+    if date_from is not None:
+        stmt = stmt.where(column >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(column <= date_to)
+    return stmt
+
+
+EXPORT_YIELD_PER = 1000
+
+
+def _epoch_seconds(interval):
+    return func.extract("epoch", interval)
+
+
 class ProductoRepository:
     def __init__(self, db: Session) -> None:
         self._db = db
@@ -23,55 +56,106 @@ class ProductoRepository:
         self,
         date_from: datetime | None = None,
         date_to: datetime | None = None,
-    ) -> list[tuple[date, int]]:
-        stmt = (
-            select(func.date(SessionModel.created).label("fecha"), func.count(SessionModel.id))
-            .group_by(func.date(SessionModel.created))
-            .order_by(func.date(SessionModel.created))
-        )
-        if date_from is not None:
-            stmt = stmt.where(SessionModel.created >= date_from)
-        if date_to is not None:
-            stmt = stmt.where(SessionModel.created <= date_to)
+        granularity: str = "day",
+    ) -> list[tuple[datetime, int]]:
+        periodo = _bucket(SessionModel.created, granularity).label("periodo")
+        stmt = select(periodo, func.count(SessionModel.id)).group_by(periodo).order_by(periodo)
+        stmt = _in_range(stmt, SessionModel.created, date_from, date_to)
         rows = self._db.exec(stmt).all()
         return [(r[0], r[1]) for r in rows] if rows else []
 
-    def total_sesiones_y_usuarios_activos(self) -> tuple[int, int]:
+    def total_sesiones_y_usuarios_activos(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> tuple[int, int]:
         """Para KPI 11: total sesiones y total usuarios con al menos una respuesta (activos)."""
-        total_sesiones = self._db.exec(select(func.count(SessionModel.id))).one()
+        total_sesiones = self._db.exec(
+            _in_range(select(func.count(SessionModel.id)), SessionModel.created, date_from, date_to)
+        ).one()
         usuarios_activos = self._db.exec(
-            select(func.count(func.distinct(Answer.user_id)))
+            _in_range(select(func.count(func.distinct(Answer.user_id))), Answer.created, date_from, date_to)
         ).one()
         return total_sesiones or 0, usuarios_activos or 0
 
-    def exportaciones_por_tipo(self) -> list[tuple[str | None, int]]:
-        """KPI 16: count de files por tipo (pdf, xlsx, etc.). file_type o inferido por name."""
+    def sesiones_y_usuarios_activos_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, int, int]]:
+        """KPI 11 por periodo: (periodo, sesiones creadas, usuarios con respuestas en el periodo)."""
+        periodo = _bucket(SessionModel.created, granularity).label("periodo")
+        sesiones_stmt = _in_range(
+            select(periodo, func.count(SessionModel.id)).group_by(periodo),
+            SessionModel.created,
+            date_from,
+            date_to,
+        )
+        sesiones = dict(self._db.exec(sesiones_stmt).all())
+        periodo = _bucket(Answer.created, granularity).label("periodo")
+        usuarios_stmt = _in_range(
+            select(periodo, func.count(func.distinct(Answer.user_id))).group_by(periodo),
+            Answer.created,
+            date_from,
+            date_to,
+        )
+        usuarios = dict(self._db.exec(usuarios_stmt).all())
+        return [(p, sesiones.get(p, 0), usuarios.get(p, 0)) for p in sorted(sesiones.keys() | usuarios.keys())]
+
+    def exportaciones_total_y_por_tipo(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> tuple[int, list[tuple[str | None, int]]]:
+        """KPI 16: total de archivos (exportaciones) y count por tipo (pdf, xlsx, etc.)."""
+        total, (por_tipo,) = self.total_y_desgloses(
+            func.count(File.id), [File.file_type], File.created, date_from, date_to
+        )
+        return total, por_tipo
+
+    def exportaciones_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, str | None, int]]:
+        """KPI 16 por periodo: (periodo, file_type, count)."""
+        periodo = _bucket(File.created, granularity).label("periodo")
         stmt = (
-            select(File.file_type, func.count(File.id))
-            .group_by(File.file_type)
-            .order_by(func.count(File.id).desc())
+            select(periodo, File.file_type, func.count(File.id))
+            .group_by(periodo, File.file_type)
+            .order_by(periodo)
         )
+        stmt = _in_range(stmt, File.created, date_from, date_to)
         rows = self._db.exec(stmt).all()
-        return [(r[0], r[1]) for r in rows] if rows else []
-
-    def total_exportaciones(self) -> int:
-        """KPI 16: total de archivos (exportaciones)."""
-        r = self._db.exec(select(func.count(File.id))).one()
-        return r or 0
+        return [(r[0], r[1], r[2]) for r in rows] if rows else []
 
     def total_usuarios(self) -> int:
         """Total usuarios (no borrados) para porcentajes."""
         r = self._db.exec(select(func.count(User.id)).where(User.deleted.is_(None))).one()
         return r or 0
 
-    def usuarios_con_al_menos_dos_sesiones(self) -> int:
-        """KPI 18: usuarios que tienen >= 2 sesiones (vía answer -> question -> section -> session)."""
-        subq = (
-            select(Answer.user_id, Section.session_id)
+    def _usuarios_sesiones(self, date_from: datetime | None, date_to: datetime | None, granularity: str | None = None):
+        """Pares distintos (usuario, sesión[, periodo]) vía answer -> question -> section."""
+        columns = [Answer.user_id, Section.session_id]
+        if granularity is not None:
+            columns.append(_bucket(Answer.created, granularity).label("periodo"))
+        stmt = (
+            select(*columns)
             .join(Question, Answer.question_id == Question.id)
             .join(Section, Question.section_id == Section.id)
             .distinct()
-        ).subquery()
+        )
+        return _in_range(stmt, Answer.created, date_from, date_to).subquery()
+
+    def usuarios_con_al_menos_dos_sesiones(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> int:
+        """KPI 18: usuarios que tienen >= 2 sesiones (vía answer -> question -> section -> session)."""
+        subq = self._usuarios_sesiones(date_from, date_to)
         agrupado = (
             select(subq.c.user_id)
             .group_by(subq.c.user_id)
@@ -80,25 +164,83 @@ class ProductoRepository:
         r = self._db.exec(select(func.count(agrupado.c.user_id)).select_from(agrupado)).one()
         return r or 0
 
-    def duracion_media_sesion_segundos(self) -> float | None:
+    def usuarios_con_al_menos_dos_sesiones_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, int]]:
+        """KPI 18 por periodo: usuarios con respuestas en >= 2 sesiones dentro del periodo."""
+        subq = self._usuarios_sesiones(date_from, date_to, granularity)
+        agrupado = (
+            select(subq.c.periodo, subq.c.user_id)
+            .group_by(subq.c.periodo, subq.c.user_id)
+            .having(func.count(subq.c.session_id) >= 2)
+        ).subquery()
+        stmt = (
+            select(agrupado.c.periodo, func.count(agrupado.c.user_id))
+            .group_by(agrupado.c.periodo)
+            .order_by(agrupado.c.periodo)
+        )
+        rows = self._db.exec(stmt).all()
+        return [(r[0], r[1]) for r in rows] if rows else []
+
+    def duracion_media_sesion_segundos(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> float | None:
         """KPI 19: media de (end_at - created) en segundos, solo sesiones con end_at."""
         stmt = select(
             func.avg(
                 func.extract("epoch", SessionModel.end_at) - func.extract("epoch", SessionModel.created)
             )
         ).where(SessionModel.end_at.isnot(None))
+        stmt = _in_range(stmt, SessionModel.created, date_from, date_to)
         r = self._db.exec(stmt).one()
         return float(r) if r is not None else None
 
+    def duracion_media_sesion_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, float]]:
+        """KPI 19 por periodo de creación de la sesión."""
+        periodo = _bucket(SessionModel.created, granularity).label("periodo")
+        stmt = (
+            select(
+                periodo,
+                func.avg(
+                    func.extract("epoch", SessionModel.end_at) - func.extract("epoch", SessionModel.created)
+                ),
+            )
+            .where(SessionModel.end_at.isnot(None))
+            .group_by(periodo)
+            .order_by(periodo)
+        )
+        stmt = _in_range(stmt, SessionModel.created, date_from, date_to)
+        rows = self._db.exec(stmt).all()
+        return [(r[0], float(r[1])) for r in rows] if rows else []
+
     # --- KPIs IA (tabla report) ---
 
-    def total_reports(self) -> int:
+    def total_reports(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> int:
         """Total de análisis IA ejecutados (report sin borrar)."""
         stmt = select(func.count(AIReportModel.id)).where(AIReportModel.deleted.is_(None))
+        stmt = _in_range(stmt, AIReportModel.created, date_from, date_to)
         r = self._db.execute(stmt).scalar()
         return r or 0
 
-    def reports_by_tipo(self) -> list[tuple[str, int]]:
+    def reports_by_tipo(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[str, int]]:
         """Análisis IA por tipo (ai_engine): DualSense, JAR, Ranking, Verbatim, Drivers, etc."""
         stmt = (
             select(AIReportModel.ai_engine, func.count(AIReportModel.id))
@@ -106,10 +248,33 @@ class ProductoRepository:
             .group_by(AIReportModel.ai_engine)
             .order_by(func.count(AIReportModel.id).desc())
         )
+        stmt = _in_range(stmt, AIReportModel.created, date_from, date_to)
         rows = self._db.execute(stmt).all()
         return [(row[0], row[1]) for row in rows] if rows else []
 
-    def avg_duration_seconds_by_tipo(self) -> list[tuple[str, float]]:
+    def reports_by_tipo_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, str, int]]:
+        """Análisis IA por periodo y tipo: (periodo, ai_engine, count)."""
+        periodo = _bucket(AIReportModel.created, granularity).label("periodo")
+        stmt = (
+            select(periodo, AIReportModel.ai_engine, func.count(AIReportModel.id))
+            .where(AIReportModel.deleted.is_(None))
+            .group_by(periodo, AIReportModel.ai_engine)
+            .order_by(periodo)
+        )
+        stmt = _in_range(stmt, AIReportModel.created, date_from, date_to)
+        rows = self._db.execute(stmt).all()
+        return [(row[0], row[1], row[2]) for row in rows] if rows else []
+
+    def avg_duration_seconds_by_tipo(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[str, float]]:
         """Tiempo medio de procesamiento (segundos) por tipo de análisis. Solo report con started y completed."""
         stmt = (
             select(
@@ -124,47 +289,248 @@ class ProductoRepository:
             .group_by(AIReportModel.ai_engine)
             .order_by(AIReportModel.ai_engine)
         )
+        stmt = _in_range(stmt, AIReportModel.created, date_from, date_to)
         rows = self._db.execute(stmt).all()
         return [(row[0], round(float(row[1] or 0), 2)) for row in rows] if rows else []
 
-    def sessions_with_ai_count(self) -> int:
-        """Sesiones distintas que tienen al menos un report (análisis IA)."""
+    def avg_duration_seconds_by_tipo_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, str, float]]:
+        """Tiempo medio de procesamiento por periodo y tipo: (periodo, ai_engine, segundos)."""
+        periodo = _bucket(AIReportModel.created, granularity).label("periodo")
+        stmt = (
+            select(
+                periodo,
+                AIReportModel.ai_engine,
+                func.avg(func.extract("epoch", AIReportModel.generation_duration)),
+            )
+            .where(
+                AIReportModel.deleted.is_(None),
+                AIReportModel.started.isnot(None),
+                AIReportModel.completed.isnot(None),
+            )
+            .group_by(periodo, AIReportModel.ai_engine)
+            .order_by(periodo)
+        )
+        stmt = _in_range(stmt, AIReportModel.created, date_from, date_to)
+        rows = self._db.execute(stmt).all()
+        return [(row[0], row[1], round(float(row[2] or 0), 2)) for row in rows] if rows else []
+
+    def sessions_with_ai_count(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> int:
+        """Sesiones distintas que tienen al menos un report (análisis IA).
+
+        Con rango, solo sesiones creadas en el rango (mismo denominador que total_sessions).
+        """
         stmt = (
             select(func.count(func.distinct(AIReportModel.session_id)))
             .where(AIReportModel.deleted.is_(None), AIReportModel.session_id.isnot(None))
         )
+        if date_from is not None or date_to is not None:
+            stmt = stmt.join(SessionModel, AIReportModel.session_id == SessionModel.id)
+            stmt = _in_range(stmt, SessionModel.created, date_from, date_to)
         r = self._db.execute(stmt).scalar()
         return r or 0
 
-    def total_sessions(self) -> int:
+    def total_sessions(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> int:
         """Total de sesiones (para % adopción)."""
-        r = self._db.execute(select(func.count(SessionModel.id))).scalar()
+        stmt = _in_range(select(func.count(SessionModel.id)), SessionModel.created, date_from, date_to)
+        r = self._db.execute(stmt).scalar()
         return r or 0
 
+    def sesiones_con_ia_por_periodo(
+        self,
+        granularity: str = "day",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[datetime, int, int]]:
+        """Adopción IA por periodo de creación: (periodo, total sesiones, sesiones con report)."""
+        periodo = _bucket(SessionModel.created, granularity).label("periodo")
+        stmt = (
+            select(
+                periodo,
+                func.count(func.distinct(SessionModel.id)),
+                func.count(func.distinct(AIReportModel.session_id)),
+            )
+            .select_from(SessionModel)
+            .outerjoin(
+                AIReportModel,
+                (AIReportModel.session_id == SessionModel.id) & AIReportModel.deleted.is_(None),
+            )
+            .group_by(periodo)
+            .order_by(periodo)
+        )
+        stmt = _in_range(stmt, SessionModel.created, date_from, date_to)
+        rows = self._db.execute(stmt).all()
+        return [(row[0], row[1], row[2]) for row in rows] if rows else []
+
     # --- KPIs shared.organizations (Credits / Credits IA) ---
 
     def consumo_credits_por_plan(self) -> tuple[int, list[tuple[str, int]]]:
         """Consumo de Muestras (credits): total y por plan (license_type). shared.organizations."""
-        total_stmt = select(func.coalesce(func.sum(Organization.credits), 0)).select_from(Organization)
-        total = int(self._db.execute(total_stmt).scalar() or 0)
-        por_plan_stmt = (
-            select(Organization.license_type, func.sum(Organization.credits))
-            .group_by(Organization.license_type)
-            .order_by(func.sum(Organization.credits).desc())
-        )
-        rows = self._db.execute(por_plan_stmt).all()
-        por_plan = [(row[0], int(row[1] or 0)) for row in rows] if rows else []
+        total, (por_plan,) = self.total_y_desgloses(
+            func.sum(Organization.credits), [Organization.license_type]
+        )
         return total, por_plan
 
     def consumo_credits_ia_por_plan(self) -> tuple[int, list[tuple[str, int]]]:
         """Consumo de Créditos IA (credits_ia): total y por plan (license_type). shared.organizations."""
-        total_stmt = select(func.coalesce(func.sum(Organization.credits_ia), 0)).select_from(Organization)
-        total = int(self._db.execute(total_stmt).scalar() or 0)
-        por_plan_stmt = (
-            select(Organization.license_type, func.sum(Organization.credits_ia))
-            .group_by(Organization.license_type)
-            .order_by(func.sum(Organization.credits_ia).desc())
-        )
-        rows = self._db.execute(por_plan_stmt).all()
-        por_plan = [(row[0], int(row[1] or 0)) for row in rows] if rows else []
+        total, (por_plan,) = self.total_y_desgloses(
+            func.sum(Organization.credits_ia), [Organization.license_type]
+        )
         return total, por_plan
+
+    def total_y_desgloses(
+        self,
+        medida,
+        dimensiones: list,
+        date_column=None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> tuple[int, list[list[tuple[Any, int]]]]:
+        """Total de ``medida`` (count/sum entero) y su desglose por cada dimensión, en una consulta.
+
+        GROUPING SETS ((d1), (d2), ..., ()) recorre la tabla una sola vez en lugar
+        de una consulta por desglose más otra para el total; GROUPING() separa las
+        filas de cada conjunto aunque la dimensión sea NULL. Devuelve el total y un
+        desglose [(valor, medida)] por dimensión, ordenado por medida descendente.
+        """
+        grupo = func.grouping(*dimensiones).label("grupo")
+        stmt = select(grupo, *dimensiones, medida).group_by(
+            func.grouping_sets(*(tuple_(d) for d in dimensiones), tuple_())
+        )
+        if date_column is not None:
+            stmt = _in_range(stmt, date_column, date_from, date_to)
+        # Bit de GROUPING(): 1 si la dimensión no agrupa la fila (total: todos a 1)
+        todas = (1 << len(dimensiones)) - 1
+        posicion = {todas ^ (1 << (len(dimensiones) - 1 - i)): i for i in range(len(dimensiones))}
+        total = 0
+        desgloses: list[list[tuple[Any, int]]] = [[] for _ in dimensiones]
+        for row in self._db.execute(stmt).all():
+            valor = int(row[-1] or 0)
+            if row[0] == todas:
+                total = valor
+            else:
+                i = posicion[row[0]]
+                desgloses[i].append((row[1 + i], valor))
+        for desglose in desgloses:
+            desglose.sort(key=lambda item: item[1], reverse=True)
+        return total, desgloses
+
+    # --- Exportación de filas (auditoría) ---
+
+    def export_sesiones_stmt(self) -> Select:
+        return select(
+            SessionModel.created,
+            SessionModel.id,
+            SessionModel.code,
+            SessionModel.end_at,
+            _epoch_seconds(SessionModel.end_at - SessionModel.created).label("duracion_segundos"),
+        )
+
+    def export_reports_stmt(self) -> Select:
+        return select(
+            AIReportModel.created,
+            AIReportModel.id,
+            AIReportModel.session_id,
+            AIReportModel.ai_engine,
+            AIReportModel.status,
+            AIReportModel.language,
+            AIReportModel.input_tokens,
+            AIReportModel.output_tokens,
+            AIReportModel.reasoning_tokens,
+            AIReportModel.started,
+            AIReportModel.completed,
+            _epoch_seconds(AIReportModel.generation_duration).label("duracion_segundos"),
+        ).where(AIReportModel.deleted.is_(None))
+
+    def export_files_stmt(self) -> Select:
+        return select(File.created, File.id, File.name, File.file_type)
+
+    def export_stmt(self, dataset: str) -> Select:
+        """Consulta de exportación: sesiones, reports o files (primeras columnas created, id)."""
+        stmts = {
+            "sesiones": self.export_sesiones_stmt,
+            "reports": self.export_reports_stmt,
+            "files": self.export_files_stmt,
+        }
+        if dataset not in stmts:
+            raise ValueError(f"dataset no soportado: {dataset}")
+        return stmts[dataset]()
+
+    def stream_export(
+        self,
+        stmt: Select,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        after: tuple[datetime, UUID | int] | None = None,
+        limit: int | None = None,
+        yield_per: int = EXPORT_YIELD_PER,
+    ) -> Iterator[tuple]:
+        """Filas de un export_stmt ordenadas por (created, id) con cursor de servidor.
+
+        ``after`` continúa después de esa pareja (paginación keyset). yield_per activa
+        stream_results, así que las filas llegan en bloques sin cargar el resultado
+        entero en memoria.
+        """
+        created, id_ = stmt.selected_columns[0], stmt.selected_columns[1]
+        stmt = _in_range(stmt, created, date_from, date_to).order_by(created, id_)
+        if after is not None:
+            stmt = stmt.where(tuple_(created, id_) > tuple_(*after))
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        result = self._db.execute(stmt.execution_options(yield_per=yield_per))
+        try:
+            for row in result:
+                yield tuple(row)
+        finally:
+            result.close()
+
+
+class BatchProductoRepository:
+    """ProductoRepository que ejecuta cada consulta (método + argumentos) una sola vez.
+
+    Para lotes de KPIs sobre la misma sesión: paneles que comparten consultas
+    (total_usuarios, reports_by_tipo...) reutilizan el resultado.
+    """
+
+    def __init__(self, repo: ProductoRepository) -> None:
+        self._repo = repo
+        self._results: dict = {}
+        self.queries = 0
+        self.hits = 0
+
+    def __getattr__(self, name: str):
+        method = getattr(self._repo, name)
+        if not callable(method):
+            return method
+        signature = inspect.signature(method)
+
+        def cached(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (
+                name,
+                tuple(
+                    (arg, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+                    for arg, value in bound.arguments.items()
+                ),
+            )
+            if key in self._results:
+                self.hits += 1
+            else:
+                self.queries += 1
+                self._results[key] = method(*args, **kwargs)
+            return self._results[key]
+
+        return cached
@@ -0,0 +1,180 @@
+"""Repositorio: histogramas de duración de report por tenant, día y ai_engine."""
+
+import math
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import Date, Integer, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.models.report import AIReportModel
+from app.models.report_histogram import (
+    ReportDurationHistogram,
+    ReportHistogramCounted,
+    ReportHistogramWatermark,
+)
+
+# Buckets logarítmicos: 4 por cada duplicación (~19% de ancho relativo)
+BUCKETS_PER_OCTAVE = 4
+MIN_DURATION_SECONDS = 0.001
+BUCKET_MARGIN = 1e-9
+# Cuánto se vuelve a leer bajo la marca de agua en cada volcado: report de
+# transacciones que hacen commit hasta esto después de su completed
+RESCAN_WINDOW = timedelta(hours=1)
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def bucket_bounds(bucket: int) -> tuple[float, float]:
+    """[desde, hasta) en segundos del bucket."""
+    return 2 ** (bucket / BUCKETS_PER_OCTAVE), 2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE)
+
+
+def bucket_seconds(bucket: int) -> float:
+    """Valor representativo del bucket: su punto medio geométrico."""
+    return 2 ** ((bucket + 0.5) / BUCKETS_PER_OCTAVE)
+
+
+def _bucket_of(seconds):
+    # Constantes como literales: SELECT y GROUP BY son la misma expresión (como _bucket)
+    minimum = literal_column(repr(MIN_DURATION_SECONDS))
+    scale = literal_column(repr(BUCKETS_PER_OCTAVE / math.log(2)))
+    # ln() * scale de un borde exacto (8 s = 2**(12/4)) puede dar 11.999999999999998:
+    # el margen lo deja en su bucket, como dice bucket_bounds
+    margin = literal_column(repr(BUCKET_MARGIN))
+    return cast(func.floor(func.ln(func.greatest(seconds, minimum)) * scale + margin), Integer)
+
+
+class ReportHistogramRepository:
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def actualizar(self, tenant: str) -> int:
+        """Vuelca en el histograma los report completados desde la última vez.
+
+        ``self._db`` debe ser una sesión del tenant sobre el primario. La marca
+        de agua (report.completed) se bloquea con FOR UPDATE, así dos
+        actualizaciones concurrentes no cuentan dos veces. Un report cuya
+        transacción hace commit después de pasar la marca (completed anterior a
+        ella) se recoge en la siguiente: cada vez se vuelve a leer RESCAN_WINDOW
+        por debajo de la marca y report_histogram_counted descarta los ids ya
+        contados. Los report borrados después de volcarse siguen contando.
+        Devuelve los buckets tocados; no hace commit.
+        """
+        self._db.execute(
+            insert(ReportHistogramWatermark)
+            .values(tenant=tenant, completed_until=EPOCH)
+            .on_conflict_do_nothing(index_elements=[ReportHistogramWatermark.tenant])
+        )
+        desde = self._db.execute(
+            select(ReportHistogramWatermark.completed_until)
+            .where(ReportHistogramWatermark.tenant == tenant)
+            .with_for_update()
+        ).scalar_one()
+        hasta = self._db.execute(select(func.now())).scalar_one()
+        contados_tabla = ReportHistogramCounted.__table__
+
+        def completados(desde_: datetime, hasta_: datetime):
+            return select(literal(tenant), AIReportModel.id, AIReportModel.completed).where(
+                AIReportModel.deleted.is_(None),
+                AIReportModel.started.isnot(None),
+                AIReportModel.completed > desde_,
+                AIReportModel.completed <= hasta_,
+            )
+
+        def marcar(reports):
+            return (
+                insert(ReportHistogramCounted)
+                .from_select(["tenant", "report_id", "completed"], reports)
+                .on_conflict_do_nothing(
+                    index_elements=[ReportHistogramCounted.tenant, ReportHistogramCounted.report_id]
+                )
+            )
+
+        ya_contados = self._db.execute(
+            select(func.count()).select_from(contados_tabla).where(contados_tabla.c.tenant == tenant)
+        ).scalar_one()
+        if not ya_contados and desde > EPOCH:
+            # Primer volcado con re-lectura: lo anterior a la marca ya está contado
+            self._db.execute(marcar(completados(desde - RESCAN_WINDOW, desde)))
+
+        # Los ids nuevos se marcan y se cuentan en la misma sentencia
+        contados = marcar(completados(desde - RESCAN_WINDOW, hasta)).returning(
+            ReportHistogramCounted.report_id
+        ).cte("contados")
+        day = cast(func.timezone(literal_column("'UTC'"), AIReportModel.created), Date)
+        bucket = _bucket_of(func.extract("epoch", AIReportModel.generation_duration))
+        nuevos = (
+            select(
+                literal(tenant),
+                day,
+                AIReportModel.ai_engine,
+                bucket,
+                func.count(AIReportModel.id),
+            )
+            .join_from(AIReportModel, contados, contados.c.report_id == AIReportModel.id)
+            .group_by(day, AIReportModel.ai_engine, bucket)
+        )
+        stmt = (
+            insert(ReportDurationHistogram)
+            .from_select(["tenant", "day", "ai_engine", "bucket", "count"], nuevos)
+            # Un WITH con INSERT tiene que ir al principio de la sentencia
+            .add_cte(contados)
+        )
+        result = self._db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    ReportDurationHistogram.tenant,
+                    ReportDurationHistogram.day,
+                    ReportDurationHistogram.ai_engine,
+                    ReportDurationHistogram.bucket,
+                ],
+                set_={"count": ReportDurationHistogram.count + stmt.excluded.count},
+            )
+        )
+        # Lo que ya no se va a re-leer sobra; se deja el más reciente para saber
+        # que el tenant ya usa la re-lectura
+        self._db.execute(
+            contados_tabla.delete().where(
+                contados_tabla.c.tenant == tenant,
+                contados_tabla.c.completed <= hasta - RESCAN_WINDOW,
+                contados_tabla.c.completed
+                < select(func.max(contados_tabla.c.completed))
+                .where(contados_tabla.c.tenant == tenant)
+                .scalar_subquery(),
+            )
+        )
+        self._db.execute(
+            ReportHistogramWatermark.__table__.update()
+            .where(ReportHistogramWatermark.tenant == tenant)
+            .values(completed_until=hasta)
+        )
+        return result.rowcount
+
+    def buckets_por_tipo(
+        self,
+        tenant: str,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[tuple[str, int, int]]:
+        """(ai_engine, bucket, count) sumando los días del rango (días completos, UTC)."""
+        stmt = (
+            select(
+                ReportDurationHistogram.ai_engine,
+                ReportDurationHistogram.bucket,
+                func.sum(ReportDurationHistogram.count),
+            )
+            .where(ReportDurationHistogram.tenant == tenant)
+            .group_by(ReportDurationHistogram.ai_engine, ReportDurationHistogram.bucket)
+            .order_by(ReportDurationHistogram.ai_engine, ReportDurationHistogram.bucket)
+        )
+        if date_from is not None:
+            stmt = stmt.where(ReportDurationHistogram.day >= _utc_day(date_from))
+        if date_to is not None:
+            stmt = stmt.where(ReportDurationHistogram.day <= _utc_day(date_to))
+        return [(row[0], row[1], int(row[2])) for row in self._db.execute(stmt).all()]
+
+
+def _utc_day(value: datetime) -> date:
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(UTC).date()
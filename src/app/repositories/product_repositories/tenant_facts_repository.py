@@ -0,0 +1,193 @@
+"""Repositorio: hechos diarios por tenant (shared.tenant_daily_facts)."""
+
+from datetime import UTC, date, datetime, time
+from typing import Any
+
+from sqlalchemy import Date, cast, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.models.answer import Answer
+from app.models.file import File
+from app.models.organization import Organization
+from app.models.report import AIReportModel
+from app.models.session import Session as SessionModel
+from app.models.tenant_daily_facts import TenantDailyFacts
+
+VALORES = ("sessions", "active_users", "reports_by_engine", "exports_by_type", "credits", "credits_ia")
+
+
+def _int(value) -> int | None:
+    return int(value) if value is not None else None
+
+
+def _dia(column):
+    """Día de un timestamp sin zona (session/answer/file.created, ya en UTC)."""
+    return cast(column, Date)
+
+
+def _dia_utc(column):
+    """Día UTC de un timestamptz (report.created)."""
+    return cast(func.timezone(literal_column("'UTC'"), column), Date)
+
+
+def _desde(stmt, column, desde: date | None):
+    if desde is None:
+        return stmt
+    return stmt.where(column >= datetime.combine(desde, time.min, tzinfo=UTC))
+
+
+class TenantFactsRepository:
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    # --- Lectura del schema del tenant (sesión del tenant, réplica o primario) ---
+
+    def hechos_por_dia(self, tenant: str, desde: date | None = None) -> dict[date, dict[str, Any]]:
+        """Hechos de cada día con actividad desde ``desde`` (UTC; None: todo el histórico).
+
+        Hoy siempre está, con el saldo de credits actual de la organización.
+        """
+        hoy = datetime.now(UTC).date()
+        dias: dict[date, dict[str, Any]] = {}
+
+        def dia(d: date) -> dict[str, Any]:
+            vacio = {
+                "sessions": 0,
+                "active_users": 0,
+                "reports_by_engine": {},
+                "exports_by_type": {},
+                "credits": None,
+                "credits_ia": None,
+            }
+            return dias.setdefault(d, vacio)
+
+        sesiones = _dia(SessionModel.created)
+        stmt = select(sesiones, func.count(SessionModel.id)).group_by(sesiones)
+        for d, n in self._db.execute(_desde(stmt, SessionModel.created, desde)).all():
+            dia(d)["sessions"] = n
+
+        respuestas = _dia(Answer.created)
+        stmt = select(respuestas, func.count(func.distinct(Answer.user_id))).group_by(respuestas)
+        for d, n in self._db.execute(_desde(stmt, Answer.created, desde)).all():
+            dia(d)["active_users"] = n
+
+        reports = _dia_utc(AIReportModel.created)
+        stmt = (
+            select(reports, AIReportModel.ai_engine, func.count(AIReportModel.id))
+            .where(AIReportModel.deleted.is_(None))
+            .group_by(reports, AIReportModel.ai_engine)
+        )
+        for d, engine, n in self._db.execute(_desde(stmt, AIReportModel.created, desde)).all():
+            dia(d)["reports_by_engine"][engine] = n
+
+        files = _dia(File.created)
+        stmt = select(files, File.file_type, func.count(File.id)).group_by(files, File.file_type)
+        for d, tipo, n in self._db.execute(_desde(stmt, File.created, desde)).all():
+            dia(d)["exports_by_type"][tipo or "sin_tipo"] = n
+
+        credits = self._db.execute(
+            select(Organization.credits, Organization.credits_ia).where(Organization.id == tenant)
+        ).first()
+        if credits is not None:
+            dia(hoy).update(credits=credits[0], credits_ia=credits[1])
+        else:
+            dia(hoy)
+        return dias
+
+    # --- Escritura en shared (primario) ---
+
+    def bloquear(self, tenant: str) -> bool:
+        """Advisory lock del refresco de ``tenant`` hasta el fin de la transacción;
+        False si otro refresco lo tiene."""
+        return self._db.execute(
+            select(func.pg_try_advisory_xact_lock(func.hashtext(f"tenant_daily_facts:{tenant}")))
+        ).scalar()
+
+    def ultimo_dia(self, tenant: str) -> date | None:
+        return self._db.execute(
+            select(func.max(TenantDailyFacts.day)).where(TenantDailyFacts.tenant == tenant)
+        ).scalar()
+
+    def sustituir(self, tenant: str, desde: date | None, dias: dict[date, dict[str, Any]]) -> None:
+        """Deja los hechos del tenant desde ``desde`` iguales a ``dias``, en una transacción.
+
+        Como REFRESH MATERIALIZED VIEW CONCURRENTLY: solo se escriben las filas que
+        cambian (upsert con IS DISTINCT FROM) y se borran las que sobran, así los
+        lectores nunca se bloquean ni ven un refresco a medias. Llamar con el lock
+        de ``bloquear`` cogido en la misma transacción. No hace commit.
+        """
+        now = datetime.now(UTC)
+        table = TenantDailyFacts.__table__
+        stmt = insert(TenantDailyFacts).values(
+            [{"tenant": tenant, "day": d, **valores, "refreshed_at": now} for d, valores in dias.items()]
+        )
+        # El saldo de credits de días pasados no se recalcula: se conserva
+        nuevos = {
+            name: func.coalesce(stmt.excluded[name], table.c[name])
+            if name in ("credits", "credits_ia")
+            else stmt.excluded[name]
+            for name in VALORES
+        }
+        self._db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.tenant, table.c.day],
+                set_={**nuevos, "refreshed_at": stmt.excluded.refreshed_at},
+                where=tuple_(*(table.c[name] for name in VALORES)).is_distinct_from(
+                    tuple_(*nuevos.values())
+                ),
+            )
+        )
+        sobrantes = table.delete().where(table.c.tenant == tenant, table.c.day.not_in(list(dias)))
+        if desde is not None:
+            sobrantes = sobrantes.where(table.c.day >= desde)
+        self._db.execute(sobrantes)
+
+    # --- KPIs globales: una sola tabla ---
+
+    def resumen_diario(
+        self, date_from: date | None = None, date_to: date | None = None
+    ) -> list[tuple[date, int, int, int, int | None, int | None]]:
+        """(día, tenants con sesiones, sesiones, usuarios activos, credits, credits_ia) de todos los tenants."""
+        stmt = (
+            select(
+                TenantDailyFacts.day,
+                func.count().filter(TenantDailyFacts.sessions > 0),
+                func.sum(TenantDailyFacts.sessions),
+                func.sum(TenantDailyFacts.active_users),
+                func.sum(TenantDailyFacts.credits),
+                func.sum(TenantDailyFacts.credits_ia),
+            )
+            .group_by(TenantDailyFacts.day)
+            .order_by(TenantDailyFacts.day)
+        )
+        stmt = self._rango(stmt, date_from, date_to)
+        return [
+            (row[0], row[1], int(row[2] or 0), int(row[3] or 0), _int(row[4]), _int(row[5]))
+            for row in self._db.execute(stmt).all()
+        ]
+
+    def por_dia_y_clave(
+        self, columna: str, date_from: date | None = None, date_to: date | None = None
+    ) -> list[tuple[date, str, int]]:
+        """(día, clave, total) de un desglose JSONB (reports_by_engine / exports_by_type)."""
+        if columna not in ("reports_by_engine", "exports_by_type"):
+            raise ValueError(f"desglose no soportado: {columna}")
+        pares = func.jsonb_each_text(TenantDailyFacts.__table__.c[columna]).table_valued("key", "value")
+        stmt = (
+            select(TenantDailyFacts.day, pares.c.key, func.sum(cast(pares.c.value, TenantDailyFacts.sessions.type)))
+            .select_from(TenantDailyFacts)
+            .join(pares, literal_column("true"))
+            .group_by(TenantDailyFacts.day, pares.c.key)
+            .order_by(TenantDailyFacts.day, pares.c.key)
+        )
+        stmt = self._rango(stmt, date_from, date_to)
+        return [(row[0], row[1], int(row[2] or 0)) for row in self._db.execute(stmt).all()]
+
+    @staticmethod
+    def _rango(stmt, date_from: date | None, date_to: date | None):
+        if date_from is not None:
+            stmt = stmt.where(TenantDailyFacts.day >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(TenantDailyFacts.day <= date_to)
+        return stmt
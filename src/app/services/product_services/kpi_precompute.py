@@ -0,0 +1,159 @@
+"""
+Precálculo periódico de los KPIs de Producto.
+
+Se arranca desde el lifespan (start_precompute_task). Para cada tenant de
+shared.organizations con schema y cada KPI de ProductoService.KPIS con
+intervalo > 0 (precompute_interval: por defecto solo los de
+PRECOMPUTE_INTERVALS), calcula el KPI con los parámetros de la petición sin
+filtros y lo guarda en shared.kpi_results. Los endpoints sirven
+ese valor con su computed_at mientras no caduque. Cada tenant tiene además la
+tarea HISTOGRAMAS: vuelca los report nuevos en los histogramas de duración
+(cada REPORT_HISTOGRAM_REFRESH_SECONDS).
+
+Los trabajos (tenant, tarea) se reparten a lo largo de su intervalo y se ejecutan
+de uno en uno en un hilo: la carga es constante en vez de un pico por ciclo.
+Las lecturas van a la réplica si está disponible; la escritura, al primario.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import (
+    engine,
+    set_statement_timeout,
+    statement_timeout_ms,
+    tenant_session,
+)
+from app.repositories.product_repositories.kpi_result_repository import (
+    KpiResultRepository,
+)
+from app.repositories.product_repositories.report_histogram_repository import (
+    ReportHistogramRepository,
+)
+from app.services.product_services.producto_service import (
+    ProductoService,
+    _json_default,
+    parametros_precalculo,
+    precompute_interval,
+)
+
+logger = logging.getLogger(__name__)
+
+TENANTS_REFRESH_SECONDS = 600
+MAX_SLEEP_SECONDS = 60
+HISTOGRAMAS = "histogramas-report"
+
+# (momento monotonic, tenant, tarea: KPI o HISTOGRAMAS)
+Job = tuple[float, str, str]
+
+_background_task: asyncio.Task | None = None
+
+
+def calcular_y_guardar(tenant: str, kpi: str) -> None:
+    """Calcula ``kpi`` para ``tenant`` y sustituye su resultado en kpi_results."""
+    date_from, date_to, granularity = parametros_precalculo(kpi)
+    start = time.perf_counter()
+    with tenant_session(tenant, read_only=True) as db:
+        set_statement_timeout(db, statement_timeout_ms(kpi))
+        data = ProductoService(db).calcular_kpi(kpi, date_from, date_to, granularity)
+    duration_ms = round((time.perf_counter() - start) * 1000)
+    with Session(engine) as db:
+        KpiResultRepository(db).guardar(
+            tenant,
+            kpi,
+            json.loads(json.dumps(data, default=_json_default)),
+            datetime.now(UTC),
+            duration_ms,
+            date_from,
+            date_to,
+            granularity,
+        )
+        db.commit()
+
+
+def actualizar_histogramas(tenant: str) -> None:
+    """Vuelca los report completados desde el último volcado (sobre el primario)."""
+    with tenant_session(tenant) as db:
+        ReportHistogramRepository(db).actualizar(tenant)
+        db.commit()
+
+
+def intervalo(tarea: str) -> int:
+    if tarea == HISTOGRAMAS:
+        return settings.REPORT_HISTOGRAM_REFRESH_SECONDS
+    return precompute_interval(tarea)
+
+
+def ejecutar(tenant: str, tarea: str) -> None:
+    if tarea == HISTOGRAMAS:
+        actualizar_histogramas(tenant)
+    else:
+        calcular_y_guardar(tenant, tarea)
+
+
+def cargar_tenants() -> list[str]:
+    with Session(engine) as db:
+        return KpiResultRepository(db).tenants()
+
+
+def planificar(jobs: list[Job], tenants: list[str], now: float) -> list[Job]:
+    """Quita los trabajos de tenants que ya no están y añade los nuevos, escalonados
+    a lo largo del intervalo de cada tarea."""
+    planned = {(tenant, tarea) for _, tenant, tarea in jobs}
+    jobs = [job for job in jobs if job[1] in tenants]
+    nuevos = [
+        (tenant, tarea)
+        for tenant in tenants
+        for tarea in [*ProductoService.KPIS, HISTOGRAMAS]
+        if intervalo(tarea) > 0 and (tenant, tarea) not in planned
+    ]
+    for i, (tenant, tarea) in enumerate(nuevos):
+        jobs.append((now + intervalo(tarea) * i / len(nuevos), tenant, tarea))
+    heapq.heapify(jobs)
+    return jobs
+
+
+async def run_loop() -> None:
+    """Bucle: ejecuta el siguiente trabajo pendiente y lo reprograma tras su intervalo."""
+    jobs: list[Job] = []
+    tenants_loaded_at = float("-inf")
+    while True:
+        now = time.monotonic()
+        if now - tenants_loaded_at >= TENANTS_REFRESH_SECONDS:
+            tenants_loaded_at = now
+            try:
+                jobs = planificar(jobs, await asyncio.to_thread(cargar_tenants), now)
+            except SQLAlchemyError:
+                logger.exception("precálculo: no se pudieron leer los tenants")
+        if not jobs:
+            await asyncio.sleep(MAX_SLEEP_SECONDS)
+            continue
+        due, tenant, tarea = jobs[0]
+        if due > now:
+            await asyncio.sleep(min(due - now, MAX_SLEEP_SECONDS))
+            continue
+        heapq.heappop(jobs)
+        try:
+            await asyncio.to_thread(ejecutar, tenant, tarea)
+        except Exception:  # noqa: BLE001
+            logger.exception("precálculo de %s para %s fallido", tarea, tenant)
+        interval = intervalo(tarea)
+        if interval > 0:
+            heapq.heappush(jobs, (max(due + interval, time.monotonic()), tenant, tarea))
+
+
+def start_precompute_task() -> None:
+    """Arranca el precálculo en background. Llamar desde lifespan de la app."""
+    global _background_task
+    if not any(intervalo(tarea) > 0 for tarea in [*ProductoService.KPIS, HISTOGRAMAS]):
+        return
+    if _background_task is None or _background_task.done():
+        _background_task = asyncio.create_task(run_loop())
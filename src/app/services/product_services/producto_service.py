@@ -1,107 +1,458 @@
 """Servicio: orquestación y transformación de datos para KPIs de producto."""
 
-from datetime import date, datetime
+import csv
+import functools
+import inspect
+import io
+import json
+import math
+from collections.abc import Iterator
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
 
 from sqlmodel import Session
 
+from app.core import single_flight
+from app.core.config import settings
+from app.models.kpi_result import KpiResult
+from app.repositories.product_repositories.kpi_result_repository import (
+    KpiResultRepository,
+)
 from app.repositories.product_repositories.producto_repository import ProductoRepository
+from app.repositories.product_repositories.report_histogram_repository import (
+    ReportHistogramRepository,
+    bucket_bounds,
+    bucket_seconds,
+)
+from app.repositories.product_repositories.tenant_facts_repository import (
+    TenantFactsRepository,
+)
+
+TIPOS_IA = ["DualSense", "JAR", "Ranking", "Verbatim", "Drivers"]
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CHUNK_ROWS = 500
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p99": 0.99}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} no serializable")
+
+
+def _export_chunks(columns: list[str], rows, formato: str) -> Iterator[str]:
+    """Filas a NDJSON o CSV en bloques de EXPORT_CHUNK_ROWS (memoria constante)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if formato == "csv" else None
+    if writer is not None:
+        writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        if writer is not None:
+            writer.writerow(v.isoformat() if isinstance(v, datetime) else v for v in row)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row, strict=True)), default=_json_default))
+            buffer.write("\n")
+        pending += 1
+        if pending == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _time_label(periodo, granularity: str) -> str:
+    """Etiqueta "time" de cada punto de una serie (mismo formato que sesiones-creadas)."""
+    if not isinstance(periodo, date):
+        return str(periodo)
+    if granularity == "hour":
+        return periodo.strftime("%d/%m/%Y %H:00")
+    return periodo.strftime("%d/%m/%Y")
+
+
+def _frecuencia(total_sesiones: int, usuarios_activos: int) -> dict:
+    if usuarios_activos == 0:
+        return {"media_sesiones_por_usuario_activo": 0.0, "total_sesiones": 0, "usuarios_activos": 0}
+    return {
+        "media_sesiones_por_usuario_activo": round(total_sesiones / usuarios_activos, 2),
+        "total_sesiones": total_sesiones,
+        "usuarios_activos": usuarios_activos,
+    }
+
+
+def _porcentaje_duplican(usuarios_duplican: int, total_usuarios: int) -> dict:
+    if total_usuarios == 0:
+        return {"porcentaje": 0.0, "usuarios_duplican_sesiones": 0, "total_usuarios": 0}
+    return {
+        "porcentaje": round(100.0 * usuarios_duplican / total_usuarios, 2),
+        "usuarios_duplican_sesiones": usuarios_duplican,
+        "total_usuarios": total_usuarios,
+    }
+
+
+def _duracion(segundos: float | None) -> dict:
+    if segundos is None:
+        return {"duracion_media_segundos": None, "duracion_media_minutos": None}
+    return {
+        "duracion_media_segundos": round(segundos, 2),
+        "duracion_media_minutos": round(segundos / 60, 2),
+    }
+
+
+def _adopcion(total_sesiones: int, sesiones_con_ia: int) -> dict:
+    if total_sesiones == 0:
+        return {
+            "porcentaje": 0.0,
+            "sesiones_con_analisis_ia": 0,
+            "total_sesiones": 0,
+        }
+    return {
+        "porcentaje": round(100.0 * sesiones_con_ia / total_sesiones, 2),
+        "sesiones_con_analisis_ia": sesiones_con_ia,
+        "total_sesiones": total_sesiones,
+    }
+
+
+def _percentiles(buckets: list[tuple[int, int]]) -> dict:
+    """p50/p90/p99 (segundos) de un histograma [(bucket, count)] ordenado por bucket."""
+    total = sum(count for _, count in buckets)
+    result = dict.fromkeys(PERCENTILES)
+    if not total:
+        return result
+    for name, q in PERCENTILES.items():
+        rank = max(1, math.ceil(q * total))
+        acumulado = 0
+        for bucket, count in buckets:
+            acumulado += count
+            if acumulado >= rank:
+                result[name] = round(bucket_seconds(bucket), 2)
+                break
+    return result
+
+
+def _distribucion(buckets: list[tuple[int, int]]) -> list[dict]:
+    return [
+        {"desde": round(desde, 3), "hasta": round(hasta, 3), "count": count}
+        for desde, hasta, count in ((*bucket_bounds(b), c) for b, c in buckets)
+    ]
+
+
+def _serie_por_tipo(rows, granularity: str, tipos: list[str], default=0) -> list[dict]:
+    """Filas (periodo, tipo, valor) a una serie ancha: {"time", tipo1, tipo2, ...} por periodo."""
+    serie: dict = {}
+    for periodo, tipo, valor in rows:
+        punto = serie.setdefault(periodo, dict.fromkeys(tipos, default))
+        punto[tipo] = valor
+    return [{"time": _time_label(p, granularity), **valores} for p, valores in serie.items()]
+
+
+def _dia_utc(value: datetime | None) -> date | None:
+    if value is None:
+        return None
+    return value.astimezone(UTC).date() if value.tzinfo is not None else value.date()
+
+
+def rango_hoy() -> tuple[datetime, datetime]:
+    """Rango por defecto de sesiones-creadas: el día de hoy (UTC)."""
+    today = datetime.now(tz=UTC).date()
+    return (
+        datetime(today.year, today.month, today.day, 0, 0, 0, tzinfo=UTC),
+        datetime(today.year, today.month, today.day, 23, 59, 59, tzinfo=UTC),
+    )
+
+
+def parametros_precalculo(kpi: str) -> tuple[datetime | None, datetime | None, str | None]:
+    """(date_from, date_to, granularity) con los que se precalcula ``kpi``: los de la
+    petición sin parámetros."""
+    if kpi == "sesiones-creadas":
+        return (*rango_hoy(), "day")
+    return None, None, None
+
+
+def precompute_interval(kpi: str) -> int:
+    """Segundos entre precálculos de ``kpi`` (PRECOMPUTE_INTERVALS o, si no está,
+    PRECOMPUTE_INTERVAL_SECONDS); 0: no se precalcula."""
+    for item in settings.PRECOMPUTE_INTERVALS.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() == kpi and seconds.strip():
+            return int(seconds)
+    return settings.PRECOMPUTE_INTERVAL_SECONDS
+
+
+def _vigente(result: KpiResult, params: tuple) -> bool:
+    """El precálculo es de los mismos parámetros y no ha caducado."""
+    interval = precompute_interval(result.kpi)
+    if interval <= 0 or (result.date_from, result.date_to, result.granularity) != params:
+        return False
+    max_age = timedelta(seconds=interval * settings.PRECOMPUTE_MAX_AGE_FACTOR)
+    return datetime.now(UTC) - result.computed_at <= max_age
+
+
+def _session_tenant(db: Session) -> str | None:
+    """Schema del tenant de la sesión (schema_translate_map del engine)."""
+    try:
+        options = db.get_bind().get_execution_options()
+    except AttributeError:
+        return None
+    return (options.get("schema_translate_map") or {}).get(None)
+
+
+def _coalesced(method):
+    """Agrupa llamadas concurrentes idénticas (tenant, KPI, parámetros) con single_flight."""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._tenant is None:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = tuple(bound.arguments.items())[1:]
+        key = (self._tenant, method.__name__, params)
+        return single_flight.do(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
 
 
 class ProductoService:
-    def __init__(self, db: Session) -> None:
-        self._repo = ProductoRepository(db)
+    """KPIs de producto. Con ``granularity`` (hour/day/week/month) cada KPI devuelve
+    una serie temporal agrupada en BD; sin ella, el valor agregado del rango."""
 
+    # KPI (ruta en /kpi/Producto) -> (método, acepta from/to/granularity)
+    KPIS: dict[str, tuple[str, bool]] = {
+        "sesiones-creadas": ("sesiones_creadas_por_fecha", True),
+        "analisis-ia-ejecutados": ("analisis_ia_ejecutados", True),
+        "consumo-credits-ia": ("consumo_credits_ia", False),
+        "consumo-muestras": ("consumo_muestras", False),
+        "tiempo-procesamiento-ia": ("tiempo_procesamiento_ia", True),
+        "frecuencia-uso": ("frecuencia_uso", True),
+        "adopcion-funcionalidades-ia": ("adopcion_funcionalidades_ia", True),
+        "exportaciones-generadas": ("exportaciones_generadas", True),
+        "porcentaje-usuarios-duplican-sesiones": ("porcentaje_usuarios_duplican_sesiones", True),
+        "duracion-media-sesion": ("duracion_media_sesion", True),
+    }
+
+    def __init__(
+        self, db: Session, repo: ProductoRepository | None = None, tenant: str | None = None
+    ) -> None:
+        self._repo = repo if repo is not None else ProductoRepository(db)
+        # Con tenant, las peticiones idénticas concurrentes comparten el cálculo
+        self._tenant = tenant if tenant is not None else _session_tenant(db)
+        self._results = KpiResultRepository(db) if self._tenant is not None else None
+        self._histogramas = ReportHistogramRepository(db) if self._tenant is not None else None
+        self._hechos = TenantFactsRepository(db)
+
+    def calcular_kpi(
+        self,
+        kpi: str,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ):
+        """Calcula un KPI registrado en KPIS por su nombre de ruta."""
+        if kpi not in self.KPIS:
+            raise ValueError(f"KPI desconocido: {kpi}")
+        method_name, acepta_rango = self.KPIS[kpi]
+        method = getattr(self, method_name)
+        if not acepta_rango:
+            return method()
+        if kpi == "sesiones-creadas":
+            return method(date_from, date_to, granularity or "day")
+        return method(date_from, date_to, granularity)
+
+    def calcular_kpi_o_precalculado(
+        self,
+        kpi: str,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> tuple[Any, datetime]:
+        """(datos, computed_at) del KPI: el último precálculo (kpi_precompute) si la
+        petición usa los parámetros por defecto y no ha caducado; si no, en vivo."""
+        if kpi == "sesiones-creadas":
+            granularity = granularity or "day"
+        params = (date_from, date_to, granularity)
+        # Sin precálculo (intervalo 0, el defecto) no se consulta kpi_results
+        if (
+            self._results is not None
+            and precompute_interval(kpi) > 0
+            and params == parametros_precalculo(kpi)
+        ):
+            result = self._results.get(self._tenant, kpi)
+            if result is not None and _vigente(result, params):
+                return result.data, result.computed_at
+        return self.calcular_kpi(kpi, date_from, date_to, granularity), datetime.now(UTC)
+
+    def kpis_globales(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> list[dict]:
+        """KPIs de todos los tenants por día (UTC), desde shared.tenant_daily_facts
+        (tenant_facts): tenants con sesiones, sesiones, usuarios activos, saldo de
+        credits y reports / exportaciones por tipo."""
+        desde, hasta = _dia_utc(date_from), _dia_utc(date_to)
+        serie = {
+            dia: {
+                "tenants_activos": tenants,
+                "sesiones": sesiones,
+                "usuarios_activos": usuarios,
+                "credits": credits,
+                "credits_ia": credits_ia,
+            }
+            for dia, tenants, sesiones, usuarios, credits, credits_ia in self._hechos.resumen_diario(desde, hasta)
+        }
+        for columna, prefijo in (("reports_by_engine", "reports"), ("exports_by_type", "exportaciones")):
+            for dia, clave, total in self._hechos.por_dia_y_clave(columna, desde, hasta):
+                punto = serie.get(dia)
+                if punto is None:  # día refrescado entre las dos lecturas
+                    continue
+                punto[prefijo] = punto.get(prefijo, 0) + total
+                punto[f"{prefijo}_{clave}"] = total
+        return [
+            {"time": _time_label(dia, "day"), "reports": 0, "exportaciones": 0, **valores}
+            for dia, valores in serie.items()
+        ]
+
+    @_coalesced
     def sesiones_creadas_por_fecha(
         self,
         date_from: datetime | None = None,
         date_to: datetime | None = None,
+        granularity: str = "day",
     ) -> list[dict]:
-        rows = self._repo.sesiones_creadas_por_fecha(date_from=date_from, date_to=date_to)
+        rows = self._repo.sesiones_creadas_por_fecha(date_from=date_from, date_to=date_to, granularity=granularity)
         if not rows:
             label = date_from.strftime("%d/%m/%Y") if date_from else datetime.now().strftime("%d/%m/%Y")
             return [{"time": label, "value": 0}]
-        return [
-            {
-                "time": f.strftime("%d/%m/%Y") if isinstance(f, date) else str(f),
-                "value": c,
-            }
-            for f, c in rows
-        ]
+        return [{"time": _time_label(f, granularity), "value": c} for f, c in rows]
 
-    def frecuencia_uso(self) -> dict:
+    @_coalesced
+    def frecuencia_uso(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> dict | list[dict]:
         """KPI 11: Frecuencia de uso = media de sesiones por cliente activo (por tenant)."""
-        total_sesiones, usuarios_activos = self._repo.total_sesiones_y_usuarios_activos()
-        if usuarios_activos == 0:
-            return {"media_sesiones_por_usuario_activo": 0.0, "total_sesiones": 0, "usuarios_activos": 0}
-        media = round(total_sesiones / usuarios_activos, 2)
-        return {
-            "media_sesiones_por_usuario_activo": media,
-            "total_sesiones": total_sesiones,
-            "usuarios_activos": usuarios_activos,
-        }
+        if granularity is not None:
+            rows = self._repo.sesiones_y_usuarios_activos_por_periodo(granularity, date_from, date_to)
+            return [{"time": _time_label(p, granularity), **_frecuencia(s, u)} for p, s, u in rows]
+        return _frecuencia(*self._repo.total_sesiones_y_usuarios_activos(date_from, date_to))
 
-    def exportaciones_generadas(self) -> dict:
+    @_coalesced
+    def exportaciones_generadas(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> dict | list[dict]:
         """KPI 16: Exportaciones generadas (PDF y Excel) — por file."""
-        por_tipo = self._repo.exportaciones_por_tipo()
-        total = self._repo.total_exportaciones()
+        if granularity is not None:
+            rows = self._repo.exportaciones_por_periodo(granularity, date_from, date_to)
+            tipos = sorted({t or "sin_tipo" for _, t, _ in rows})
+            serie = _serie_por_tipo(((p, t or "sin_tipo", c) for p, t, c in rows), granularity, tipos)
+            return [{"time": punto.pop("time"), "total": sum(punto.values()), **punto} for punto in serie]
+        total, por_tipo = self._repo.exportaciones_total_y_por_tipo(date_from, date_to)
         return {
             "total": total,
             "por_tipo": [{"tipo": t or "sin_tipo", "count": c} for t, c in por_tipo],
         }
 
-    def porcentaje_usuarios_duplican_sesiones(self) -> dict:
+    @_coalesced
+    def porcentaje_usuarios_duplican_sesiones(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> dict | list[dict]:
         """KPI 18: % usuarios que duplican sesiones (>= 2 sesiones)."""
         total_usuarios = self._repo.total_usuarios()
-        usuarios_duplican = self._repo.usuarios_con_al_menos_dos_sesiones()
-        if total_usuarios == 0:
-            return {"porcentaje": 0.0, "usuarios_duplican_sesiones": 0, "total_usuarios": 0}
-        pct = round(100.0 * usuarios_duplican / total_usuarios, 2)
-        return {
-            "porcentaje": pct,
-            "usuarios_duplican_sesiones": usuarios_duplican,
-            "total_usuarios": total_usuarios,
-        }
+        if granularity is not None:
+            rows = self._repo.usuarios_con_al_menos_dos_sesiones_por_periodo(granularity, date_from, date_to)
+            return [{"time": _time_label(p, granularity), **_porcentaje_duplican(n, total_usuarios)} for p, n in rows]
+        usuarios_duplican = self._repo.usuarios_con_al_menos_dos_sesiones(date_from, date_to)
+        return _porcentaje_duplican(usuarios_duplican, total_usuarios)
 
-    def duracion_media_sesion(self) -> dict:
+    @_coalesced
+    def duracion_media_sesion(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> dict | list[dict]:
         """KPI 19: Duración media de sesión (solo sesiones con end_at)."""
-        segundos = self._repo.duracion_media_sesion_segundos()
-        if segundos is None:
-            return {"duracion_media_segundos": None, "duracion_media_minutos": None}
-        return {
-            "duracion_media_segundos": round(segundos, 2),
-            "duracion_media_minutos": round(segundos / 60, 2),
-        }
+        if granularity is not None:
+            rows = self._repo.duracion_media_sesion_por_periodo(granularity, date_from, date_to)
+            return [{"time": _time_label(p, granularity), **_duracion(s)} for p, s in rows]
+        return _duracion(self._repo.duracion_media_sesion_segundos(date_from, date_to))
 
     # --- KPIs IA (tabla report) ---
 
-    def analisis_ia_ejecutados(self) -> list[dict]:
-        TIPOS = ["DualSense", "JAR", "Ranking", "Verbatim", "Drivers"]
-        por_tipo = {tipo: n for tipo, n in self._repo.reports_by_tipo()}
-        return [{"tipo": t, "total": por_tipo.get(t, 0)} for t in TIPOS]
-
-    def tiempo_procesamiento_ia(self) -> list[dict]:
-        TIPOS = ["DualSense", "JAR", "Ranking", "Verbatim", "Drivers"]
-        por_tipo = {tipo: seg for tipo, seg in self._repo.avg_duration_seconds_by_tipo()}
-        return [{"tipo": t, "segundos": por_tipo.get(t, 0)} for t in TIPOS]
-
-    def adopcion_funcionalidades_ia(self) -> dict:
-        total_sesiones = self._repo.total_sessions()
-        sesiones_con_ia = self._repo.sessions_with_ai_count()
-        if total_sesiones == 0:
-            return {
-                "porcentaje": 0.0,
-                "sesiones_con_analisis_ia": 0,
-                "total_sesiones": 0,
-            }
-        pct = round(100.0 * sesiones_con_ia / total_sesiones, 2)
-        return {
-            "porcentaje": pct,
-            "sesiones_con_analisis_ia": sesiones_con_ia,
-            "total_sesiones": total_sesiones,
-        }
+    @_coalesced
+    def analisis_ia_ejecutados(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> list[dict]:
+        if granularity is not None:
+            rows = self._repo.reports_by_tipo_por_periodo(granularity, date_from, date_to)
+            return _serie_por_tipo(rows, granularity, TIPOS_IA)
+        por_tipo = dict(self._repo.reports_by_tipo(date_from, date_to))
+        return [{"tipo": t, "total": por_tipo.get(t, 0)} for t in TIPOS_IA]
+
+    @_coalesced
+    def tiempo_procesamiento_ia(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+        histograma: bool = False,
+    ) -> list[dict]:
+        """Media (segundos) por tipo y p50/p90/p99 de los histogramas diarios del
+        tenant; con histograma=True también la distribución por buckets."""
+        if granularity is not None:
+            rows = self._repo.avg_duration_seconds_by_tipo_por_periodo(granularity, date_from, date_to)
+            return _serie_por_tipo(rows, granularity, TIPOS_IA)
+        por_tipo = dict(self._repo.avg_duration_seconds_by_tipo(date_from, date_to))
+        buckets: dict[str, list[tuple[int, int]]] = {}
+        if self._histogramas is not None:
+            for tipo, bucket, count in self._histogramas.buckets_por_tipo(self._tenant, date_from, date_to):
+                buckets.setdefault(tipo, []).append((bucket, count))
+        datos = []
+        for t in TIPOS_IA:
+            punto = {"tipo": t, "segundos": por_tipo.get(t, 0), **_percentiles(buckets.get(t, []))}
+            if histograma:
+                punto["histograma"] = _distribucion(buckets.get(t, []))
+            datos.append(punto)
+        return datos
+
+    @_coalesced
+    def adopcion_funcionalidades_ia(
+        self,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        granularity: str | None = None,
+    ) -> dict | list[dict]:
+        if granularity is not None:
+            rows = self._repo.sesiones_con_ia_por_periodo(granularity, date_from, date_to)
+            return [{"time": _time_label(p, granularity), **_adopcion(total, con_ia)} for p, total, con_ia in rows]
+        total_sesiones = self._repo.total_sessions(date_from, date_to)
+        sesiones_con_ia = self._repo.sessions_with_ai_count(date_from, date_to)
+        return _adopcion(total_sesiones, sesiones_con_ia)
 
     # --- KPIs shared.organizations (Credits / Credits IA) ---
 
+    @_coalesced
     def consumo_muestras(self) -> dict:
         """KPI: Consumo de Muestras (Credits) — totales y por plan. Fuente: shared.organizations.credits."""
         total, por_plan = self._repo.consumo_credits_por_plan()
@@ -110,6 +461,7 @@ class ProductoService:
             "por_plan": [{"plan": plan, "Muestras": n} for plan, n in por_plan],
         }
 
+    @_coalesced
     def consumo_credits_ia(self) -> dict:
         """KPI: Consumo de Créditos IA — totales y por plan. Fuente: shared.organizations.credits_ia."""
         total, por_plan = self._repo.consumo_credits_ia_por_plan()
@@ -117,3 +469,32 @@ class ProductoService:
             "total": total,
             "por_plan": [{"plan": plan, "Creditos": n} for plan, n in por_plan],
         }
+
+    # --- Exportación de filas (auditoría) ---
+
+    def exportar_filas(
+        self,
+        dataset: str,
+        formato: str = "ndjson",
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        after_created: datetime | None = None,
+        after_id: str | None = None,
+        limit: int | None = None,
+    ) -> Iterator[str]:
+        """Filas de sesiones, reports o files ordenadas por (created, id), en NDJSON o CSV.
+
+        Valida los parámetros antes de devolver el iterador, así los errores salen antes de
+        empezar la respuesta. Para continuar una descarga: after_created/after_id de la
+        última fila recibida.
+        """
+        if formato not in EXPORT_FORMATS:
+            raise ValueError(f"formato no soportado: {formato}")
+        stmt = self._repo.export_stmt(dataset)
+        after = None
+        if after_created is not None and after_id is not None:
+            after = (after_created, int(after_id) if dataset == "reports" else UUID(after_id))
+        elif after_created is not None or after_id is not None:
+            raise ValueError("after_created y after_id van juntos")
+        rows = self._repo.stream_export(stmt, date_from, date_to, after=after, limit=limit)
+        return _export_chunks(list(stmt.selected_columns.keys()), rows, formato)
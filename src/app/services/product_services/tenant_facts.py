@@ -0,0 +1,97 @@
+"""
+Hechos diarios de todos los tenants en una sola tabla (shared.tenant_daily_facts).
+
+Los KPIs globales (todos los tenants) leen solo esa tabla en vez de recorrer un
+schema por tenant. Se arranca desde el lifespan (start_facts_refresh_task) y cada
+FACTS_REFRESH_SECONDS refresca todos los tenants de shared.organizations con
+schema, FACTS_REFRESH_CONCURRENCY a la vez.
+
+El refresco de cada tenant es incremental: recalcula desde su último día
+guardado menos LOOKBACK_DAYS (todo el histórico la primera vez), leyendo de la
+réplica si está disponible, y sustituye esos días en el primario en una sola
+transacción que solo toca las filas que cambian. Esa transacción coge un
+advisory lock por tenant antes de leer el último día, así dos refrescos no se
+pisan. Los lectores ven siempre los hechos anteriores o los nuevos, nunca se
+bloquean.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine, tenant_session
+from app.repositories.product_repositories.tenant_facts_repository import (
+    TenantFactsRepository,
+)
+from app.services.product_services.kpi_precompute import cargar_tenants
+
+logger = logging.getLogger(__name__)
+
+# Días ya guardados que se recalculan: actividad con fecha atrasada, borrados
+LOOKBACK_DAYS = 2
+
+_background_task: asyncio.Task | None = None
+
+
+def refrescar_tenant(tenant: str) -> int | None:
+    """Refresca los hechos de ``tenant``. Devuelve los días recalculados, o None
+    si otro refresco del mismo tenant estaba en curso.
+
+    El lock del tenant se coge antes de leer su último día guardado y se suelta
+    al hacer commit de los nuevos: dos refrescos no pueden calcular desde la misma
+    lectura.
+    """
+    with Session(engine) as db:
+        repo = TenantFactsRepository(db)
+        if not repo.bloquear(tenant):
+            return None
+        ultimo = repo.ultimo_dia(tenant)
+        desde = ultimo - timedelta(days=LOOKBACK_DAYS) if ultimo is not None else None
+        with tenant_session(tenant, read_only=True) as tenant_db:
+            dias = TenantFactsRepository(tenant_db).hechos_por_dia(tenant, desde)
+        repo.sustituir(tenant, desde, dias)
+        db.commit()
+    return len(dias)
+
+
+def refrescar_todos(concurrency: int | None = None) -> dict[str, int | str | None]:
+    """Refresca todos los tenants en paralelo. Por tenant: días recalculados, None
+    si se saltó o el error si falló (el resto sigue)."""
+    tenants = cargar_tenants()
+    resultado: dict[str, int | str | None] = {}
+    if not tenants:
+        return resultado
+    workers = max(1, min(concurrency or settings.FACTS_REFRESH_CONCURRENCY, len(tenants)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tenant-facts") as pool:
+        futures = {pool.submit(refrescar_tenant, tenant): tenant for tenant in tenants}
+        for future in as_completed(futures):
+            tenant = futures[future]
+            try:
+                resultado[tenant] = future.result()
+            except Exception as e:  # noqa: BLE001
+                logger.exception("hechos diarios de %s: refresco fallido", tenant)
+                resultado[tenant] = str(e)
+    return resultado
+
+
+async def run_loop() -> None:
+    """Bucle: refresca todos los tenants cada FACTS_REFRESH_SECONDS."""
+    while True:
+        try:
+            await asyncio.to_thread(refrescar_todos)
+        except Exception:  # noqa: BLE001
+            logger.exception("hechos diarios: refresco fallido")
+        await asyncio.sleep(settings.FACTS_REFRESH_SECONDS)
+
+
+def start_facts_refresh_task() -> None:
+    """Arranca el refresco en background. Llamar desde lifespan de la app."""
+    global _background_task
+    if settings.FACTS_REFRESH_SECONDS <= 0:
+        return
+    if _background_task is None or _background_task.done():
+        _background_task = asyncio.create_task(run_loop())
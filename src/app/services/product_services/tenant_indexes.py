@@ -0,0 +1,142 @@
+"""
+Índices de los schemas de tenant que create_all no crea en tablas ya existentes.
+
+Los KPIs de Producto filtran por rango de fechas sobre session.created,
+answer.created, file.created y report.created, y el volcado de los histogramas
+de duración lee report.completed desde su marca de agua. Los modelos declaran
+esos índices, pero create_all solo los crea al crear la tabla: en los schemas
+org_* que ya existían hay que crearlos aparte. Es un paso de despliegue; con
+TENANT_INDEXES_ON_STARTUP (desactivado por defecto) también se lanza desde el
+lifespan (start_tenant_indexes_task). Crea los que falten en cada tenant de
+shared.organizations con schema, de uno en uno, con CREATE INDEX CONCURRENTLY
+IF NOT EXISTS: no bloquea las escrituras. Un índice que quedó INVALID
+(CONCURRENTLY interrumpido) se borra y se vuelve a crear.
+
+Desde src/:
+  python -m app.services.product_services.tenant_indexes [org_... ...]
+"""
+
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import Index, Table, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.database import TENANT_SCHEMA_PATTERN, engine
+from app.models import AIReportModel, Answer, File, Session
+from app.services.product_services.kpi_precompute import cargar_tenants
+
+logger = logging.getLogger(__name__)
+
+INDEX_VALID_SQL = text(
+    """
+    SELECT i.indisvalid
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = :schema AND c.relname = :name
+    """
+)
+
+_background_task: asyncio.Task | None = None
+
+
+def _indice(table: Table, column: str) -> Index:
+    """Índice que create_all crea para ``column`` (index=True o Index del modelo)."""
+    for index in table.indexes:
+        if [c.name for c in index.columns] == [column]:
+            return index
+    raise LookupError(f"{table.name}.{column} no tiene un índice declarado")
+
+
+# Con los nombres de create_all, IF NOT EXISTS reconoce los que ya creó
+TENANT_INDEXES: list[Index] = [
+    _indice(Session.__table__, "created"),
+    _indice(Answer.__table__, "created"),
+    _indice(File.__table__, "created"),
+    _indice(AIReportModel.__table__, "created"),
+    _indice(AIReportModel.__table__, "completed"),
+]
+
+
+def crear_indices(tenant: str) -> list[str]:
+    """Crea en el schema ``tenant`` los TENANT_INDEXES que falten y devuelve sus nombres.
+
+    Se salta las tablas que el tenant no tiene. Un advisory lock por tenant evita
+    que dos instancias de la app los creen a la vez; si está cogido no hace nada.
+    """
+    if not TENANT_SCHEMA_PATTERN.fullmatch(tenant):
+        raise ValueError(f"schema de tenant no válido: {tenant}")
+    lock = {"key": f"tenant_indexes:{tenant}"}
+    creados: list[str] = []
+    # CREATE INDEX CONCURRENTLY no puede ir dentro de una transacción
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        quote = conn.dialect.identifier_preparer.quote
+        if not conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:key))"), lock).scalar():
+            return creados
+        try:
+            for index in TENANT_INDEXES:
+                table = f"{quote(tenant)}.{quote(index.table.name)}"
+                if conn.execute(text("SELECT to_regclass(:table)"), {"table": table}).scalar() is None:
+                    continue
+                valid = conn.execute(INDEX_VALID_SQL, {"schema": tenant, "name": index.name}).scalar()
+                if valid:
+                    continue
+                try:
+                    if valid is False:
+                        conn.execute(
+                            text(f"DROP INDEX CONCURRENTLY IF EXISTS {quote(tenant)}.{quote(index.name)}")
+                        )
+                    columns = ", ".join(quote(c.name) for c in index.columns)
+                    conn.execute(
+                        text(
+                            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(index.name)} "
+                            f"ON {table} ({columns})"
+                        )
+                    )
+                except SQLAlchemyError:
+                    logger.exception("índice %s de %s: creación fallida", index.name, tenant)
+                    continue
+                logger.info("índice %s creado en %s", index.name, tenant)
+                creados.append(index.name)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), lock)
+    return creados
+
+
+def crear_indices_todos(tenants: list[str] | None = None) -> dict[str, list[str] | str]:
+    """Crea los índices que falten en cada tenant (todos por defecto). Por tenant:
+    los índices creados o el error si falló (el resto sigue)."""
+    resultado: dict[str, list[str] | str] = {}
+    for tenant in cargar_tenants() if tenants is None else tenants:
+        try:
+            resultado[tenant] = crear_indices(tenant)
+        except (SQLAlchemyError, ValueError) as e:
+            logger.exception("índices de %s: fallido", tenant)
+            resultado[tenant] = str(e)
+    return resultado
+
+
+async def run_once() -> None:
+    try:
+        await asyncio.to_thread(crear_indices_todos)
+    except Exception:  # noqa: BLE001
+        logger.exception("índices de tenant: fallido")
+
+
+def start_tenant_indexes_task() -> None:
+    """Crea los índices en background. Llamar desde lifespan de la app."""
+    global _background_task
+    if not settings.TENANT_INDEXES_ON_STARTUP:
+        return
+    if _background_task is None or _background_task.done():
+        _background_task = asyncio.create_task(run_once())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for tenant, creados in crear_indices_todos(sys.argv[1:] or None).items():
+        print(f"{tenant}: {creados}")
@@ -8,12 +8,18 @@ from app.core.auth import verify_bearer_token
 from app.core.config import settings
 from app.core.database import init_global_schema
 from app.core.response_time_monitor import start_background_task
+from app.services.product_services.kpi_precompute import start_precompute_task
+from app.services.product_services.tenant_facts import start_facts_refresh_task
+from app.services.product_services.tenant_indexes import start_tenant_indexes_task
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_global_schema()
+    start_tenant_indexes_task()
     start_background_task()
+    start_precompute_task()
+    start_facts_refresh_task()
     yield
 
 
@@ -1,13 +1,36 @@
+import os
 from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import NamedTuple
 from uuid import UUID
 
 import numpy as np
-import statsmodels.api as sm
-import statsmodels.stats.multitest as smm
+import pandas as pd
 from models import AnswerBase, Attribute, CodeSample, Question, Sample, Translation
-from scipy import stats as scipy_stats
-from scipy.special import gammaincc
-from statsmodels.formula.api import ols
+from pydantic import ConfigDict, Field
+
+
+def neutral_placeholder_name(placeholder):
+    """Placeholder name for clean data built without a language.
+
+    Placeholder names only feed the numeric ``mean_value`` and ``p_value_name``,
+    and scale labels are the same number in every language, so the first
+    numeric translation is used (the first translation if none is numeric).
+    """
+    names = [
+        translation.value
+        for translation in placeholder.translations
+        if translation.key == "name"
+    ]
+    for name in names:
+        try:
+            float(name)
+        except (TypeError, ValueError):
+            continue
+        return name
+    return names[0] if names else None
 
 
 def get_translation(item, key, selected_lang):
@@ -18,6 +41,109 @@ def get_translation(item, key, selected_lang):
     return item_translation
 
 
+def translation_source(item, key, value_field, lang_field):
+    translations = [
+        translation for translation in item.translations if translation.key == key
+    ]
+    return value_field, lang_field, translations
+
+
+def translate_fields(translation_sources, selected_lang) -> dict:
+    fields = {}
+    for value_field, lang_field, translations in translation_sources:
+        translation = Translation.get_preferred_lang(translations, selected_lang)
+        fields[value_field] = translation.value
+        fields[lang_field] = translation.lang
+    return fields
+
+
+def apply_translations(node, selected_lang):
+    for name, value in translate_fields(
+        node.translation_sources, selected_lang
+    ).items():
+        setattr(node, name, value)
+
+
+TRANSLATED_CHILDREN = ("sections", "questions", "results", "samples", "placeholders")
+
+
+def attach_translation_sources(node, data: dict) -> dict:
+    data["translation_sources"] = [
+        (
+            value_field,
+            lang_field,
+            [
+                {
+                    "key": translation.key,
+                    "lang": translation.lang,
+                    "value": translation.value,
+                }
+                for translation in translations
+            ],
+        )
+        for value_field, lang_field, translations in getattr(
+            node, "translation_sources", ()
+        )
+    ]
+    for field in TRANSLATED_CHILDREN:
+        children = getattr(node, field, None) or ()
+        for child, child_data in zip(children, data.get(field) or (), strict=True):
+            attach_translation_sources(child, child_data)
+    return data
+
+
+def neutral_dump(node) -> dict:
+    """``model_dump()`` of a language-neutral aggregate plus its source translations.
+
+    Every translated node carries its translations as plain dicts under
+    ``translation_sources``, so the dump can be cached and rendered in any
+    language with ``render_translated`` without the objects it came from.
+    """
+    return attach_translation_sources(node, node.model_dump())
+
+
+def overlay_translations(data: dict, selected_lang) -> dict:
+    rendered = {
+        name: value for name, value in data.items() if name != "translation_sources"
+    }
+    rendered.update(
+        translate_fields(
+            [
+                (value_field, lang_field, [SimpleNamespace(**t) for t in translations])
+                for value_field, lang_field, translations in data.get(
+                    "translation_sources", ()
+                )
+            ],
+            selected_lang,
+        )
+    )
+    for field in TRANSLATED_CHILDREN:
+        children = rendered.get(field)
+        if isinstance(children, list):
+            rendered[field] = [
+                overlay_translations(child, selected_lang)
+                if isinstance(child, dict)
+                else child
+                for child in children
+            ]
+    return rendered
+
+
+def render_translated(node, selected_lang, neutral_data: dict | None = None) -> dict:
+    """Dump a language-neutral aggregate with ``selected_lang`` texts filled in.
+
+    Aggregates built without a language keep the source translations of every
+    question, sample, answer and placeholder, so serving another language is
+    a lookup pass over the tree instead of re-running the aggregation and the
+    stat tests. Pass ``neutral_dump(node)`` as ``neutral_data`` to dump it
+    only once for several languages; ``node`` is not needed then, so a cached
+    dump can be rendered on its own.
+    """
+    if neutral_data is None:
+        neutral_data = neutral_dump(node)
+    return overlay_translations(neutral_data, selected_lang)
+
+
 class AggregatedSession(AnswerBase):
     sections: list["AggregatedSection"]
 
@@ -46,15 +172,16 @@ class AggregatedQuestion(AnswerBase):
     triangle: bool
     discrete: bool
     required: bool
-    name: str
-    lang: str
+    name: str | None
+    lang: str | None
     stats: list["Stats"]
     results: list["AggregatedAnswer"]
     samples: list["AggregatedSample"]
+    translation_sources: list = Field(exclude=True)
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
-    def __init__(self, question, selected_lang):
+    def __init__(self, question, selected_lang=None):
         self.id = question.id
         self.type = question.type
         self.order = question.order
@@ -62,11 +189,13 @@ class AggregatedQuestion(AnswerBase):
         self.triangle = question.triangle
         self.discrete = question.discrete
         self.required = question.required
-        translation: Translation = get_translation(
-            question, key="name", selected_lang=selected_lang
-        )
-        self.name = translation.value
-        self.lang = translation.lang
+        self.name = None
+        self.lang = None
+        self.translation_sources = [
+            translation_source(question, "name", "name", "lang")
+        ]
+        if selected_lang is not None:
+            apply_translations(self, selected_lang)
         self.stats = []
         self.results = []
         self.samples = []
@@ -75,19 +204,24 @@ class AggregatedQuestion(AnswerBase):
 class AggregatedSample(AnswerBase):
     code_sample_id: int
     sample_id: int
-    code_sample_code: str
-    code_sample_lang: str
+    code_sample_code: str | None
+    code_sample_lang: str | None
     sample_name: str
     results: list["AggregatedAnswer"]
+    translation_sources: list = Field(exclude=True)
 
-    def __init__(self, code_sample, selected_lang):
+    def __init__(self, code_sample, selected_lang=None):
         self.code_sample_id = code_sample.id
         self.sample_id = code_sample.sample_id
-        translation: Translation = get_translation(
-            code_sample, key="code", selected_lang=selected_lang
-        )
-        self.code_sample_code = translation.value
-        self.code_sample_lang = translation.lang
+        self.code_sample_code = None
+        self.code_sample_lang = None
+        self.translation_sources = [
+            translation_source(
+                code_sample, "code", "code_sample_code", "code_sample_lang"
+            )
+        ]
+        if selected_lang is not None:
+            apply_translations(self, selected_lang)
         sample: Sample = code_sample.sample
         self.sample_name = sample.name
         self.results = []
@@ -100,13 +234,16 @@ class DataCleaner(ABC):
 
 
 class CleanerType1(DataCleaner):
-    def execute(self, CleanData, answers, selected_lang) -> pd.DataFrame:
+    def execute(self, CleanData, answers, selected_lang=None) -> pd.DataFrame:
         data = []
         for answer in answers:
             placeholder = answer.placeholder
-            name = get_translation(
-                placeholder, key="name", selected_lang=selected_lang
-            ).value
+            if selected_lang is None:
+                name = neutral_placeholder_name(placeholder)
+            else:
+                name = get_translation(
+                    placeholder, key="name", selected_lang=selected_lang
+                ).value
             data.append(
                 {
                     "user_id": answer.user_id,
@@ -220,13 +357,34 @@ class CleanData:
     def set_data_cleaner(self, data_cleaner):
         self.data_cleaner = data_cleaner
 
-    def execute_cleaner(self, answers, selected_lang):
+    def execute_cleaner(self, answers, selected_lang=None):
         if self.data_cleaner is None:
             raise ValueError("data_cleaner not set")
         else:
             return self.data_cleaner.execute(self, answers, selected_lang)
 
 
+class AggregationState:
+    n: int
+    n_order: int
+    n_value: int
+    sum_order: float
+    sum_value: float | None
+    users: set
+    counts: Counter
+    first: tuple | None
+
+    def __init__(self):
+        self.n = 0
+        self.n_order = 0
+        self.n_value = 0
+        self.sum_order = 0.0
+        self.sum_value = 0.0
+        self.users = set()
+        self.counts = Counter()
+        self.first = None
+
+
 class Aggregator(ABC):
     @abstractmethod
     def execute(
@@ -239,6 +397,21 @@ class Aggregator(ABC):
     ):
         pass
 
+    @abstractmethod
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        pass
+
+    @abstractmethod
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        pass
+
 
 class AggregatorType1(Aggregator):
     def execute(
@@ -266,6 +439,46 @@ class AggregatorType1(Aggregator):
             aggregated_answer.placeholders.append(aggregated_placeholder)
         pass
 
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        # Means skip NaN like Series.mean(), so they count non-null values only
+        state.n += len(clean_data)
+        state.sum_order += float(clean_data["placeholder_order"].sum())
+        state.n_order += int(clean_data["placeholder_order"].count())
+        if state.sum_value is not None:
+            try:
+                values = clean_data["placeholder_name"].astype(float)
+            except ValueError:
+                state.sum_value = None
+            else:
+                state.sum_value += float(values.sum())
+                state.n_value += int(values.count())
+        state.counts.update(clean_data["placeholder_id"].value_counts().to_dict())
+
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            aggregated_answer.mean_order = float(
+                np.float64(state.sum_order) / state.n_order
+            )
+            aggregated_answer.mean_value = (
+                None
+                if state.sum_value is None
+                else float(np.float64(state.sum_value) / state.n_value)
+            )
+        aggregated_answer.placeholders = []
+        for placeholder in attribute.placeholders:
+            aggregated_placeholder = AggregatedPlaceholder(
+                placeholder, selected_lang, "name"
+            )
+            aggregated_placeholder.set_counts(state.counts[placeholder.id], state.n)
+            aggregated_answer.placeholders.append(aggregated_placeholder)
+
 
 class AggregatorType2(Aggregator):
     def execute(
@@ -280,6 +493,23 @@ class AggregatorType2(Aggregator):
         aggregated_answer.user_id = clean_data["user_id"].iloc[0]
         pass
 
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        if state.first is None and len(clean_data):
+            state.first = (clean_data["value"].iloc[0], clean_data["user_id"].iloc[0])
+        state.n += len(clean_data)
+
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        if state.first is None:
+            raise ValueError("no answers aggregated")
+        aggregated_answer.text, aggregated_answer.user_id = state.first
+
 
 class AggregatorType3Attributes(Aggregator):
     def execute(
@@ -296,6 +526,22 @@ class AggregatorType3Attributes(Aggregator):
         aggregated_answer.percent = (len(filtered_clean_data) / n_responses) * 100
         pass
 
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        state.n += len(clean_data)
+        state.users.update(clean_data["user_id"].unique())
+        state.counts.update(clean_data["attribute_id"].value_counts().to_dict())
+
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        aggregated_answer.n = state.counts[attribute.id]
+        aggregated_answer.percent = (aggregated_answer.n / len(state.users)) * 100
+
 
 class AggregatorType3Samples(Aggregator):
     def execute(
@@ -312,6 +558,81 @@ class AggregatorType3Samples(Aggregator):
         aggregated_answer.percent = (len(filtered_clean_data) / n_responses) * 100
         pass
 
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        state.n += len(clean_data)
+        state.users.update(clean_data["user_id"].unique())
+        state.counts.update(clean_data["code_sample_id"].value_counts().to_dict())
+
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        aggregated_answer.n = state.counts[code_sample.id]
+        aggregated_answer.percent = (aggregated_answer.n / len(state.users)) * 100
+
+
+class RankSummary(NamedTuple):
+    order: dict
+    weighted_order: float
+    mean_rank: float | None
+    median_rank: float | None
+
+
+def rank_summaries(clean_data: pd.DataFrame, code_sample_ids=None) -> list[RankSummary]:
+    """Rank distribution of each code sample from one (sample, rank) bincount.
+
+    Without ``code_sample_ids`` the whole frame is summarised as one sample.
+    """
+    rank_codes, rank_values = pd.factorize(clean_data["order"])
+    if code_sample_ids is None:
+        sample_codes = np.zeros(len(rank_codes), dtype=np.intp)
+        n_samples = 1
+    else:
+        sample_codes = pd.Index(code_sample_ids).get_indexer(
+            clean_data["code_sample_id"]
+        )
+        n_samples = len(code_sample_ids)
+    valid = (rank_codes >= 0) & (sample_codes >= 0)
+    n_ranks = len(rank_values)
+    counts = np.bincount(
+        sample_codes[valid] * n_ranks + rank_codes[valid],
+        minlength=n_samples * n_ranks,
+    ).reshape(n_samples, n_ranks)
+    return summarise_rank_counts(rank_values.tolist(), counts)
+
+
+def summarise_rank_counts(keys: list, counts: np.ndarray) -> list[RankSummary]:
+    if not keys:
+        # No rank values at all: argmax below has nothing to reduce over
+        return [RankSummary({}, 0.0, None, None) for _ in range(len(counts))]
+    ranks = pd.to_numeric(pd.Series(keys, dtype=object)).to_numpy(dtype=float)
+    n = counts.sum(axis=1)
+    weighted_order = counts @ ranks
+    by_rank = np.argsort(ranks, kind="stable")
+    cumulative = counts[:, by_rank].cumsum(axis=1)
+    lower = (cumulative > ((n - 1) // 2)[:, None]).argmax(axis=1)
+    upper = (cumulative > (n // 2)[:, None]).argmax(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_rank = weighted_order / n
+    median_rank = (ranks[by_rank][lower] + ranks[by_rank][upper]) / 2
+
+    summaries = []
+    for i in range(len(counts)):
+        present = np.flatnonzero(counts[i])
+        summaries.append(
+            RankSummary(
+                order={keys[j]: int(counts[i, j]) for j in present},
+                weighted_order=float(weighted_order[i]),
+                mean_rank=finite_or_none(mean_rank[i]),
+                median_rank=float(median_rank[i]) if n[i] else None,
+            )
+        )
+    return summaries
+
 
 class AggregatorType4(Aggregator):
     def execute(
@@ -322,16 +643,43 @@ class AggregatorType4(Aggregator):
         attribute: Attribute | None = None,
         code_sample: CodeSample | None = None,
     ):
-        unique_values = clean_data["order"].unique()
-        n_selected = {value: 0 for value in unique_values}
-        for value in clean_data["order"]:
-            n_selected[value] += 1
-        weighted_order = pd.DataFrame(list(n_selected.items()), columns=["order", "n"])
-        weighted_order["order"] = pd.to_numeric(weighted_order["order"])
-        weighted_order["weighted"] = weighted_order["order"] * weighted_order["n"]
-        aggregated_answer.order = n_selected
-        aggregated_answer.weighted_order = float(weighted_order["weighted"].sum())
-        pass
+        self.set_summary(aggregated_answer, rank_summaries(clean_data)[0])
+
+    def execute_samples(
+        self,
+        aggregated_answers: list["AggregatedAnswer"],
+        clean_data: pd.DataFrame,
+        code_samples: list[CodeSample],
+    ):
+        summaries = rank_summaries(
+            clean_data, [code_sample.id for code_sample in code_samples]
+        )
+        for aggregated_answer, summary in zip(
+            aggregated_answers, summaries, strict=True
+        ):
+            self.set_summary(aggregated_answer, summary)
+
+    def update_state(self, state: AggregationState, clean_data: pd.DataFrame):
+        state.n += len(clean_data)
+        state.counts.update(clean_data["order"].value_counts(sort=False).to_dict())
+
+    def execute_state(
+        self,
+        aggregated_answer,
+        state: AggregationState,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        keys = list(state.counts)
+        counts = np.array([[state.counts[key] for key in keys]], dtype=np.intp)
+        self.set_summary(aggregated_answer, summarise_rank_counts(keys, counts)[0])
+
+    def set_summary(self, aggregated_answer, summary: RankSummary):
+        aggregated_answer.order = summary.order
+        aggregated_answer.weighted_order = summary.weighted_order
+        aggregated_answer.mean_rank = summary.mean_rank
+        aggregated_answer.median_rank = summary.median_rank
 
 
 class AggregatedAnswer(AnswerBase):
@@ -355,13 +703,17 @@ class AggregatedAnswer(AnswerBase):
     mean_value: float | None
     order: dict | None
     weighted_order: float | None
+    mean_rank: float | None
+    median_rank: float | None
     placeholders: list["AggregatedPlaceholder"]
     aggregator: Aggregator | None = Field(exclude=True)
+    translation_sources: list = Field(exclude=True)
 
     model_config = {"arbitrary_types_allowed": True}
 
     def __init__(self, question=None, aggregator=None):
         self.placeholders = []
+        self.translation_sources = []
         if aggregator:
             self.set_aggregator(aggregator)
         else:
@@ -384,6 +736,21 @@ class AggregatedAnswer(AnswerBase):
     def set_aggregator(self, aggregator):
         self.aggregator = aggregator
 
+    def set_translation_sources(self, attribute=None, code_sample=None):
+        self.translation_sources = []
+        if attribute is not None:
+            self.translation_sources.append(
+                translation_source(
+                    attribute, "name", "attribute_name", "attribute_lang"
+                )
+            )
+        if code_sample is not None:
+            self.translation_sources.append(
+                translation_source(
+                    code_sample, "code", "code_sample_code", "code_sample_lang"
+                )
+            )
+
     def execute_aggregator(
         self,
         clean_data: pd.DataFrame,
@@ -402,22 +769,50 @@ class AggregatedAnswer(AnswerBase):
 class AggregatedPlaceholder(AnswerBase):
     id: int
     order: int
-    placeholder_name: str
-    placeholder_lang: str
+    placeholder_name: str | None
+    placeholder_lang: str | None
     n: int
     percent: float
+    translation_sources: list = Field(exclude=True)
 
-    def __init__(self, placeholder, selected_lang, key, clean_data):
-        translation = get_translation(
-            placeholder, key="name", selected_lang=selected_lang
-        )
+    def __init__(self, placeholder, selected_lang, key, clean_data=None):
         self.id = placeholder.id
         self.order = placeholder.order
-        self.placeholder_name = translation.value
-        self.placeholder_lang = translation.lang
-        filtered_clean_data = clean_data[clean_data["placeholder_id"] == placeholder.id]
-        self.n = len(filtered_clean_data)
-        self.percent = (len(filtered_clean_data) / len(clean_data)) * 100
+        self.placeholder_name = None
+        self.placeholder_lang = None
+        self.translation_sources = [
+            translation_source(
+                placeholder, "name", "placeholder_name", "placeholder_lang"
+            )
+        ]
+        if selected_lang is not None:
+            apply_translations(self, selected_lang)
+        if clean_data is not None:
+            filtered_clean_data = clean_data[
+                clean_data["placeholder_id"] == placeholder.id
+            ]
+            self.set_counts(len(filtered_clean_data), len(clean_data))
+
+    def set_counts(self, n, total):
+        self.n = n
+        self.percent = (n / total) * 100
+
+
+class PairwiseComparison(AnswerBase):
+    code_sample_id_a: int
+    code_sample_id_b: int
+    n: int
+    t_statistic: float | None
+    p_value: float | None
+    p_value_adjusted: float | None
+
+    def __init__(self, code_sample_id_a, code_sample_id_b, n, t_statistic, p_value):
+        self.code_sample_id_a = int(code_sample_id_a)
+        self.code_sample_id_b = int(code_sample_id_b)
+        self.n = int(n)
+        self.t_statistic = finite_or_none(t_statistic)
+        self.p_value = finite_or_none(p_value)
+        self.p_value_adjusted = None
 
 
 class StatTest(ABC):
@@ -426,69 +821,210 @@ class StatTest(ABC):
         pass
 
 
+def finite_or_none(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def subject_sample_matrix(values, samples, subjects):
+    values = np.asarray(values, dtype=float)
+    sample_codes, sample_uniques = pd.factorize(np.asarray(samples), sort=True)
+    subject_codes, subject_uniques = pd.factorize(np.asarray(subjects))
+    shape = (len(subject_uniques), len(sample_uniques))
+    valid = ~np.isnan(values)
+    cells = np.ravel_multi_index((subject_codes[valid], sample_codes[valid]), shape)
+    sums = np.bincount(cells, weights=values[valid], minlength=shape[0] * shape[1])
+    counts = np.bincount(cells, minlength=shape[0] * shape[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        matrix = (sums / counts).reshape(shape)
+    return matrix, sample_uniques
+
+
+def pairwise_paired_ttests(matrix):
+    """Paired t-tests between every pair of columns of a subject x sample matrix.
+
+    Each pair uses the subjects that answered both samples (NaN marks a
+    missing cell), which matches ``scipy.stats.ttest_rel`` on those subjects.
+    """
+    from scipy.special import stdtr
+
+    first, second = np.triu_indices(matrix.shape[1], k=1)
+    differences = matrix[:, first] - matrix[:, second]
+    paired = ~np.isnan(differences)
+    differences = np.where(paired, differences, 0.0)
+    n = paired.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = differences.sum(axis=0) / n
+        variance = (((differences - mean) * paired) ** 2).sum(axis=0) / (n - 1)
+        t_statistic = mean / np.sqrt(variance / n)
+        p_value = 2 * stdtr(n - 1, -np.abs(t_statistic))
+    return first, second, n, t_statistic, p_value
+
+
+def multiple_test_correction(p_values, correction):
+    """Holm and BH adjusted p-values; other methods go to statsmodels."""
+    m = len(p_values)
+    order = np.argsort(p_values)
+    ranked = p_values[order]
+    if correction == "holm":
+        ranked = np.maximum.accumulate(np.minimum(1, (m - np.arange(m)) * ranked))
+    elif correction == "fdr_bh":
+        ranked = np.minimum.accumulate((m / np.arange(1, m + 1) * ranked)[::-1])[::-1]
+        ranked = np.minimum(1, ranked)
+    else:
+        from statsmodels.stats.multitest import multipletests
+
+        return multipletests(p_values, method=correction)[1]
+    adjusted = np.empty(m)
+    adjusted[order] = ranked
+    return adjusted
+
+
+def adjust_p_values(p_values, correction="holm"):
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    tested = ~np.isnan(p_values)
+    if tested.any():
+        adjusted[tested] = multiple_test_correction(p_values[tested], correction)
+    return adjusted
+
+
+def pairwise_comparisons(clean_data, column, correction="holm"):
+    matrix, code_sample_ids = subject_sample_matrix(
+        pd.to_numeric(clean_data[column], errors="coerce"),
+        clean_data["code_sample_id"],
+        clean_data["user_id"],
+    )
+    first, second, n, t_statistic, p_value = pairwise_paired_ttests(matrix)
+    comparisons = [
+        PairwiseComparison(
+            code_sample_ids[first[i]],
+            code_sample_ids[second[i]],
+            n[i],
+            t_statistic[i],
+            p_value[i],
+        )
+        for i in range(len(first))
+    ]
+    if correction is not None:
+        adjust_comparisons(comparisons, correction)
+    return comparisons
+
+
+def adjust_comparisons(comparisons, correction="holm"):
+    adjusted = adjust_p_values(
+        [np.nan if c.p_value is None else c.p_value for c in comparisons], correction
+    )
+    for comparison, p_value_adjusted in zip(comparisons, adjusted, strict=True):
+        comparison.p_value_adjusted = finite_or_none(p_value_adjusted)
+
+
+def adjust_session_comparisons(stats_list, correction="holm"):
+    """Re-adjust the pairwise p-values of a whole session as one family."""
+    adjust_comparisons([c for stats in stats_list for c in stats.pairwise], correction)
+    adjust_comparisons(
+        [c for stats in stats_list for c in stats.pairwise_name], correction
+    )
+
+
+def set_pairwise_comparisons(stats, clean_data):
+    try:
+        stats.pairwise = pairwise_comparisons(
+            clean_data, "placeholder_order", stats.correction
+        )
+    except (ValueError, FloatingPointError):
+        stats.pairwise = []
+    try:
+        stats.pairwise_name = pairwise_comparisons(
+            clean_data, "placeholder_name", stats.correction
+        )
+    except (ValueError, FloatingPointError):
+        stats.pairwise_name = []
+
+
+def two_way_anova_p_value(y, samples, subjects):
+    """Type II p-value of the sample effect in ``y ~ sample + subject``.
+
+    Subject effects are absorbed by demeaning within subject, so only a
+    samples x samples system is solved; unbalanced and missing cells are
+    handled and NaN responses are dropped like the formula interface does.
+    """
+    from scipy.special import fdtrc
+
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    y = y[valid]
+    sample_codes, sample_uniques = pd.factorize(np.asarray(samples)[valid])
+    subject_codes, subject_uniques = pd.factorize(np.asarray(subjects)[valid])
+    n_samples = len(sample_uniques)
+    n_subjects = len(subject_uniques)
+
+    subject_n = np.bincount(subject_codes, minlength=n_subjects)
+    subject_mean = (
+        np.bincount(subject_codes, weights=y, minlength=n_subjects) / subject_n
+    )
+    residual_subjects = y - subject_mean[subject_codes]
+    ss_subjects_only = float(residual_subjects @ residual_subjects)
+
+    cells = np.zeros((n_subjects, n_samples))
+    np.add.at(cells, (subject_codes, sample_codes), 1.0)
+    gram = np.diag(cells.sum(axis=0)) - cells.T @ (cells / subject_n[:, None])
+    cross = (
+        np.bincount(sample_codes, weights=y, minlength=n_samples)
+        - cells.T @ subject_mean
+    )
+
+    ss_samples = float(cross @ np.linalg.pinv(gram) @ cross)
+    df_samples = int(np.linalg.matrix_rank(gram))
+    df_resid = len(y) - n_subjects - df_samples
+    if df_samples == 0 or df_resid <= 0:
+        raise ValueError("not enough observations for a two-way anova")
+    ss_resid = ss_subjects_only - ss_samples
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f_value = (ss_samples / df_samples) / (ss_resid / df_resid)
+    return float(fdtrc(df_samples, df_resid, f_value))
+
+
 class Anova(StatTest):
     def execute(self, stats: "Stats", clean_data: pd.DataFrame):
         stats.attribute_id = int(clean_data["attribute_id"].unique()[0])
         try:
-            model = ols(
-                "placeholder_order ~ C(code_sample_id) + C(user_id)", data=clean_data
-            ).fit()
-            anova_table = sm.stats.anova_lm(model, typ=2)
-            p_value = float(anova_table.loc["C(code_sample_id)", "PR(>F)"])
-            stats.p_value = p_value
+            stats.p_value = two_way_anova_p_value(
+                clean_data["placeholder_order"],
+                clean_data["code_sample_id"],
+                clean_data["user_id"],
+            )
         except:
             stats.p_value = None
         try:
             clean_data["placeholder_name"] = pd.to_numeric(
                 clean_data["placeholder_name"], errors="coerce"
             )
-            model = ols(
-                "placeholder_name ~ C(code_sample_id) + C(user_id)", data=clean_data
-            ).fit()
-            anova_table = sm.stats.anova_lm(model, typ=2)
-            p_value = float(anova_table.loc["C(code_sample_id)", "PR(>F)"])
-            stats.p_value_name = p_value
+            stats.p_value_name = two_way_anova_p_value(
+                clean_data["placeholder_name"],
+                clean_data["code_sample_id"],
+                clean_data["user_id"],
+            )
         except:
             stats.p_value_name = None
+        set_pairwise_comparisons(stats, clean_data)
 
 
 class TTest(StatTest):
     def execute(self, stats: "Stats", clean_data: pd.DataFrame):
-        unique_code_samples = clean_data["code_sample_id"].unique()
-        if len(unique_code_samples) < 2:
+        if clean_data["code_sample_id"].nunique() < 2:
             return
-        try:
-            p_value_order = scipy_stats.ttest_rel(
-                clean_data[clean_data["code_sample_id"] == unique_code_samples[0]][
-                    "placeholder_order"
-                ].values,
-                clean_data[clean_data["code_sample_id"] == unique_code_samples[1]][
-                    "placeholder_order"
-                ].values,
-            )
-            p_ind = float(smm.multipletests([p_value_order.pvalue], method="holm")[1])
-            stats.p_value = p_ind
-        except:
-            stats.p_value = None
-        try:
-            p_value_name = scipy_stats.ttest_rel(
-                clean_data[clean_data["code_sample_id"] == unique_code_samples[0]][
-                    "placeholder_name"
-                ].values,
-                clean_data[clean_data["code_sample_id"] == unique_code_samples[1]][
-                    "placeholder_name"
-                ].values,
-            )
-            p_ind_name = float(
-                smm.multipletests([p_value_name.pvalue], method="holm")[1]
-            )
-            stats.p_value_name = p_ind_name
-        except:
-            stats.p_value_name = None
+        set_pairwise_comparisons(stats, clean_data)
+        stats.p_value = stats.pairwise[0].p_value if stats.pairwise else None
+        stats.p_value_name = (
+            stats.pairwise_name[0].p_value if stats.pairwise_name else None
+        )
 
 
 class ChiSquare(StatTest):
     def execute(self, stats: "Stats", clean_data: pd.DataFrame):
+        from scipy.special import gammaincc
+
         question = stats.question
         if question.type == 3:
             if len(question.attributes) != 0:
@@ -511,25 +1047,91 @@ class ChiSquare(StatTest):
             stats.p_value = None
 
 
+def batched_friedman(ranks):
+    """Friedman test for every question of a (question x subject x sample) stack.
+
+    Questions with fewer subjects or samples are padded with NaN. As with
+    ``scipy.stats.friedmanchisquare`` on the complete rows, subjects missing
+    any sample of their question are dropped, values are re-ranked within each
+    subject with ties averaged and the statistic gets the tie correction.
+    Questions with fewer than three samples get NaN.
+    """
+    from scipy.special import chdtrc
+
+    ranks = np.asarray(ranks, dtype=float)
+    missing = np.isnan(ranks)
+    samples = ~missing.all(axis=1)
+    subjects = ~(missing & samples[:, None, :]).any(axis=2) & ~missing.all(axis=2)
+    cells = samples[:, None, :] & subjects[:, :, None]
+    values = np.where(cells, ranks, 0.0)
+    others = cells[:, :, None, :]
+    less = ((values[..., None, :] < values[..., :, None]) & others).sum(axis=3)
+    equal = ((values[..., None, :] == values[..., :, None]) & others).sum(axis=3)
+    rank_sums = np.where(cells, less + (equal + 1) / 2, 0.0).sum(axis=1)
+    ties = np.where(cells, equal**2 - 1, 0).sum(axis=(1, 2))
+    k = samples.sum(axis=1)
+    n = subjects.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tie_correction = 1 - ties / (k * (k**2 - 1) * n)
+        statistic = (
+            12.0 / (k * n * (k + 1)) * (rank_sums**2).sum(axis=1) - 3 * n * (k + 1)
+        ) / tie_correction
+        p_value = chdtrc(k - 1, statistic)
+    insufficient = (k < 3) | (n == 0)
+    statistic[insufficient] = np.nan
+    p_value[insufficient] = np.nan
+    return statistic, p_value
+
+
+def stack_subject_sample_matrices(matrices):
+    stack = np.full(
+        (
+            len(matrices),
+            max((matrix.shape[0] for matrix in matrices), default=0),
+            max((matrix.shape[1] for matrix in matrices), default=0),
+        ),
+        np.nan,
+    )
+    for i, matrix in enumerate(matrices):
+        stack[i, : matrix.shape[0], : matrix.shape[1]] = matrix
+    return stack
+
+
+def ranking_matrix(clean_data: pd.DataFrame):
+    matrix, _ = subject_sample_matrix(
+        pd.to_numeric(clean_data["order"], errors="coerce"),
+        clean_data["code_sample_id"],
+        clean_data["user_id"],
+    )
+    return matrix
+
+
 class Friedman(StatTest):
     def execute(self, stats: "Stats", clean_data: pd.DataFrame):
         try:
-            pivot_df = clean_data.pivot(
-                index="user_id", columns="code_sample_id", values="order"
-            )
-            pivot_df = pivot_df.dropna()
-            grupos = [pivot_df[col].values for col in pivot_df.columns]
-            p_value = float(scipy_stats.friedmanchisquare(*grupos).pvalue)
-            stats.p_value = p_value
-        except:
+            _, p_value = batched_friedman(ranking_matrix(clean_data)[None])
+            stats.p_value = finite_or_none(p_value[0])
+        except (ValueError, FloatingPointError):
             stats.p_value = None
 
 
+def execute_friedman_batch(stats_clean_data: list[tuple["Stats", pd.DataFrame]]):
+    if not stats_clean_data:
+        return
+    matrices = [ranking_matrix(clean_data) for _, clean_data in stats_clean_data]
+    _, p_values = batched_friedman(stack_subject_sample_matrices(matrices))
+    for (stats, _), p_value in zip(stats_clean_data, p_values, strict=True):
+        stats.p_value = finite_or_none(p_value)
+
+
 class Stats(AnswerBase):
     question: Question = Field(exclude=True)
     attribute_id: int | None
     p_value: float | None
     p_value_name: float | None
+    correction: str | None
+    pairwise: list["PairwiseComparison"]
+    pairwise_name: list["PairwiseComparison"]
     stat_test: StatTest | None = Field(exclude=True)
     code_samples: list["CodeSample"] | None = Field(exclude=True)
     clean_data: pd.DataFrame | None = Field(exclude=True)
@@ -544,10 +1146,14 @@ class Stats(AnswerBase):
         p_value_name=None,
         stat_test=None,
         code_samples=None,
+        correction="holm",
     ):
         self.attribute_id = attribute_id
         self.question = question
         self.code_samples = code_samples
+        self.correction = correction
+        self.pairwise = []
+        self.pairwise_name = []
         if stat_test:
             self.set_stat_test(stat_test)
         else:
@@ -574,3 +1180,153 @@ class Stats(AnswerBase):
     def execute_test(self, clean_data: pd.DataFrame):
         if self.stat_test is not None:
             return self.stat_test.execute(self, clean_data)
+
+
+class IncrementalAggregation:
+    """Running aggregate of one answer group that is fed only new answers.
+
+    ``update`` folds the clean data of answers received since the last call
+    into the aggregator's running counters and sums, so a refresh during a
+    live session costs only the new rows. Stat tests still need the full
+    clean data and only run when ``execute_test`` is called after new answers
+    arrived.
+    """
+
+    aggregator: Aggregator
+    state: AggregationState
+    frames: list[pd.DataFrame]
+    tested_n: int
+
+    def __init__(self, aggregator: Aggregator):
+        self.aggregator = aggregator
+        self.state = AggregationState()
+        self.frames = []
+        self.tested_n = 0
+
+    def update(self, new_clean_data: pd.DataFrame):
+        if len(new_clean_data) == 0:
+            return
+        self.aggregator.update_state(self.state, new_clean_data)
+        self.frames.append(new_clean_data)
+
+    def execute(
+        self,
+        aggregated_answer: AggregatedAnswer,
+        selected_lang: str,
+        attribute: Attribute | None = None,
+        code_sample: CodeSample | None = None,
+    ):
+        return self.aggregator.execute_state(
+            aggregated_answer, self.state, selected_lang, attribute, code_sample
+        )
+
+    def clean_data(self) -> pd.DataFrame:
+        if len(self.frames) > 1:
+            self.frames = [pd.concat(self.frames, ignore_index=True)]
+        return self.frames[0]
+
+    def execute_test(self, stats: Stats):
+        if not self.frames or self.tested_n == self.state.n:
+            return stats
+        stats.execute_test(self.clean_data().copy())
+        self.tested_n = self.state.n
+        return stats
+
+
+MIN_PARALLEL_STATS_JOBS = 32
+
+
+class StatsQuestion(NamedTuple):
+    type: int
+    attributes: tuple[int, ...]
+
+
+class StatsJob(NamedTuple):
+    stat_test: StatTest
+    question: StatsQuestion
+    attribute_id: int | None
+    correction: str | None
+    columns: dict[str, np.ndarray]
+
+
+def build_stats_job(stats: Stats, clean_data: pd.DataFrame) -> StatsJob:
+    question = StatsQuestion(
+        type=stats.question.type,
+        attributes=tuple(attribute.id for attribute in stats.question.attributes),
+    )
+    columns = {}
+    for column in clean_data.columns:
+        if column == "user_id":
+            columns[column] = pd.factorize(clean_data[column])[0]
+        else:
+            columns[column] = clean_data[column].to_numpy()
+    return StatsJob(
+        stats.stat_test, question, stats.attribute_id, stats.correction, columns
+    )
+
+
+def run_stats_job(job: StatsJob) -> tuple:
+    stats = Stats(
+        job.question,
+        attribute_id=job.attribute_id,
+        stat_test=job.stat_test,
+        code_samples=[],
+        correction=job.correction,
+    )
+    stats.p_value = None
+    stats.p_value_name = None
+    stats.execute_test(pd.DataFrame(job.columns))
+    return (
+        stats.attribute_id,
+        stats.p_value,
+        stats.p_value_name,
+        stats.pairwise,
+        stats.pairwise_name,
+    )
+
+
+def execute_stats_tests(
+    stats_clean_data: list[tuple[Stats, pd.DataFrame]],
+    max_workers: int | None = None,
+    min_parallel_jobs: int = MIN_PARALLEL_STATS_JOBS,
+) -> list[Stats]:
+    """Run every stat test, dispatching to a process pool for large sessions.
+
+    Each job ships only the numeric columns of its clean data plus the
+    question type, so no ORM object crosses the process boundary. Results are
+    written back to the given ``Stats`` in input order. Sessions with fewer
+    than ``min_parallel_jobs`` tests run sequentially, where pool start-up
+    would cost more than the tests themselves. Friedman tests are always
+    computed in-process as one batch.
+    """
+    friedman = [
+        (stats, clean_data)
+        for stats, clean_data in stats_clean_data
+        if isinstance(stats.stat_test, Friedman)
+    ]
+    execute_friedman_batch(friedman)
+    pending = [
+        (stats, clean_data)
+        for stats, clean_data in stats_clean_data
+        if stats.stat_test is not None and not isinstance(stats.stat_test, Friedman)
+    ]
+
+    if len(pending) < min_parallel_jobs or max_workers == 1:
+        for stats, clean_data in pending:
+            stats.execute_test(clean_data)
+        return [stats for stats, _ in stats_clean_data]
+
+    jobs = [build_stats_job(stats, clean_data) for stats, clean_data in pending]
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = iter(list(executor.map(run_stats_job, jobs, chunksize=chunksize)))
+    for stats, _ in pending:
+        (
+            stats.attribute_id,
+            stats.p_value,
+            stats.p_value_name,
+            stats.pairwise,
+            stats.pairwise_name,
+        ) = next(results)
+    return [stats for stats, _ in stats_clean_data]
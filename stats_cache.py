@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+from collections.abc import Callable, Hashable
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from stats import AggregatedQuestion, neutral_dump, render_translated
+
+STATS_CACHE_DIR = os.getenv(
+    "STATS_CACHE_DIR",
+    os.path.join(
+        os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "stats_cache",
+    ),
+)
+STATS_CACHE_MAX_BYTES = int(os.getenv("STATS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class Watermark(NamedTuple):
+    last_answer: datetime | None
+    n_answers: int
+
+
+def private_directory(directory: str | os.PathLike) -> Path:
+    """Create ``directory`` readable only by its owner, or check an existing one.
+
+    Cache entries are unpickled, so a directory that another user owns or can
+    write to is refused instead of being used.
+    """
+    path = Path(directory)
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = path.lstat()
+    if not stat.S_ISDIR(info.st_mode):
+        raise PermissionError(f"stats cache path is not a directory: {path}")
+    if hasattr(os, "getuid") and (
+        info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+    ):
+        raise PermissionError(
+            f"stats cache directory must be owned by this user with mode 0700: {path}"
+        )
+    return path
+
+
+class AggregatedSessionCache:
+    """Disk cache of aggregated questions keyed by session, question and watermark.
+
+    The watermark of a question is the creation time of its latest answer and
+    its answer count, typically read with one ``GROUP BY question_id`` query.
+    A question is recomputed only when its watermark moved; every other
+    question of the session is read back from disk. Entries hold the
+    language-neutral ``neutral_dump()`` of the question, not the objects and
+    the ORM rows they reference, so one entry serves every language: the
+    texts are filled in by ``render_translated`` when the entry is read.
+    Entries are evicted least recently used first once the directory grows
+    past ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike = STATS_CACHE_DIR,
+        max_bytes: int = STATS_CACHE_MAX_BYTES,
+    ):
+        self.directory = private_directory(directory)
+        self.max_bytes = max_bytes
+        self.size = sum(path.stat().st_size for path in self.directory.glob("*.pkl"))
+
+    def path(self, session_id: Hashable, question_id: Hashable):
+        key = f"{session_id}:{question_id}".encode()
+        return self.directory / f"{hashlib.sha1(key).hexdigest()}.pkl"
+
+    def get(
+        self,
+        session_id: Hashable,
+        question_id: Hashable,
+        watermark: Watermark,
+    ) -> dict | None:
+        path = self.path(session_id, question_id)
+        try:
+            with path.open("rb") as file:
+                cached_watermark, data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if cached_watermark != tuple(watermark):
+            return None
+        os.utime(path)
+        return data
+
+    def set(
+        self,
+        session_id: Hashable,
+        question_id: Hashable,
+        watermark: Watermark,
+        data: dict,
+    ):
+        path = self.path(session_id, question_id)
+        payload = pickle.dumps((tuple(watermark), data), pickle.HIGHEST_PROTOCOL)
+        previous_size = path.stat().st_size if path.exists() else 0
+        descriptor, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+        self.size += len(payload) - previous_size
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+        entries.sort()
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self.size -= size
+
+    def get_or_compute(
+        self,
+        session_id: Hashable,
+        selected_lang: str | None,
+        watermarks: dict[Hashable, Watermark],
+        compute: Callable[[Hashable], AggregatedQuestion],
+    ) -> dict[Hashable, dict]:
+        """Serialized aggregated questions, computing only those not cached.
+
+        ``compute`` should build the question without a language; the result
+        is rendered in ``selected_lang`` (left neutral when it is None).
+        """
+        aggregated_questions = {}
+        for question_id, watermark in watermarks.items():
+            data = self.get(session_id, question_id, watermark)
+            if data is None:
+                data = neutral_dump(compute(question_id))
+                self.set(session_id, question_id, watermark, data)
+            if selected_lang is not None:
+                data = render_translated(None, selected_lang, data)
+            aggregated_questions[question_id] = data
+        return aggregated_questions
@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from pathlib import Path
+
+import pandas as pd
+
+from stats import CleanData
+
+DICTIONARY_COLUMNS = (
+    "question_id",
+    "attribute_id",
+    "user_id",
+    "code_sample_id",
+    "placeholder_id",
+    "placeholder_name",
+)
+
+
+def load_pyarrow():
+    """pyarrow and pyarrow.parquet; pyarrow is the optional ``export`` extra."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "stats_export needs pyarrow: install the 'export' extra "
+            "(uv sync --extra export, or pip install 'kpis[export]')"
+        ) from e
+    return pa, pq
+
+
+def clean_tables(cleaned: Iterable[tuple[CleanData, pd.DataFrame]]) -> dict:
+    """One Arrow table per cleaner type from the cleaned frames of a session.
+
+    Every row keeps the question (and attribute, when the frame was cleaned
+    for one) it came from, and id columns are dictionary-encoded so repeated
+    users, samples and placeholders are stored once per table.
+    """
+    pa, _ = load_pyarrow()
+
+    frames: dict[str, list[pd.DataFrame]] = {}
+    for clean_data, frame in cleaned:
+        frame = frame.copy()
+        frame.insert(0, "question_id", clean_data.question.id)
+        if clean_data.attribute_id is not None and "attribute_id" not in frame:
+            frame.insert(1, "attribute_id", clean_data.attribute_id)
+        if "user_id" in frame:
+            frame["user_id"] = frame["user_id"].astype(str)
+        frames.setdefault(type(clean_data.data_cleaner).__name__, []).append(frame)
+
+    tables = {}
+    for cleaner_name, cleaner_frames in frames.items():
+        table = pa.Table.from_pandas(
+            pd.concat(cleaner_frames, ignore_index=True), preserve_index=False
+        )
+        for i, name in enumerate(table.column_names):
+            if name in DICTIONARY_COLUMNS:
+                table = table.set_column(
+                    i, name, table.column(name).dictionary_encode()
+                )
+        tables[cleaner_name] = table
+    return tables
+
+
+def export_clean_data(
+    cleaned: Iterable[tuple[CleanData, pd.DataFrame]],
+    directory: str | Path,
+    format: str = "arrow",
+) -> list[Path]:
+    """Write the clean tables of a session as ``<cleaner>.arrow`` or ``.parquet``.
+
+    Arrow IPC files are written uncompressed so ``read_clean_data`` can
+    memory-map them; Parquet is smaller and meant for archiving or tools that
+    do not read IPC.
+    """
+    pa, pq = load_pyarrow()
+
+    if format not in ("arrow", "parquet"):
+        raise ValueError(f"unknown export format: {format}")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for cleaner_name, table in clean_tables(cleaned).items():
+        path = directory / f"{cleaner_name}.{format}"
+        if format == "parquet":
+            pq.write_table(table, path)
+        else:
+            with pa.OSFile(str(path), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        paths.append(path)
+    return paths
+
+
+def read_clean_data(directory: str | Path) -> dict:
+    """Tables exported by ``export_clean_data``, memory-mapped when possible."""
+    pa, pq = load_pyarrow()
+
+    tables = {}
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix == ".arrow":
+            with pa.memory_map(str(path)) as source:
+                tables[path.stem] = pa.ipc.open_file(source).read_all()
+        elif path.suffix == ".parquet":
+            tables[path.stem] = pq.read_table(path, memory_map=True)
+    return tables
@@ -0,0 +1,142 @@
+import json
+import math
+from collections.abc import Iterator
+from datetime import date, datetime
+from functools import cache
+from typing import get_origin
+from uuid import UUID
+
+import numpy as np
+from models import AnswerBase
+
+from stats import AggregatedSession, translate_fields
+
+
+@cache
+def serialized_fields(model: type) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    names = tuple(
+        name for name, field in model.model_fields.items() if not field.exclude
+    )
+    nested = tuple(
+        name
+        for name in names
+        if get_origin(model.model_fields[name].annotation) is list
+        or (
+            isinstance(model.model_fields[name].annotation, type)
+            and issubclass(model.model_fields[name].annotation, AnswerBase)
+        )
+    )
+    return names, nested
+
+
+def node_to_dict(node, selected_lang=None, skip=()) -> dict:
+    """Plain-dict view of an aggregate without pydantic validation or dumping.
+
+    Excluded fields are left out as in ``model_dump``; with ``selected_lang``
+    the translations of language-neutral nodes are filled in on the way.
+    """
+    names, nested = serialized_fields(type(node))
+    values = node.__dict__
+    data = {name: values[name] for name in names if name in values and name not in skip}
+    for name in nested:
+        value = data.get(name)
+        if isinstance(value, list):
+            data[name] = [
+                node_to_dict(item, selected_lang)
+                if isinstance(item, AnswerBase)
+                else item
+                for item in value
+            ]
+        elif isinstance(value, AnswerBase):
+            data[name] = node_to_dict(value, selected_lang)
+    if selected_lang is not None:
+        data.update(
+            translate_fields(getattr(node, "translation_sources", ()), selected_lang)
+        )
+    return data
+
+
+@cache
+def orjson_module():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def json_default(value):
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def plain(value):
+    """Numpy values, non-string keys and NaN made plain for stdlib json, as orjson
+    writes them with OPT_SERIALIZE_NUMPY and OPT_NON_STR_KEYS."""
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, dict):
+        return {plain_key(key): plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def plain_key(key):
+    key = plain(key)
+    if key is None or isinstance(key, (str, int, float, bool)):
+        return key
+    return json_default(key)
+
+
+def dumps(data) -> bytes:
+    """Compact JSON with orjson when it is installed, else with stdlib json."""
+    orjson = orjson_module()
+    if orjson is None:
+        return json.dumps(
+            plain(data), default=json_default, separators=(",", ":")
+        ).encode()
+    return orjson.dumps(
+        data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+def serialize_session(
+    aggregated_session: AggregatedSession, selected_lang=None
+) -> bytes:
+    return dumps(node_to_dict(aggregated_session, selected_lang))
+
+
+def open_object(data: dict, field: str) -> bytes:
+    head = dumps(data)[:-1]
+    return head + (b"," if data else b"") + dumps(field) + b":["
+
+
+def iter_session_json(
+    aggregated_session: AggregatedSession, selected_lang=None
+) -> Iterator[bytes]:
+    """Serialize a session as JSON chunks, one aggregated question at a time.
+
+    Only one question is held as a dict at once, so the payload can be sent
+    with a streaming response without building the whole document in memory.
+    """
+    yield open_object(
+        node_to_dict(aggregated_session, selected_lang, skip=("sections",)),
+        "sections",
+    )
+    for i, section in enumerate(aggregated_session.sections):
+        section_head = open_object(
+            node_to_dict(section, selected_lang, skip=("questions",)), "questions"
+        )
+        yield (b"," if i else b"") + section_head
+        for j, question in enumerate(section.questions):
+            yield (b"," if j else b"") + dumps(node_to_dict(question, selected_lang))
+        yield b"]}"
+    yield b"]}"
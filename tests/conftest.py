@@ -0,0 +1,15 @@
+"""
+Shared test setup.
+
+stats.py imports its base classes from ``models``, which belongs to the app that
+embeds the stats modules and is not part of this repo. When it cannot be
+imported, the stand-in in tests/stubs is put on sys.path so the stats modules
+can be tested on their own.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+if importlib.util.find_spec("models") is None:
+    sys.path.insert(0, str(Path(__file__).parent / "stubs"))
@@ -0,0 +1,89 @@
+import sys
+
+import pytest
+
+if sys.version_info < (3, 12):  # noqa: UP036 (stats tests also run on older Pythons)
+    pytest.skip("the app needs Python 3.12", allow_module_level=True)
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+from app.models.file import File
+from app.models.organization import Organization
+from app.models.report import AIReportModel
+from app.repositories.product_repositories.producto_repository import (
+    ProductoRepository,
+)
+
+
+class RowsSession:
+    """Returns ``rows`` for the query and keeps its SQL."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = None
+
+    def execute(self, stmt):
+        self.sql = " ".join(str(stmt.compile(dialect=postgresql.dialect())).split())
+        rows = self.rows
+
+        class Result:
+            def all(self):
+                return rows
+
+        return Result()
+
+
+def test_one_dimension_separates_a_null_value_from_the_total():
+    db = RowsSession(
+        [
+            # (GROUPING(file_type), file_type, medida)
+            (0, "pdf", 2),
+            (0, None, 3),
+            (1, None, 5),
+        ]
+    )
+
+    total, (por_tipo,) = ProductoRepository(db).total_y_desgloses(
+        func.count(File.id), [File.file_type]
+    )
+
+    assert "GROUP BY GROUPING SETS((file.file_type), ())" in db.sql
+    assert total == 5
+    assert por_tipo == [(None, 3), ("pdf", 2)]
+
+
+def test_two_dimensions_decode_each_grouping_set():
+    db = RowsSession(
+        [
+            # (GROUPING(ai_engine, language), ai_engine, language, medida)
+            (0b01, "JAR", None, 4),
+            (0b01, None, None, 1),
+            (0b01, "Ranking", None, 6),
+            (0b10, None, "es", 7),
+            (0b10, None, None, 4),
+            (0b11, None, None, 11),
+        ]
+    )
+
+    total, (por_engine, por_idioma) = ProductoRepository(db).total_y_desgloses(
+        func.count(AIReportModel.id), [AIReportModel.ai_engine, AIReportModel.language]
+    )
+
+    assert "grouping(report.ai_engine, report.language) AS grupo" in db.sql.replace(
+        f"{AIReportModel.__table__.schema}.", ""
+    )
+    assert total == 11
+    assert por_engine == [("Ranking", 6), ("JAR", 4), (None, 1)]
+    assert por_idioma == [("es", 7), (None, 4)]
+
+
+def test_empty_sum_counts_as_zero():
+    db = RowsSession([(0, "free", None), (1, None, None)])
+
+    total, (por_plan,) = ProductoRepository(db).total_y_desgloses(
+        func.sum(Organization.credits), [Organization.license_type]
+    )
+
+    assert total == 0
+    assert por_plan == [("free", 0)]
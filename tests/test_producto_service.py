@@ -0,0 +1,105 @@
+import sys
+from datetime import UTC, datetime
+
+import pytest
+
+if sys.version_info < (3, 12):  # noqa: UP036 (stats tests also run on older Pythons)
+    pytest.skip("the app needs Python 3.12", allow_module_level=True)
+
+from app.core import single_flight
+from app.core.config import settings
+from app.models.kpi_result import KpiResult
+from app.services.product_services import producto_service
+
+FROM = datetime(2026, 1, 1)
+TO = datetime(2026, 2, 1)
+
+
+class FakeRepo:
+    def total_sesiones_y_usuarios_activos(self, date_from, date_to):
+        return 10, 4
+
+
+@pytest.fixture
+def coalesced_keys(monkeypatch):
+    keys = []
+
+    def do(key, fn, retry=True):
+        keys.append(key)
+        return fn()
+
+    monkeypatch.setattr(single_flight, "do", do)
+    return keys
+
+
+class FakeResults:
+    def __init__(self, result=None):
+        self.result = result
+        self.gets = []
+
+    def get(self, tenant, kpi):
+        self.gets.append((tenant, kpi))
+        return self.result
+
+
+def service(tenant):
+    return producto_service.ProductoService(None, repo=FakeRepo(), tenant=tenant)
+
+
+def test_coalesced_key_binds_positional_keyword_and_default_arguments(coalesced_keys):
+    positional = service("org_a").frecuencia_uso(FROM, TO)
+    keyword = service("org_a").frecuencia_uso(date_to=TO, date_from=FROM)
+
+    assert positional == keyword
+    expected = (
+        "org_a",
+        "frecuencia_uso",
+        (("date_from", FROM), ("date_to", TO), ("granularity", None)),
+    )
+    assert coalesced_keys == [expected, expected]
+
+
+def test_coalesced_key_separates_tenants_and_parameters(coalesced_keys):
+    service("org_a").frecuencia_uso(FROM, TO)
+    service("org_b").frecuencia_uso(FROM, TO)
+    service("org_a").frecuencia_uso(FROM, None)
+
+    assert len(set(coalesced_keys)) == 3
+
+
+def test_without_tenant_calls_are_not_coalesced(coalesced_keys):
+    service(None).frecuencia_uso(FROM, TO)
+
+    assert coalesced_keys == []
+
+
+def test_kpi_results_are_not_read_when_the_kpi_is_not_precomputed(monkeypatch):
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVALS", "")
+    kpis = service("org_a")
+    kpis._results = FakeResults()
+
+    data, _ = kpis.calcular_kpi_o_precalculado("frecuencia-uso")
+
+    assert kpis._results.gets == []
+    assert data == producto_service._frecuencia(10, 4)
+
+
+def test_precomputed_kpi_is_served_from_kpi_results(monkeypatch):
+    monkeypatch.setattr(settings, "PRECOMPUTE_INTERVALS", "frecuencia-uso=60")
+    computed_at = datetime.now(UTC)
+    kpis = service("org_a")
+    kpis._results = FakeResults(
+        KpiResult(
+            tenant="org_a",
+            kpi="frecuencia-uso",
+            data={"frecuencia": 1},
+            computed_at=computed_at,
+        )
+    )
+
+    assert kpis.calcular_kpi_o_precalculado("frecuencia-uso") == (
+        {"frecuencia": 1},
+        computed_at,
+    )
+    assert kpis._results.gets == [("org_a", "frecuencia-uso")]
@@ -0,0 +1,169 @@
+import math
+import sys
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+if sys.version_info < (3, 12):  # noqa: UP036 (stats tests also run on older Pythons)
+    pytest.skip("the app needs Python 3.12", allow_module_level=True)
+
+from sqlalchemy import Float, create_engine, event, literal, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import OperationalError
+
+from app.repositories.product_repositories import (
+    report_histogram_repository as histogram,
+)
+from app.services.product_services.producto_service import _percentiles
+
+BUCKETS = range(-40, 80)
+
+
+@pytest.fixture(scope="module")
+def bucket_of():
+    """Evaluates _bucket_of in SQLite, which has the same float ln() as Postgres."""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def add_greatest(dbapi_connection, _):
+        dbapi_connection.create_function("greatest", 2, max)
+
+    with engine.connect() as conn:
+        try:
+            conn.exec_driver_sql("SELECT ln(2.0), floor(2.5)")
+        except OperationalError:
+            pytest.skip("SQLite without math functions")
+
+        def evaluate(seconds: float) -> int:
+            stmt = select(histogram._bucket_of(literal(seconds, Float)))
+            return conn.execute(stmt).scalar_one()
+
+        yield evaluate
+
+
+def test_bucket_bounds_are_contiguous_and_hold_their_midpoint():
+    for bucket in BUCKETS:
+        lower, upper = histogram.bucket_bounds(bucket)
+        assert histogram.bucket_bounds(bucket + 1)[0] == upper
+        assert lower < histogram.bucket_seconds(bucket) < upper
+        assert upper / lower == pytest.approx(2 ** (1 / histogram.BUCKETS_PER_OCTAVE))
+    assert histogram.bucket_bounds(0) == (1, 2 ** (1 / histogram.BUCKETS_PER_OCTAVE))
+
+
+def test_bucket_of_puts_each_value_in_the_bucket_whose_bounds_hold_it(bucket_of):
+    for bucket in BUCKETS:
+        _, upper = histogram.bucket_bounds(bucket)
+        assert bucket_of(histogram.bucket_seconds(bucket)) == bucket
+        assert bucket_of(upper * (1 - 1e-6)) == bucket
+
+
+@pytest.mark.parametrize("seconds", [1, 2, 4, 8, 64, 128, 2**12, 2**14, 2**15])
+def test_bucket_of_keeps_exact_boundaries_in_the_upper_bucket(bucket_of, seconds):
+    bucket = round(math.log2(seconds) * histogram.BUCKETS_PER_OCTAVE)
+    assert histogram.bucket_bounds(bucket)[0] == seconds
+    assert bucket_of(seconds) == bucket
+
+
+def test_bucket_of_clamps_zero_and_negative_durations(bucket_of):
+    minimum = bucket_of(histogram.MIN_DURATION_SECONDS)
+    assert bucket_of(0) == minimum
+    assert bucket_of(-5) == minimum
+
+
+def test_percentiles_without_samples():
+    assert _percentiles([]) == {"p50": None, "p90": None, "p99": None}
+    assert _percentiles([(3, 0)]) == {"p50": None, "p90": None, "p99": None}
+
+
+def test_percentiles_of_one_sample():
+    seconds = round(histogram.bucket_seconds(12), 2)
+    assert _percentiles([(12, 1)]) == {"p50": seconds, "p90": seconds, "p99": seconds}
+
+
+def test_percentiles_take_the_bucket_where_the_rank_is_reached():
+    # 100 samples: rank 90 is the last one of bucket 0, rank 99 the last of bucket 4
+    buckets = [(0, 90), (4, 9), (8, 1)]
+
+    assert _percentiles(buckets) == {
+        "p50": round(histogram.bucket_seconds(0), 2),
+        "p90": round(histogram.bucket_seconds(0), 2),
+        "p99": round(histogram.bucket_seconds(4), 2),
+    }
+
+
+def test_percentiles_of_two_samples():
+    assert _percentiles([(0, 1), (8, 1)]) == {
+        "p50": round(histogram.bucket_seconds(0), 2),
+        "p90": round(histogram.bucket_seconds(8), 2),
+        "p99": round(histogram.bucket_seconds(8), 2),
+    }
+
+
+class RecordingSession:
+    """Answers actualizar's reads in order and keeps every statement it executes."""
+
+    def __init__(self, desde: datetime, hasta: datetime, ya_contados: int):
+        self.scalars = [desde, hasta, ya_contados]
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect()))
+        session = self
+
+        class Result:
+            rowcount = 3
+
+            def scalar_one(self):
+                return session.scalars.pop(0)
+
+        return Result()
+
+
+DESDE = datetime(2026, 3, 1, 12, tzinfo=UTC)
+HASTA = DESDE + timedelta(minutes=30)
+
+
+def sql(compiled) -> str:
+    return " ".join(str(compiled).split())
+
+
+def completed_range(compiled) -> tuple[datetime, datetime]:
+    return compiled.params["completed_1"], compiled.params["completed_2"]
+
+
+def run_actualizar(desde=DESDE, ya_contados=1) -> list:
+    db = RecordingSession(desde, HASTA, ya_contados)
+    assert histogram.ReportHistogramRepository(db).actualizar("org_a") == 3
+    return db.statements
+
+
+def test_actualizar_rescans_below_the_watermark_and_skips_counted_ids():
+    statements = run_actualizar()
+
+    assert len(statements) == 7
+    volcado = statements[4]
+    assert sql(volcado).startswith(
+        "WITH contados AS (INSERT INTO shared.report_histogram_counted"
+    )
+    assert "ON CONFLICT (tenant, report_id) DO NOTHING RETURNING" in sql(volcado)
+    assert completed_range(volcado) == (DESDE - histogram.RESCAN_WINDOW, HASTA)
+    assert "count = (shared.report_duration_histogram.count + excluded.count)" in sql(
+        volcado
+    )
+    assert statements[-1].params["completed_until"] == HASTA
+
+
+def test_first_rescan_marks_what_the_watermark_already_counted():
+    statements = run_actualizar(ya_contados=0)
+
+    assert len(statements) == 8
+    marca = statements[4]
+    assert sql(marca).startswith("INSERT INTO shared.report_histogram_counted")
+    assert completed_range(marca) == (DESDE - histogram.RESCAN_WINDOW, DESDE)
+    assert completed_range(statements[5]) == (DESDE - histogram.RESCAN_WINDOW, HASTA)
+
+
+def test_first_dump_of_a_tenant_has_nothing_to_mark():
+    statements = run_actualizar(desde=histogram.EPOCH, ya_contados=0)
+
+    assert len(statements) == 7
@@ -0,0 +1,136 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+if sys.version_info < (3, 12):  # noqa: UP036 (stats tests also run on older Pythons)
+    pytest.skip("the app needs Python 3.12", allow_module_level=True)
+
+from app.core import single_flight
+
+N_CALLS = 4
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    single_flight.reset()
+    yield
+    single_flight.reset()
+
+
+def wait_for_requests(n: int) -> None:
+    """Until ``n`` calls are in do(): the leader runs fn, the rest wait on it."""
+    deadline = time.monotonic() + 5
+    while single_flight.get_state()["requests"] < n:
+        assert time.monotonic() < deadline, "calls did not reach single_flight.do"
+        time.sleep(0.001)
+
+
+def run_concurrently(key, fn, release: threading.Event, n: int = N_CALLS) -> list:
+    """``n`` concurrent do(key, fn) with fn blocked until all of them are in."""
+    with ThreadPoolExecutor(n) as pool:
+        futures = [pool.submit(single_flight.do, key, fn) for _ in range(n)]
+        wait_for_requests(n)
+        release.set()
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result(timeout=5))
+            except RuntimeError as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return {"value": 42}
+
+    outcomes = run_concurrently("coalesce", fn, release)
+
+    assert outcomes == [{"value": 42}] * N_CALLS
+    assert len(executions) == 1
+    assert single_flight.get_state() == {
+        "requests": N_CALLS,
+        "executions": 1,
+        "coalesced": N_CALLS - 1,
+        "coalesce_ratio": (N_CALLS - 1) / N_CALLS,
+        "in_flight": 0,
+    }
+
+
+def test_followers_retry_once_after_the_leader_fails():
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        if len(executions) == 1:
+            release.wait(5)
+            raise RuntimeError("leader cancelled")
+        return "retried"
+
+    outcomes = run_concurrently("retry", fn, release)
+
+    errors = [outcome for outcome in outcomes if isinstance(outcome, RuntimeError)]
+    assert len(errors) == 1
+    assert outcomes.count("retried") == N_CALLS - 1
+    # The followers retry grouped: one more execution shared by all of them
+    assert 2 <= len(executions) <= N_CALLS
+    state = single_flight.get_state()
+    assert state["requests"] == N_CALLS
+    assert state["executions"] == len(executions)
+    assert state["in_flight"] == 0
+
+
+def test_failed_retry_raises_its_own_error():
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        if len(executions) == 1:
+            release.wait(5)
+        raise RuntimeError(f"attempt {len(executions)}")
+
+    outcomes = run_concurrently("retry-fails", fn, release)
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert sum(str(outcome) == "attempt 1" for outcome in outcomes) == 1
+
+
+def test_followers_get_a_deep_copy_of_the_result():
+    release = threading.Event()
+    result = {"series": [{"time": "01/01/2026", "value": 1}]}
+
+    def fn():
+        release.wait(5)
+        return result
+
+    outcomes = run_concurrently("copy", fn, release)
+
+    (leader,) = [outcome for outcome in outcomes if outcome is result]
+    followers = [outcome for outcome in outcomes if outcome is not result]
+    assert len(followers) == N_CALLS - 1
+    followers[0]["series"][0]["value"] = 99
+    assert leader["series"][0]["value"] == 1
+    assert all(follower["series"][0]["value"] == 1 for follower in followers[1:])
+
+
+def test_sequential_calls_are_not_coalesced():
+    assert single_flight.do("sequential", lambda: 1) == 1
+    assert single_flight.do("sequential", lambda: 2) == 2
+
+    state = single_flight.get_state()
+    assert state["executions"] == 2
+    assert state["coalesce_ratio"] == 0
+
+
+def test_state_without_requests_has_no_ratio():
+    assert single_flight.get_state()["coalesce_ratio"] is None
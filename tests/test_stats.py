@@ -0,0 +1,377 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stats
+
+
+def panel(rng, subjects=12, samples=4) -> pd.DataFrame:
+    subject, sample = np.meshgrid(
+        np.arange(subjects), np.arange(samples), indexing="ij"
+    )
+    y = rng.integers(1, 10, subject.shape) + 0.5 * sample
+    return pd.DataFrame(
+        {
+            "subject": subject.ravel(),
+            "sample": sample.ravel() + 100,
+            "y": y.ravel().astype(float),
+        }
+    )
+
+
+def anova_lm_p_value(frame: pd.DataFrame) -> float:
+    ols = pytest.importorskip("statsmodels.formula.api").ols
+    anova_lm = pytest.importorskip("statsmodels.stats.anova").anova_lm
+
+    model = ols("y ~ C(sample) + C(subject)", data=frame).fit()
+    return float(anova_lm(model, typ=2).loc["C(sample)", "PR(>F)"])
+
+
+def unbalanced(frame: pd.DataFrame, rng) -> pd.DataFrame:
+    frame = frame.drop(rng.choice(frame.index, len(frame) // 5, replace=False))
+    repeated = frame.sample(len(frame) // 4, random_state=0)
+    frame = pd.concat([frame, repeated], ignore_index=True)
+    frame.loc[rng.choice(frame.index, 3, replace=False), "y"] = np.nan
+    return frame
+
+
+def empty_cell(frame: pd.DataFrame, rng) -> pd.DataFrame:
+    return frame[~((frame["subject"] == 0) & (frame["sample"] == 101))]
+
+
+@pytest.mark.parametrize("design", [lambda frame, rng: frame, unbalanced, empty_cell])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_two_way_anova_matches_statsmodels(design, seed):
+    rng = np.random.default_rng(seed)
+    frame = design(panel(rng), rng)
+
+    p_value = stats.two_way_anova_p_value(frame["y"], frame["sample"], frame["subject"])
+
+    assert p_value == pytest.approx(anova_lm_p_value(frame.dropna()), rel=1e-8)
+
+
+def test_two_way_anova_without_residual_degrees_of_freedom():
+    frame = panel(np.random.default_rng(0), subjects=1)
+
+    with pytest.raises(ValueError):
+        stats.two_way_anova_p_value(frame["y"], frame["sample"], frame["subject"])
+
+
+def test_pairwise_paired_ttests_match_ttest_rel():
+    ttest_rel = pytest.importorskip("scipy.stats").ttest_rel
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(30, 5)) + np.arange(5) * 0.3
+    matrix[rng.random(matrix.shape) < 0.15] = np.nan
+
+    first, second, n, t_statistic, p_value = stats.pairwise_paired_ttests(matrix)
+
+    assert len(first) == 10
+    for i, (a, b) in enumerate(zip(first, second, strict=True)):
+        paired = ~np.isnan(matrix[:, a]) & ~np.isnan(matrix[:, b])
+        expected = ttest_rel(matrix[paired, a], matrix[paired, b])
+        assert n[i] == paired.sum()
+        assert t_statistic[i] == pytest.approx(expected.statistic, rel=1e-10)
+        assert p_value[i] == pytest.approx(expected.pvalue, rel=1e-8)
+
+
+def test_pairwise_comparison_without_paired_subjects_has_no_p_value():
+    clean_data = pd.DataFrame(
+        {
+            "user_id": [1, 2],
+            "code_sample_id": [100, 101],
+            "placeholder_order": [1.0, 2.0],
+        }
+    )
+
+    comparisons = stats.pairwise_comparisons(clean_data, "placeholder_order")
+
+    assert len(comparisons) == 1
+    assert comparisons[0].n == 0
+    assert comparisons[0].p_value is None
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batched_friedman_matches_friedmanchisquare(seed):
+    friedmanchisquare = pytest.importorskip("scipy.stats").friedmanchisquare
+    rng = np.random.default_rng(seed)
+    # Small integer scores tie often; padding and missing cells drop subjects
+    blocks = [
+        rng.integers(0, 4, size=(12, 4)).astype(float),
+        rng.integers(0, 3, size=(20, 3)).astype(float),
+        np.argsort(rng.random((15, 5)), axis=1).astype(float),
+    ]
+    blocks[1][rng.random(blocks[1].shape) < 0.1] = np.nan
+
+    statistic, p_value = stats.batched_friedman(
+        stats.stack_subject_sample_matrices(blocks)
+    )
+
+    for i, block in enumerate(blocks):
+        complete = block[~np.isnan(block).any(axis=1)]
+        expected = friedmanchisquare(*complete.T)
+        assert statistic[i] == pytest.approx(expected.statistic, rel=1e-10)
+        assert p_value[i] == pytest.approx(expected.pvalue, rel=1e-8)
+
+
+def test_batched_friedman_needs_three_samples():
+    statistic, p_value = stats.batched_friedman(np.ones((1, 10, 2)))
+
+    assert np.isnan(statistic[0])
+    assert np.isnan(p_value[0])
+
+
+def rank_summary_loop(clean_data: pd.DataFrame) -> tuple[dict, float]:
+    """Per-sample rank counts as computed before rank_summaries."""
+    n_selected = dict.fromkeys(clean_data["order"].unique(), 0)
+    for value in clean_data["order"]:
+        n_selected[value] += 1
+    weighted_order = pd.DataFrame(list(n_selected.items()), columns=["order", "n"])
+    weighted_order["order"] = pd.to_numeric(weighted_order["order"])
+    weighted_order["weighted"] = weighted_order["order"] * weighted_order["n"]
+    return n_selected, float(weighted_order["weighted"].sum())
+
+
+def test_rank_summaries_match_per_sample_loop():
+    rng = np.random.default_rng(0)
+    code_sample_ids = [100, 101, 102, 103]
+    clean_data = pd.DataFrame(
+        {
+            "user_id": rng.integers(0, 10, 60),
+            # Repeated ranks (ties) and ranks some samples never get
+            "code_sample_id": rng.choice(code_sample_ids[:3], 60),
+            "order": rng.choice([0, 1, 1, 2, 5], 60),
+        }
+    )
+    clean_data.loc[clean_data["code_sample_id"] == 102, "order"] = 3
+
+    summaries = stats.rank_summaries(clean_data, code_sample_ids)
+
+    for code_sample_id, summary in zip(code_sample_ids, summaries, strict=True):
+        ranks = clean_data.loc[clean_data["code_sample_id"] == code_sample_id, "order"]
+        if ranks.empty:
+            assert summary.order == {}
+            assert summary.weighted_order == 0
+            assert summary.mean_rank is None
+            assert summary.median_rank is None
+            continue
+        order, weighted_order = rank_summary_loop(ranks.to_frame())
+        assert summary.order == order
+        assert summary.weighted_order == weighted_order
+        assert summary.mean_rank == pytest.approx(ranks.mean())
+        assert summary.median_rank == pytest.approx(ranks.median())
+
+
+def test_rank_summaries_of_whole_frame_match_loop():
+    clean_data = pd.DataFrame({"order": ["2", "0", "2", "1", "2", "0"]})
+
+    (summary,) = stats.rank_summaries(clean_data)
+
+    order, weighted_order = rank_summary_loop(clean_data)
+    assert summary.order == order
+    assert summary.weighted_order == weighted_order
+    assert summary.median_rank == 1.5
+
+
+@pytest.mark.parametrize("code_sample_ids", [None, [100, 101]])
+def test_rank_summaries_without_rank_values(code_sample_ids):
+    empty = stats.RankSummary(
+        order={}, weighted_order=0.0, mean_rank=None, median_rank=None
+    )
+    clean_data = pd.DataFrame(
+        {"code_sample_id": pd.Series(dtype=int), "order": pd.Series(dtype=object)}
+    )
+    n_samples = 1 if code_sample_ids is None else len(code_sample_ids)
+
+    assert stats.rank_summaries(clean_data, code_sample_ids) == [empty] * n_samples
+    # Answers without a rank are dropped by factorize as well
+    clean_data = pd.DataFrame({"code_sample_id": [100, 101], "order": [None, None]})
+    assert stats.rank_summaries(clean_data, code_sample_ids) == [empty] * n_samples
+
+
+def placeholder_attribute(n_placeholders=5):
+    return SimpleNamespace(
+        id=1,
+        placeholders=[
+            SimpleNamespace(
+                id=10 + order,
+                order=order,
+                translations=[SimpleNamespace(key="name", lang="es", value=str(order))],
+            )
+            for order in range(1, n_placeholders + 1)
+        ],
+    )
+
+
+def type1_clean_data(rng, attribute, n=200) -> pd.DataFrame:
+    orders = rng.integers(1, len(attribute.placeholders) + 1, n)
+    names = orders.astype(str).astype(object)
+    names[rng.random(n) < 0.2] = None
+    return pd.DataFrame(
+        {
+            "user_id": rng.integers(0, 50, n),
+            "placeholder_id": orders + 10,
+            "placeholder_order": orders,
+            "placeholder_name": names,
+            "code_sample_id": 100,
+        }
+    )
+
+
+def aggregated_fields(aggregated_answer) -> dict:
+    fields = {
+        name: value
+        for name, value in vars(aggregated_answer).items()
+        if name not in ("aggregator", "translation_sources", "placeholders")
+    }
+    fields["placeholders"] = [
+        (placeholder.id, placeholder.n, placeholder.percent)
+        for placeholder in aggregated_answer.placeholders
+    ]
+    return fields
+
+
+def aggregate_full_and_incremental(question_type, clean_data, batches, **kwargs):
+    question = SimpleNamespace(type=question_type, attributes=[])
+    full = stats.AggregatedAnswer(question)
+    full.execute_aggregator(clean_data, None, **kwargs)
+
+    incremental = stats.IncrementalAggregation(full.aggregator)
+    for batch in np.array_split(np.arange(len(clean_data)), batches):
+        incremental.update(clean_data.iloc[batch])
+    aggregated_answer = stats.AggregatedAnswer(question)
+    incremental.execute(aggregated_answer, None, **kwargs)
+    return aggregated_fields(full), aggregated_fields(aggregated_answer)
+
+
+@pytest.mark.parametrize("batches", [1, 3, 7])
+def test_incremental_type1_matches_full_with_missing_answers(batches):
+    attribute = placeholder_attribute()
+    clean_data = type1_clean_data(np.random.default_rng(batches), attribute)
+
+    full, incremental = aggregate_full_and_incremental(
+        1, clean_data, batches, attribute=attribute
+    )
+
+    assert incremental.keys() == full.keys()
+    assert incremental["mean_order"] == pytest.approx(full["mean_order"])
+    assert incremental["mean_value"] == pytest.approx(full["mean_value"])
+    assert incremental["placeholders"] == pytest.approx(full["placeholders"])
+
+
+def test_incremental_type1_non_numeric_names_have_no_mean_value():
+    attribute = placeholder_attribute()
+    clean_data = type1_clean_data(np.random.default_rng(0), attribute)
+    clean_data.loc[5, "placeholder_name"] = "mucho"
+
+    full, incremental = aggregate_full_and_incremental(
+        1, clean_data, 4, attribute=attribute
+    )
+
+    assert full["mean_value"] is None
+    assert incremental["mean_value"] is None
+
+
+def test_incremental_type2_matches_full():
+    clean_data = pd.DataFrame(
+        {"user_id": [7, 8, 9], "value": ["uno", "dos", "tres"], "code_sample_id": 100}
+    )
+
+    full, incremental = aggregate_full_and_incremental(2, clean_data, 2)
+
+    assert incremental == full
+
+
+@pytest.mark.parametrize("batches", [1, 4])
+def test_incremental_type4_matches_full(batches):
+    rng = np.random.default_rng(batches)
+    clean_data = pd.DataFrame(
+        {
+            "user_id": rng.integers(0, 30, 90),
+            "code_sample_id": 100,
+            "order": rng.choice([0, 1, 1, 2], 90),
+        }
+    )
+
+    full, incremental = aggregate_full_and_incremental(4, clean_data, batches)
+
+    assert incremental == full
+
+
+def test_incremental_type4_before_any_update_is_empty():
+    question = SimpleNamespace(type=4, attributes=[])
+    incremental = stats.IncrementalAggregation(stats.AggregatorType4())
+    incremental.update(pd.DataFrame({"code_sample_id": [], "order": []}))
+    aggregated_answer = stats.AggregatedAnswer(question)
+
+    incremental.execute(aggregated_answer, None)
+
+    assert aggregated_answer.order == {}
+    assert aggregated_answer.weighted_order == 0
+    assert aggregated_answer.mean_rank is None
+    assert aggregated_answer.median_rank is None
+
+
+def test_cleaner_type1_without_language_uses_numeric_names():
+    placeholder = SimpleNamespace(
+        id=11,
+        order=1,
+        translations=[
+            SimpleNamespace(key="name", lang="es", value="Nada"),
+            SimpleNamespace(key="name", lang="en", value="1"),
+        ],
+    )
+    answer = SimpleNamespace(
+        user_id=7, placeholder_id=11, placeholder=placeholder, code_sample_id=100
+    )
+
+    clean_data = stats.CleanerType1().execute(None, [answer])
+
+    assert clean_data["placeholder_name"].tolist() == ["1"]
+
+
+def synthetic_stats_clean_data(seed) -> list:
+    """(Stats, clean data) of every stat test of a synthetic session."""
+    synthetic = pytest.importorskip("benchmarks.stats_synthetic")
+    config = synthetic.SyntheticConfig(subjects=30, questions_per_section=8, seed=seed)
+    session, clean_data_by_question = synthetic.make_session(config, with_stats=False)
+    pairs = []
+    for section in session.sections:
+        for question in section.questions:
+            clean_data = clean_data_by_question[question.id]
+            for question_stats in question.stats:
+                data = clean_data
+                if question_stats.attribute_id is not None:
+                    data = clean_data[
+                        clean_data["attribute_id"] == question_stats.attribute_id
+                    ]
+                pairs.append((question_stats, data.copy()))
+    return pairs
+
+
+def stats_results(stats_list) -> list:
+    return [
+        (
+            question_stats.attribute_id,
+            getattr(question_stats, "p_value", None),
+            getattr(question_stats, "p_value_name", None),
+            [vars(comparison) for comparison in question_stats.pairwise],
+            [vars(comparison) for comparison in question_stats.pairwise_name],
+        )
+        for question_stats in stats_list
+    ]
+
+
+def test_stats_tests_in_process_pool_match_sequential():
+    sequential_pairs = synthetic_stats_clean_data(seed=0)
+    parallel_pairs = synthetic_stats_clean_data(seed=0)
+
+    sequential = stats.execute_stats_tests(sequential_pairs, max_workers=1)
+    parallel = stats.execute_stats_tests(
+        parallel_pairs, max_workers=2, min_parallel_jobs=1
+    )
+
+    assert parallel == [question_stats for question_stats, _ in parallel_pairs]
+    assert any(question_stats.p_value is not None for question_stats in parallel)
+    assert stats_results(parallel) == stats_results(sequential)
@@ -0,0 +1,129 @@
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from stats_cache import AggregatedSessionCache, Watermark
+
+
+class Question:
+    """Language-neutral aggregated question with a translated name."""
+
+    def __init__(self, question_id):
+        self.question_id = question_id
+        self.translation_sources = [
+            (
+                "name",
+                "lang",
+                [
+                    SimpleNamespace(
+                        key="name", lang=lang, value=f"{text} {question_id}"
+                    )
+                    for lang, text in (("es", "Pregunta"), ("en", "Question"))
+                ],
+            )
+        ]
+
+    def model_dump(self):
+        return {"id": self.question_id, "name": None, "lang": None, "stats": []}
+
+
+def rendered(question_id, lang="es", text="Pregunta"):
+    return {
+        "id": question_id,
+        "name": f"{text} {question_id}",
+        "lang": lang,
+        "stats": [],
+    }
+
+
+class Compute:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, question_id):
+        self.calls.append(question_id)
+        return Question(question_id)
+
+
+WATERMARKS = {
+    1: Watermark(datetime(2026, 1, 1, 10), 20),
+    2: Watermark(datetime(2026, 1, 1, 11), 5),
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AggregatedSessionCache(tmp_path / "cache")
+
+
+def test_miss_computes_and_stores_serialized_question(cache):
+    compute = Compute()
+
+    result = cache.get_or_compute("s1", "es", WATERMARKS, compute)
+
+    assert compute.calls == [1, 2]
+    assert result == {1: rendered(1), 2: rendered(2)}
+    assert cache.get("s1", 1, WATERMARKS[1])["name"] is None
+
+
+def test_hit_does_not_recompute(cache):
+    cache.get_or_compute("s1", "es", WATERMARKS, Compute())
+    compute = Compute()
+
+    result = cache.get_or_compute("s1", "es", WATERMARKS, compute)
+
+    assert compute.calls == []
+    assert result[2] == rendered(2)
+
+
+def test_other_language_is_a_hit_rendered_in_that_language(cache):
+    cache.get_or_compute("s1", "es", WATERMARKS, Compute())
+    compute = Compute()
+
+    result = cache.get_or_compute("s1", "en", WATERMARKS, compute)
+
+    assert compute.calls == []
+    assert result[1] == rendered(1, "en", "Question")
+
+
+def test_moved_watermark_recomputes_only_that_question(cache):
+    cache.get_or_compute("s1", "es", WATERMARKS, Compute())
+    compute = Compute()
+
+    cache.get_or_compute(
+        "s1", "es", {**WATERMARKS, 2: Watermark(datetime(2026, 1, 1, 12), 6)}, compute
+    )
+
+    assert compute.calls == [2]
+    assert cache.get("s1", 2, WATERMARKS[2]) is None
+
+
+def test_other_session_is_a_miss(cache):
+    cache.get_or_compute("s1", "es", WATERMARKS, Compute())
+
+    assert cache.get("s2", 1, WATERMARKS[1]) is None
+
+
+def test_eviction_keeps_directory_under_max_bytes(tmp_path):
+    cache = AggregatedSessionCache(tmp_path / "cache", max_bytes=1)
+
+    cache.get_or_compute("s1", "es", WATERMARKS, Compute())
+
+    assert cache.size <= 1
+    assert list(cache.directory.glob("*.pkl")) == []
+
+
+def test_directory_is_private(cache):
+    assert cache.directory.stat().st_mode & 0o777 == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_shared_directory_is_refused(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    directory.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        AggregatedSessionCache(directory)
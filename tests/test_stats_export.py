@@ -0,0 +1,12 @@
+import sys
+
+import pytest
+
+import stats_export
+
+
+def test_missing_pyarrow_names_the_export_extra(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ImportError, match="'export' extra"):
+        stats_export.read_clean_data(tmp_path)
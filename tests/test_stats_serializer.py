@@ -0,0 +1,71 @@
+import json
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+import pytest
+from models import AnswerBase
+
+import stats
+import stats_serializer
+
+DATA = {
+    "user_id": UUID(int=7),
+    "created": datetime(2026, 1, 2, 3, 4, 5),
+    "order": {0: 3, 2: 1},
+    "mean_value": np.float64(2.5),
+    "median_rank": float("nan"),
+    "counts": np.array([1, 2, 3]),
+    "results": [{"n": np.int32(4), "percent": None, "text": "á"}],
+}
+
+
+def test_stdlib_fallback_writes_the_same_json_as_orjson(monkeypatch):
+    pytest.importorskip("orjson")
+    with_orjson = stats_serializer.dumps(DATA)
+
+    monkeypatch.setattr(stats_serializer, "orjson_module", lambda: None)
+    fallback = stats_serializer.dumps(DATA)
+
+    assert json.loads(fallback) == json.loads(with_orjson)
+
+
+def test_stdlib_fallback_output(monkeypatch):
+    monkeypatch.setattr(stats_serializer, "orjson_module", lambda: None)
+
+    assert json.loads(stats_serializer.dumps(DATA)) == {
+        "user_id": "00000000-0000-0000-0000-000000000007",
+        "created": "2026-01-02T03:04:05",
+        "order": {"0": 3, "2": 1},
+        "mean_value": 2.5,
+        "median_rank": None,
+        "counts": [1, 2, 3],
+        "results": [{"n": 4, "percent": None, "text": "á"}],
+    }
+
+
+def translate_tree(node, selected_lang):
+    """Fill in the texts of every node in place, as a session built in that language."""
+    if getattr(node, "translation_sources", None):
+        stats.apply_translations(node, selected_lang)
+    _, nested = stats_serializer.serialized_fields(type(node))
+    for name in nested:
+        value = getattr(node, name, None)
+        for child in value if isinstance(value, list) else [value]:
+            if isinstance(child, AnswerBase):
+                translate_tree(child, selected_lang)
+
+
+@pytest.mark.parametrize("selected_lang", [None, "es"])
+def test_session_json_matches_model_dump_json(selected_lang):
+    synthetic = pytest.importorskip("benchmarks.stats_synthetic")
+    neutral, _ = synthetic.make_session(synthetic.SyntheticConfig(subjects=30, seed=3))
+    serialized = stats_serializer.serialize_session(neutral, selected_lang)
+    chunks = b"".join(stats_serializer.iter_session_json(neutral, selected_lang))
+
+    if selected_lang is not None:
+        translate_tree(neutral, selected_lang)
+    expected = json.loads(neutral.model_dump_json())
+
+    assert json.loads(serialized) == expected
+    assert json.loads(chunks) == expected